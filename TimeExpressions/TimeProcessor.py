@@ -1,14 +1,138 @@
+from collections import Counter
 from datetime import datetime
-from deeppavlov import build_model
-from spacy.pipeline import EntityRuler
 from spacy.tokens import Doc, Span
-from spacy.vocab import Vocab
 from spacy.language import Language
 
 from TimeExpressions import time_patterns
+from TimeExpressions.dispatch import DispatchRuler
 import sys
 sys.path.append("..")
-from utils import doc_from_conllu, convert_to_dataframe
+from utils import parsed_doc, plain_doc, TriggerIndex, LRUCache, convert_to_dataframe, DependencyRange, dependency_tree, strptime, blank_vocab
+
+# marker of missing normal forms in norm_cache, since normal forms can be None
+missing = object()
+
+
+class TimeRule:
+    """
+    Rule of time_patterns.rules compiled once: its form is classified and computation of uncertainty
+    is chosen in advance, so a time expression is finalized by one lookup of its rule.
+    Parameters
+    ----------
+    name : str
+        Name of rule, i.e. ent_id_ of its time expressions.
+    rule : dict
+        Rule with norm function, form, stamp and uncertainty.
+
+    Attributes
+    ----------
+    kind : str
+        Kind of form: 'triangle', 'fuzzy_triangle', 'point' (form [None]) or 'trapezoid' (other forms).
+    uses_date : bool
+        Flag, that norm function uses date of observation.
+    uses_birthday : bool
+        Flag, that norm function uses birth date.
+    offsets : list, None
+        Offsets of fixed uncertainty of symmetric forms from normal form.
+    bounds : tuple, None
+        Offsets of fixed uncertainty of trapezoid from the first and the last normal forms.
+    uncertainty : callable
+        Function of time expression and its normal form, which gives uncertainty.
+    """
+
+    __slots__ = ("name", "norm", "form", "stamp", "uncertain", "kind", "uses_date", "uses_birthday",
+                 "offsets", "bounds", "uncertainty")
+
+    # symmetric forms, their uncertainties are normal form with scaled uncertainty
+    forms = {"triangle": [-1, 0, 1], "point": [None], "fuzzy_triangle": [-2, 0, 2]}
+
+    def __init__(self, name, rule):
+        self.name = name
+        self.norm = rule['norm']
+        self.form = rule['form']
+        self.stamp = rule['stamp']
+        self.uncertain = rule['uncertain']
+        self.uses_date, self.uses_birthday = self.dates_of_norm(self.norm)
+        self.kind = "trapezoid"
+        for kind, form in self.forms.items():
+            if self.form == form:
+                self.kind = kind
+        self.offsets = self.bounds = None
+
+        # fixed uncertainties are scaled in advance, wrong ones raise errors for time expressions as before
+        if self.kind != "trapezoid":
+            if callable(self.uncertain):
+                self.uncertainty = self.scaled_uncertainty
+            else:
+                try:
+                    self.offsets = [self.uncertain * i for i in self.form if i is not None]
+                    self.uncertainty = self.fixed_uncertainty
+                except Exception:
+                    self.uncertainty = self.scaled_uncertainty
+        elif callable(self.uncertain):
+            self.uncertainty = self.trapezoid_uncertainty
+        else:
+            try:
+                self.bounds = self.bounds_of(self.uncertain)
+                self.uncertainty = self.fixed_uncertainty
+            except Exception:
+                self.uncertainty = self.trapezoid_uncertainty
+
+    def dates_of_norm(self, norm):
+        """
+        Check, which dates norm function of rule uses, i.e. names 'date' and 'birthday' in its code
+        like ent.doc._.date. Names of nested functions are checked too.
+        Parameters
+        ----------
+        norm : callable
+            Norm function of rule.
+
+        Returns
+        -------
+        uses_date : bool
+            Flag, that function uses date of observation.
+        uses_birthday : bool
+            Flag, that function uses birth date.
+        """
+        names = set()
+        codes = [norm.__code__]
+        while codes:
+            code = codes.pop()
+            names.update(code.co_names)
+            codes.extend(const for const in code.co_consts if hasattr(const, "co_names"))
+        return "date" in names, "birthday" in names
+
+    def bounds_of(self, uncertain):
+        """
+        Get offsets of trapezoid from uncertainty: a pair of them or one for both sides.
+        """
+        if type(uncertain) is list:
+            return uncertain[0], uncertain[1]
+        return uncertain, uncertain
+
+    def fixed_uncertainty(self, ent, norm):
+        """
+        Get uncertainty by offsets, which are found in advance.
+        """
+        if self.bounds is not None:
+            return [norm[0] - self.bounds[0]] + norm + [norm[1] + self.bounds[1]]
+        return [norm + offset for offset in self.offsets]
+
+    def scaled_uncertainty(self, ent, norm):
+        """
+        Get uncertainty of symmetric form, uncertainty function of rule is called once.
+        """
+        if callable(self.uncertain):
+            uncertain = self.uncertain(ent)
+            return [norm + uncertain * i for i in self.form]
+        return [norm + self.uncertain * i for i in self.form if i is not None]
+
+    def trapezoid_uncertainty(self, ent, norm):
+        """
+        Get uncertainty of trapezoid, uncertainty function of rule is called once.
+        """
+        low, high = self.bounds_of(self.uncertain(ent) if callable(self.uncertain) else self.uncertain)
+        return [norm[0] - low] + norm + [norm[1] + high]
 
 
 class TimeProcessor:
@@ -22,6 +146,24 @@ class TimeProcessor:
         Flag, which allows to normalize time expressions.
     event : bool, (default=True)
         Flag, which allows to parse events for time expressions.
+    cache_size : int, (default=100000)
+        Maximum number of normal forms in norm_cache. Nothing is cached if it is 0.
+    vocab : Spacy vocab, (default=None)
+        Vocabulary of docs, e.g. shared with other processors. A new one is created if None.
+
+    Attributes
+    ----------
+    stats : Counter
+        Counts of processed sentences ('sentences'), analysed sentences ('analysed'),
+        repeated sentences, which reused results of identical ones ('reused'),
+        and sentences without triggers of rules, which were not matched ('skipped').
+    triggers : TriggerIndex
+        Index of tokens required by time patterns.
+    norm_cache : LRUCache
+        Normal forms of time expressions by rules, words and lemmas of expressions, dates of observation and birth.
+        Use norm_cache.info() to get hit rate.
+    table : dict
+        Compiled rules (TimeRule) by their names.
 
     Examples
     --------
@@ -41,10 +183,10 @@ class TimeProcessor:
       'восстановлен синусовый ритм')]
     """
 
-    def __init__(self, normalize=True, event=True):
+    def __init__(self, normalize=True, event=True, cache_size=100000, vocab=None):
 
-        self.nlp = Language(Vocab())
-        self.ruler = EntityRuler(self.nlp)
+        self.nlp = Language(blank_vocab() if vocab is None else vocab)
+        self.ruler = DispatchRuler(self.nlp)
 
         self.rules = time_patterns.rules
         pattern = []
@@ -53,6 +195,11 @@ class TimeProcessor:
                 {"label": 'EXPR', "pattern": self.rules[rule]['pattern'], "id": rule})
         self.ruler.add_patterns(pattern)
         self.nlp.add_pipe(self.ruler)
+        self.triggers = TriggerIndex([self.rules[rule]['pattern'] for rule in self.rules])
+
+        self.stats = Counter()
+        self.norm_cache = LRUCache(cache_size)
+        self.table = {name: TimeRule(name, rule) for name, rule in self.rules.items()}
 
         self.Span = Span
         self.Doc = Doc
@@ -83,69 +230,89 @@ class TimeProcessor:
         event : list
             Time event.
         """
-        root = [token for token in doc if token.head == token][0]
+        return self.search_event(dependency_tree(doc), expr)[0]
+
+    def search_event(self, tree, expr):
+        """
+        Find event for particular time expression in part of sentence.
+        Parts of complex sentence are processed as ranges of its tokens without copies of the doc.
+        Parameters
+        ----------
+        tree : DependencyRange
+            Dependency tree of part of parsed sentence.
+        expr : Spacy span
+            Time expression for which you want to find the event.
+
+        Returns
+        -------
+        event : list
+            Time event.
+        tree : DependencyRange
+            Dependency tree of part of sentence, where the event is found.
+        """
+        doc = tree.doc
+        root = doc[tree.roots[0]]
         event = list()
         time_root = expr.root
 
-        # search for a relative clause
-        internal_sent = list()
+        # search for a relative clause, end is index in the part
         end = None
         if time_root.text != root.text:
-            for child in root.children:
+            for child in tree.children(root):
                 if (
-                    child.dep_ in ["conj", "parataxis", "acl:relcl", "advcl"]
-                    and len(list(child.children)) > 0
-                    and not list(child.children)[0].is_bracket
+                    tree.is_clause(child)
+                    and len(tree.children(child)) > 0
+                    and not tree.children(child)[0].is_bracket
                 ):
+                    subtree = tree.subtree(child)
                     if not end:
-                        end = list(child.subtree)[0].i
-                    int_sent = Span(
-                        doc, list(child.subtree)[0].i, list(
-                            child.subtree)[-1].i + 1
-                    )
-                    internal_sent.append(int_sent)
+                        end = subtree[0].i - tree.start
+                    int_sent = tree.text(subtree[0].i, subtree[-1].i + 1)
                     if (
-                        expr.text in int_sent.text
-                        and expr.text != int_sent.text
-                        and int_sent.text != time_root.text
-                        and doc.text[:-1] != int_sent.text
+                        expr.text in int_sent
+                        and expr.text != int_sent
+                        and int_sent != time_root.text
+                        and tree.text_with_ws()[:-1] != int_sent
                     ):
-                        return self.find_event(int_sent.as_doc(), expr, exprs)
+                        return self.search_event(
+                            DependencyRange(doc, subtree[0].i, subtree[-1].i + 1, parent=tree), expr)
 
         if end:
-            if expr.text in Span(doc, 0, end).text:
-                doc = Span(doc, 0, end).as_doc()
-        elif doc[-1].pos_ == "PUNCT":
-            doc = Span(doc, 0, len(doc) - 1).as_doc()
-        root = [w for w in doc if w.head == w][0]
+            if expr.text in tree.text(tree.start, tree.start + end):
+                tree = DependencyRange(doc, tree.start, tree.start + end, parent=tree)
+        elif tree.pos(tree[-1]) == "PUNCT":
+            tree = DependencyRange(doc, tree.start, tree.end - 1, parent=tree)
+        root = doc[tree.roots[0]]
         try:
-            all_expr = [w for ent in doc.ents for w in list(ent)]
+            all_expr = tree.entity_tokens()
         except ValueError:
             all_expr = expr
         time_root = expr.root
+        # time expression is searched in the tree of the whole sentence
+        sentence_tree = dependency_tree(doc)
 
-        if len(list(root.children)) == 1:
-            child = list(root.children)[0]
+        if len(tree.children(root)) == 1:
+            child = tree.children(root)[0]
             if not any(child.text == word.text for word in all_expr):
                 root = child
 
         # Extracting an event if it is inside the tree of the formed temporal exprssion 
         if time_root and time_root.text != root.text:
-            for w in time_root.subtree:
+            for w in sentence_tree.subtree(time_root):
                 if (
                     not any(w.text == word.text for word in all_expr)
                     and (w.tag_ not in ["CCONJ", "SCONJ", "PUNCT", "ADP", "PART"])
-                    and (w.pos_ not in ["ADV"])
+                    and (sentence_tree.pos(w) not in ["ADV"])
                     and (w.lemma_ not in ["год", "."])
                 ):
                     event.append(w)
 
         if event:
-            return event
+            return event, sentence_tree
 
         # if the sentence has few branches
-        if len([i for i in root.children]) <= 2:
-            for w in root.subtree:
+        if len(tree.children(root)) <= 2:
+            for w in tree.subtree(root):
                 if (
                     not any(w.text == word.text for word in all_expr)
                     and (w.tag_ not in ["SCONJ", "PUNCT", "ADV"])
@@ -153,37 +320,35 @@ class TimeProcessor:
                 ):
                     event.append(w)
             if event:
-                return event
+                return event, tree
 
         # search for required types of links
-        if root.pos_ == "VERB":
-            for child in root.children:
-                if child.dep_ == "xcomp":
+        if tree.pos(root) == "VERB":
+            for child in tree.children(root):
+                if tree.dep(child) == "xcomp":
                     new_root = child
                     event.append(root)
-                    for w in new_root.subtree:
+                    for w in tree.subtree(new_root):
                         event.append(w)
 
         cut = False
-        for child in root.children:
-            if child.dep_ in ["nsubj:pass", "nsubj"] and not event and child.text != expr.text:
+        for child in tree.children(root):
+            if tree.dep(child) in ["nsubj:pass", "nsubj"] and not event and child.text != expr.text:
                 new_root = child
-                if len(list(new_root.children)) > 1 and len(list(new_root.subtree)) > 8:
-                    doc = Span(
-                        doc, list(new_root.subtree)[0].i, list(
-                            new_root.subtree)[-1].i + 1
-                    ).as_doc()
-                    root = [w for w in doc if w.head == w][0]
+                if len(tree.children(new_root)) > 1 and tree.subtree_size(new_root) > 8:
+                    subtree = tree.subtree(new_root)
+                    tree = DependencyRange(doc, subtree[0].i, subtree[-1].i + 1, parent=tree)
+                    root = doc[tree.roots[0]]
                     cut = True
                     break
-                if len(list(new_root.subtree)) == 1 and root.pos_ == "VERB":
-                    if list(new_root.subtree)[0].lemma_ not in ["пациент", "пациентка"]:
+                if tree.subtree_size(new_root) == 1 and tree.pos(root) == "VERB":
+                    if new_root.lemma_ not in ["пациент", "пациентка"]:
                         event.append(root)
                         event.append(new_root)
-                if len(list(new_root.subtree)) > 1:
-                    if root.pos_ != "NOUN" and root.lemma_ != "принимать":
+                if tree.subtree_size(new_root) > 1:
+                    if tree.pos(root) != "NOUN" and root.lemma_ != "принимать":
                         event.append(root)
-                    for w in new_root.subtree:
+                    for w in tree.subtree(new_root):
                         if not any(w.text == word.text for word in all_expr):
                             event.append(w)
                     break
@@ -192,36 +357,42 @@ class TimeProcessor:
             if len(event) == 1 and event[0].text == root.text:
                 event = []
             else:
-                return event
+                return event, tree
 
         # if there are many shallow branches in the sentence
         words = list()
-        for w in root.subtree:
+        for w in tree.subtree(root):
             if (
                 not any(w.text == word.text for word in all_expr)
-                and (w.pos_ != "PUNCT")
+                and (tree.pos(w) != "PUNCT")
                 and (w.text != "х")
             ):
                 words.append(w)
 
         if words and len(words) <= 3:
             event.extend(words)
-            return event
+            return event, tree
 
         # if the temporal exprssion is inside a complex structure, then we break it down into simpler structures
         try:
             if (
                 time_root
-                and time_root.head.text != root.text
-                and len(list(time_root.head.children)) > 1
+                and sentence_tree.head(time_root).text != root.text
+                and len(sentence_tree.children(sentence_tree.head(time_root))) > 1
                 and not cut
             ):
-                for w in doc:
+                # the last token of the part with the same text replaces the root of time expression,
+                # otherwise indices of its tree in the whole sentence are taken as indices in the part
+                head_tree, offset = sentence_tree, tree.start
+                for w in tree:
                     if w.text == time_root.text:
                         time_root = w
-                new_root = list(time_root.head.subtree)
-                internal_sent = Span(doc, new_root[0].i, new_root[-1].i)
-                return self.find_event(internal_sent.as_doc(), expr, exprs)
+                        head_tree, offset = tree, 0
+                new_root = head_tree.subtree(head_tree.head(time_root))
+                start, end = new_root[0].i + offset, new_root[-1].i + offset
+                if not tree.start <= start <= end <= tree.end:
+                    raise IndexError("Part of sentence is out of range")
+                return self.search_event(DependencyRange(doc, start, end, parent=tree), expr)
         except (IndexError, ZeroDivisionError):
             pass
 
@@ -230,16 +401,17 @@ class TimeProcessor:
             event.append(root)
 
         new_root = None
-        if root.n_rights:
-            if not any(list(root.rights)[0].text == w.text for w in all_expr):
-                new_root = list(root.rights)[0]
+        rights, lefts = tree.rights(root), tree.lefts(root)
+        if rights:
+            if not any(rights[0].text == w.text for w in all_expr):
+                new_root = rights[0]
 
-        if (root.n_lefts) and (not new_root):
-            if not any(list(root.lefts)[0].text == w.text for w in all_expr):
-                new_root = list(root.lefts)[0]
+        if (lefts) and (not new_root):
+            if not any(lefts[0].text == w.text for w in all_expr):
+                new_root = lefts[0]
 
         if new_root:
-            for w in list(new_root.subtree)[:5]:
+            for w in tree.subtree(new_root)[:5]:
                 if (
                     not any(w.text == word.text for word in all_expr)
                     and (w.tag_ not in ["SCONJ", "PUNCT"])
@@ -247,9 +419,9 @@ class TimeProcessor:
                 ):
                     event.append(w)
 
-        return event
+        return event, tree
 
-    def post_proccess(self, event):
+    def post_proccess(self, event, tree=None):
         """
         Post process time events. 
         Remove punctiation, second parts of sentences, particullar preps and conjunctions.
@@ -257,28 +429,33 @@ class TimeProcessor:
         ----------
         span : Spacy Span
             Parsed sentence.
+        tree : DependencyRange, (default=None)
+            Dependency tree of part of sentence, where the event is found. Tree of the whole sentence is used if None.
 
         Returns
         -------
         event : list
             Processed event.
         """
-        while event[0].pos_ in ["CCONJ", "PUNCT", "PRON"] or event[0].lemma_ in ["по", "от", "после", "около"]:
+        if tree is None:
+            tree = dependency_tree(event[0].doc)
+
+        while tree.pos(event[0]) in ["CCONJ", "PUNCT", "PRON"] or event[0].lemma_ in ["по", "от", "после", "около"]:
             event = event[1:]
             if not event:
                 break
 
         while (event) and (
-            event[-1].pos_ in ["CCONJ", "PUNCT", "ADP"]
+            tree.pos(event[-1]) in ["CCONJ", "PUNCT", "ADP"]
             or event[-1].lemma_ in ["где", "когда", "диагноз"]
-            or event[-1].dep_ in ["conj", "parataxis", "acl:relcl", "advcl"]
+            or tree.is_clause(event[-1])
         ):
             event = event[:-1]
 
         for word in event:
-            if word.dep_ in ["conj", "parataxis", "acl:relcl", "advcl"]:
-                if len(event) > len(list(word.subtree)):
-                    [event.remove(w) for w in word.subtree if w in event]
+            if tree.is_clause(word):
+                if len(event) > tree.subtree_size(word):
+                    [event.remove(w) for w in tree.subtree(word) if w in event]
 
         return event
 
@@ -295,52 +472,157 @@ class TimeProcessor:
         result : list
             List of time events.
         """
-        doc = span.doc
-        exprs = doc.ents
-        event = self.find_event(doc, span, exprs)
+        event, tree = self.search_event(dependency_tree(span.doc), span)
         if event:
-            event = self.post_proccess(event)
+            event = self.post_proccess(event, tree)
         return " ".join([w.text for w in event])
 
     def get_uncertain(self, ent):
         """
         get uncertain for event using rules from patterns file.
+        Uncertainty is computed by compiled rule of expression, see TimeRule.
         Parameters
         ----------
         ent : Spacy Entity
             Time expression.
         """
+        ent._.uncertain = self.table[ent.ent_id_].uncertainty(ent, ent._.normal_form)
 
-        r_uncertain = self.rules[ent.ent_id_]['uncertain']
-        r_form = self.rules[ent.ent_id_]['form']
-        norm = ent._.normal_form
-        # ent._.form with [-1, 0, 1] is equal to triangle form
-        # ent._.form with [-2, 0, 2] is equal to fuzzy triangle form
-        if ent._.form in [[-1, 0, 1], [None], [-2, 0, 2]]:
-            # processing uncertain for triangle and fuzzy triangle forms
-            if callable(r_uncertain):
-                ent._.uncertain = [norm + r_uncertain(ent) * i for i in r_form]
-            else:
-                ent._.uncertain = [norm + r_uncertain *
-                                   i for i in r_form if i is not None]
+    def convert_date(self, date):
+        """
+        Convert date of observation to datetime.
+        Parameters
+        ----------
+        date : str, datetime, None
+            Date of observation, current date is used if None.
+
+        Returns
+        -------
+        date : datetime
+        """
+        if isinstance(date, str):
+            return strptime(date[:-3], "%Y-%m-%d %H:%M")
+        elif isinstance(date, datetime):
+            return date
+        elif isinstance(date, type(None)):
+            return datetime.now()
         else:
-            # processing uncertain for trapezoid form
-            if callable(r_uncertain):
-                if type(r_uncertain(ent)) is list:
-                    ent._.uncertain = [
-                        norm[0] - r_uncertain(ent)[0]] + norm + [norm[1] + r_uncertain(ent)[1]]
-                else:
-                    ent._.uncertain = [
-                        norm[0] - r_uncertain(ent)] + norm + [norm[1] + r_uncertain(ent)]
-            else:
-                if type(r_uncertain) is list:
-                    ent._.uncertain = [norm[0] - r_uncertain[0]
-                                       ] + norm + [norm[1] + r_uncertain[1]]
+            raise TypeError("date must be str, datetime or Nonetype")
+
+    def convert_birthday(self, birthday):
+        """
+        Convert birth date to datetime.
+        Parameters
+        ----------
+        birthday : str, datetime, None
+            Birth date.
+
+        Returns
+        -------
+        birthday : datetime, None
+        """
+        if isinstance(birthday, str):
+            try:
+                return strptime(birthday, "%Y-%m-%d")
+            except ValueError:
+                return strptime(birthday[:-3], "%Y-%m-%d %H:%M")
+        elif isinstance(birthday, datetime):
+            return birthday
+        elif isinstance(birthday, type(None)):
+            return None
+        else:
+            raise TypeError("birthday must be str, datetime or Nonetype")
+
+    def convert_dates(self, dates, birthdays, parsed_sentences):
+        """
+        Convert columns of dates of observation and birth dates of sentences before their processing.
+        Every distinct string is converted once, dates of empty sentences are not converted.
+        Parameters
+        ----------
+        dates : list
+            Dates of observation of sentences in string or datetime format.
+        birthdays : list
+            Birth dates of sentences in string or datetime format.
+        parsed_sentences : list
+            Parsed sentences.
+
+        Returns
+        -------
+        dates : list
+            Dates of observation in datetime format, None for empty sentences.
+        birthdays : list
+            Birth dates in datetime format, None for empty sentences.
+        """
+        columns = []
+        for values, convert in [(dates, self.convert_date), (birthdays, self.convert_birthday)]:
+            converted = dict()
+            column = []
+            for sent in range(len(parsed_sentences)):
+                if len(parsed_sentences[sent]) == 0:
+                    column.append(None)
+                    continue
+                value = values[sent]
+                if isinstance(value, str):
+                    if value not in converted:
+                        converted[value] = convert(value)
+                    column.append(converted[value])
                 else:
-                    ent._.uncertain = [norm[0] - r_uncertain] + \
-                        norm + [norm[1] + r_uncertain]
+                    column.append(convert(value))
+            columns.append(column)
+        return columns[0], columns[1]
 
-    def process(self, parsed_sentences=None, sentence=None, parser=None, date=None, birthday=None, to_dataframe=False, save=False):
+    def normal_form(self, ent, rule=None):
+        """
+        Get normal form of time expression by norm function of its rule.
+        Norm functions depend on words and lemmas of expression, dates of observation and birth only,
+        so normal forms are memoized in norm_cache by them and the rule. Dates are the part of the key
+        only if the norm function uses them.
+        Parameters
+        ----------
+        ent : Spacy Entity
+            Time expression.
+        rule : TimeRule, (default=None)
+            Compiled rule of expression, it is found by ent.ent_id_ if None.
+
+        Returns
+        -------
+        result : datetime, list
+            Normal form, lists are copied for every expression.
+        """
+        if rule is None:
+            rule = self.table[ent.ent_id_]
+        doc = ent.doc
+        key = (rule.name, tuple((token.text, token.whitespace_, token.lemma_) for token in ent),
+               doc._.date if rule.uses_date else None, doc._.birthday if rule.uses_birthday else None)
+        norm = self.norm_cache.get(key, missing)
+        if norm is missing:
+            norm = rule.norm(ent)
+            self.norm_cache.put(key, norm)
+        return list(norm) if isinstance(norm, list) else norm
+
+    def annotate(self, doc, date, birthday):
+        """
+        Set dates of doc and normal forms, stamps and uncertainties of its time expressions.
+        Parameters
+        ----------
+        doc : Spacy doc
+            Parsed sentence with time expressions in doc.ents.
+        date : datetime
+            Date of observation.
+        birthday : datetime, None
+            Birth date.
+        """
+        doc._.date = date
+        doc._.birthday = birthday
+        for ent in doc.ents:
+            rule = self.table[ent.ent_id_]
+            norm = self.normal_form(ent, rule)
+            ent._.normal_form = norm
+            ent._.form = rule.form
+            ent._.timestamp = rule.stamp
+            ent._.uncertain = rule.uncertainty(ent, norm)
+
+    def process(self, parsed_sentences=None, sentence=None, parser=None, date=None, birthday=None, to_dataframe=False, save=False, dedup=True, prefilter=False):
         """
         Process time expressions. Check types of input parameters. 
         Parameters
@@ -356,9 +638,17 @@ class TimeProcessor:
         parser : object (default=None)
             Syntax parser, used if parsed_sentences is None.
         parsed_sentences : list (default=None)
-            List of parsed senteces, if they are already parsed in conllu format.
+            List of parsed senteces, if they are already parsed in conllu format,
+            or list of docs restored by syntax.corpus.CorpusReader. Docs are processed in place, if they have
+            the vocabulary of the processor and were not processed yet, other docs are copied (see utils.parsed_doc).
         to_dataframe : bool (default=False)
             Flag, which allows to save result of parsing in conllu format.
+        dedup : bool (default=True)
+            Flag, which allows to analyse identical sentences with identical dates once.
+            Such sentences share one doc in the result.
+        prefilter : bool (default=False)
+            Flag, which allows to skip matching of sentences without triggers of time patterns.
+            Docs of such sentences from CONLL-U have words only, without tags and dependency tree.
         Returns
         -------
         result : list
@@ -391,42 +681,33 @@ class TimeProcessor:
             self.birthdays = birthday
 
         # convert string parameters to datetime
+        dates, birthdays = self.convert_dates(self.dates, self.birthdays, parsed_sentences)
+        processed = dict()
         for sent in range(len(parsed_sentences)):
             if len(parsed_sentences[sent]) == 0:
                 continue
-            if isinstance(self.dates[sent], str):
-                self.date = datetime.strptime(
-                    self.dates[sent][:-3], "%Y-%m-%d %H:%M")
-            elif isinstance(self.dates[sent], datetime):
-                self.date = self.dates[sent]
-            elif isinstance(self.dates[sent], type(None)):
-                self.date = datetime.now()
-            else:
-                raise TypeError("date must be str, datetime or Nonetype")
+            self.stats['sentences'] += 1
+            if dedup:
+                key = (parsed_sentences[sent], str(self.dates[sent]), str(self.birthdays[sent]))
+                if key in processed:
+                    self.stats['reused'] += 1
+                    docs.append(processed[key])
+                    continue
+            self.date = dates[sent]
+            self.birthday = birthdays[sent]
 
-            if isinstance(self.birthdays[sent], str):
-                try:
-                    self.birthday = datetime.strptime(self.birthdays[sent], "%Y-%m-%d")
-                except ValueError:
-                    self.birthday = datetime.strptime(self.birthdays[sent][:-3], "%Y-%m-%d %H:%M")
-            elif isinstance(self.birthdays[sent], datetime):
-                self.birthday = self.birthdays[sent]
-            elif isinstance(self.birthdays[sent], type(None)):
-                self.birthday = None
-            else:
-                raise TypeError("birthday must be str, datetime or Nonetype")
-            
             # time expressions parsing
-            self.doc = doc_from_conllu(
-                self.nlp.vocab, parsed_sentences[sent].split("\n"))
-            self.doc._.date = self.date
-            self.doc._.birthday = self.birthday
-            self.ruler(self.doc)
-            for ent in self.doc.ents:
-                ent._.normal_form = self.rules[ent.ent_id_]['norm'](ent)
-                ent._.form = self.rules[ent.ent_id_]['form']
-                ent._.timestamp = self.rules[ent.ent_id_]['stamp']
-                self.get_uncertain(ent)
+            if prefilter and not self.triggers.check(parsed_sentences[sent]):
+                self.doc = plain_doc(self.nlp.vocab, parsed_sentences[sent])
+                self.annotate(self.doc, self.date, self.birthday)
+                self.stats['skipped'] += 1
+            else:
+                self.doc = parsed_doc(self.nlp.vocab, parsed_sentences[sent])
+                self.ruler(self.doc)
+                self.annotate(self.doc, self.date, self.birthday)
+                self.stats['analysed'] += 1
+            if dedup:
+                processed[key] = self.doc
             docs.append(self.doc)
 
         if to_dataframe == True:
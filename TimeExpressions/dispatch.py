@@ -0,0 +1,572 @@
+import re
+
+from spacy.attrs import IDS, LEMMA, POS, TAG, DEP
+from spacy.strings import get_string_id
+from spacy.tokens import Span, Token
+
+import sys
+sys.path.append("..")
+from utils import LRUCache
+
+# quantifiers of pattern tokens in the same order as in spacy Matcher
+ZERO, ZERO_ONE, ZERO_PLUS, ONE = range(4)
+operators = {"*": (ZERO_PLUS,), "+": (ONE, ZERO_PLUS), "?": (ZERO_ONE,), "1": (ONE,), "!": (ZERO,)}
+# actions of states of patterns, the same as in spacy Matcher, retries are the last ones
+(REJECT, ADVANCE, MATCH, MATCH_DOUBLE, MATCH_REJECT, MATCH_EXTEND,
+ RETRY, RETRY_ADVANCE, RETRY_EXTEND) = range(9)
+
+
+def get_action(quantifier, is_match, is_final):
+    """
+    Get action of pattern state on the current token, the same as in spacy Matcher.
+    """
+    if quantifier == ZERO:
+        is_match = not is_match
+        quantifier = ONE
+    if quantifier == ONE:
+        if is_match:
+            return MATCH if is_final else ADVANCE
+        return REJECT
+    if quantifier == ZERO_PLUS:
+        if is_match:
+            return MATCH_EXTEND if is_final else RETRY_EXTEND
+        return MATCH_REJECT if is_final else RETRY
+    if is_match:
+        return MATCH_DOUBLE if is_final else RETRY_ADVANCE
+    return MATCH_REJECT if is_final else RETRY
+
+
+class TokenCheck:
+    """
+    Check of one token of pattern: attributes, extensions and predicates (IN, NOT_IN, REGEX, comparisons).
+    Unknown attributes and values of unsupported types raise ValueError like in spacy Matcher.
+    Parameters
+    ----------
+    spec : dict
+        Token spec of pattern.
+    strings : Spacy StringStore
+        Strings of the matcher vocabulary.
+    """
+
+    comparisons = {
+        "==": lambda a, b: a == b,
+        ">=": lambda a, b: a >= b,
+        "<=": lambda a, b: a <= b,
+        ">": lambda a, b: a > b,
+        "<": lambda a, b: a < b,
+    }
+
+    def __init__(self, spec, strings):
+        self.attrs = []
+        self.extensions = []
+        self.predicates = []
+        for attr, value in spec.items():
+            if attr == "_":
+                for name, ext_value in value.items():
+                    if isinstance(ext_value, dict):
+                        self.add_predicates(("_", name), ext_value)
+                    else:
+                        self.extensions.append((name, ext_value))
+                continue
+            if attr.upper() == "OP":
+                continue
+            name = attr.upper() if attr.upper() != "TEXT" else "ORTH"
+            if name not in IDS:
+                raise ValueError("Attribute {} is not supported in token patterns".format(attr))
+            attr_id = IDS[name]
+            if isinstance(value, dict):
+                self.add_predicates(attr_id, value)
+            elif isinstance(value, str):
+                self.attrs.append((attr_id, strings.add(value)))
+            elif isinstance(value, int):
+                # booleans are compared as 0 and 1, integers as they are, e.g. {"LENGTH": 2}
+                self.attrs.append((attr_id, int(value)))
+            else:
+                raise ValueError("Value type {} is not supported in token patterns".format(type(value).__name__))
+        if not spec:
+            # any token
+            self.attrs.append((0, 0))
+
+    def add_predicates(self, attr, value):
+        """
+        Add predicates of attribute in the same order as spacy Matcher.
+        """
+        for type_ in ["REGEX", "IN", "NOT_IN", "==", ">=", "<=", ">", "<"]:
+            if type_ in value:
+                if type_ == "REGEX":
+                    arg = re.compile(value[type_])
+                elif type_ in ("IN", "NOT_IN"):
+                    arg = set(get_string_id(v) for v in value[type_])
+                else:
+                    arg = value[type_]
+                self.predicates.append(((attr, type_, repr(value[type_])), attr, type_, arg))
+
+    def __call__(self, tokens, i):
+        """
+        Check token.
+        Parameters
+        ----------
+        tokens : DocTokens
+            Attributes of tokens of doc.
+        i : int
+            Index of token.
+
+        Returns
+        -------
+        result : bool
+        """
+        columns = tokens.columns
+        for attr, value in self.attrs:
+            if columns[attr][i] != value:
+                return False
+        for name, value in self.extensions:
+            if tokens.extension(name, i) != value:
+                return False
+        for predicate in self.predicates:
+            key, attr, type_, arg = predicate
+            if type_ == "IN" and attr in columns:
+                if columns[attr][i] not in arg:
+                    return False
+            elif tokens.predicate(predicate, i) is False:
+                return False
+        return True
+
+
+class DocTokens:
+    """
+    Attributes of tokens of doc, which are read once for all checks of patterns.
+    Parameters
+    ----------
+    doc : Spacy doc
+        Matched doc.
+    attrs : list
+        Ids of token attributes used by patterns.
+    """
+
+    def __init__(self, doc, attrs):
+        self.doc = doc
+        # array of one attribute is one-dimensional
+        values = doc.to_array(attrs).reshape(len(doc), len(attrs)).T.tolist() if attrs else []
+        self.columns = {attr: column for attr, column in zip(attrs, values)}
+        self.columns[0] = [0] * len(doc)
+        self.predicates = dict()
+
+    def attr(self, attr, i):
+        """
+        Get value of attribute of token, strings are given by their ids.
+        """
+        return self.columns[attr][i]
+
+    def extension(self, name, i):
+        """
+        Get value of extension of token, it is computed once per doc.
+        """
+        return self.extension_column(name)[i]
+
+    def extension_column(self, name):
+        """
+        Get values of extension of all tokens.
+        """
+        if name not in self.columns:
+            default, method, getter, setter = Token.get_extension(name)
+            self.columns[name] = [getter(token) if getter is not None else token._.get(name) for token in self.doc]
+        return self.columns[name]
+
+    def extension_ids(self, name):
+        """
+        Get values of extension of all tokens, strings are given by their ids like in IN and NOT_IN.
+        """
+        attr = ("_", name)
+        if attr not in self.columns:
+            self.columns[attr] = [get_string_id(value) for value in self.extension_column(name)]
+        return self.columns[attr]
+
+    def predicate(self, predicate, i):
+        """
+        Get result of predicate (key, attribute, type, argument) on token, it is computed once per doc.
+        """
+        key, attr, type_, arg = predicate
+        key = (key, i)
+        if key in self.predicates:
+            return self.predicates[key]
+        is_extension = isinstance(attr, tuple)
+        if type_ == "REGEX":
+            value = self.extension(attr[1], i) if is_extension else self.doc.vocab.strings[self.attr(attr, i)]
+            result = bool(arg.search(value))
+        elif type_ in ("IN", "NOT_IN"):
+            value = get_string_id(self.extension(attr[1], i)) if is_extension else self.attr(attr, i)
+            result = (value in arg) == (type_ == "IN")
+        else:
+            value = self.extension(attr[1], i) if is_extension else self.attr(attr, i)
+            result = TokenCheck.comparisons[type_](value, arg)
+        self.predicates[key] = result
+        return result
+
+
+class DispatchMatcher:
+    """
+    Matcher of token patterns, which gives the same matches in the same order as spacy Matcher.
+    Patterns are grouped by tokens, which can start their matches: exact values of attributes
+    (e.g. lemmas 'в', 'с' or lemmas of months), values of extensions (e.g. shapes of words)
+    or regular expressions of words.
+    States of patterns are created only at tokens, which start them, so matching cost depends
+    on found candidates instead of the total number of rules. Patterns, whose first tokens can't be
+    indexed (e.g. negated or optional ones only), are tried at every token.
+    Parameters
+    ----------
+    vocab : Spacy vocab
+        Vocabulary of matched docs.
+    cache_size : int, (default=100000)
+        Maximum number of words in the cache of regular expressions of the first tokens.
+
+    Attributes
+    ----------
+    patterns : list
+        Compiled patterns: quantifiers, indices of checks and actions of their tokens.
+    index : dict
+        Indices of patterns by values of attributes and extensions ('_', name) of their first tokens.
+    always : list
+        Indices of patterns, which are tried at every token.
+    stats : dict
+        Counts of tokens ('tokens') and started states of patterns ('candidates').
+
+    Examples
+    --------
+    >>> from TimeExpressions.dispatch import DispatchMatcher
+    >>> matcher = DispatchMatcher(nlp.vocab)
+    >>> matcher.add("MONTH", [[{"LEMMA": {"IN": ["январь", "февраль"]}}]])
+    >>> matcher(doc)
+    """
+
+    def __init__(self, vocab, cache_size=100000):
+        self.vocab = vocab
+        self.patterns = []
+        self.keys = []
+        self.checks = dict()
+        self.check_list = []
+        self.attrs = []
+        self.seen_attrs = set()
+        self.index = dict()
+        self.extension_index = dict()
+        self.regex_index = dict()
+        self.always = []
+        self.regex = None
+        self.regex_cache = LRUCache(cache_size)
+        self.stats = {'tokens': 0, 'candidates': 0}
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def add(self, key, patterns):
+        """
+        Add patterns under the key.
+        Parameters
+        ----------
+        key : str
+            Key of matches.
+        patterns : list
+            List of token patterns.
+        """
+        key = self.vocab.strings.add(key)
+        for pattern in patterns:
+            if len(pattern) == 0:
+                raise ValueError("Empty pattern of key '{}'".format(self.vocab.strings[key]))
+            tokens = []
+            for spec in pattern:
+                ops = operators[spec["OP"]] if "OP" in spec else (ONE,)
+                check = self.compile(spec)
+                for op in ops:
+                    tokens.append((op, check))
+            self.index_pattern(len(self.patterns), tokens)
+            # actions of tokens are resolved in advance for both results of their checks
+            steps = []
+            for k, (op, check) in enumerate(tokens):
+                is_final = k + 1 == len(tokens)
+                steps.append((op, self.check_list.index(check),
+                              get_action(op, True, is_final), get_action(op, False, is_final)))
+            self.patterns.append(steps)
+            self.keys.append(key)
+        regexes = [regex.pattern for regex in self.regex_index]
+        self.regex = re.compile("|".join("(?:{})".format(value) for value in regexes)) if regexes else None
+        self.regex_cache.clear()
+
+    def compile(self, spec):
+        """
+        Get check of token spec, identical specs share one check.
+        """
+        name = repr(sorted((k, repr(v)) for k, v in spec.items() if k.upper() != "OP"))
+        if name not in self.checks:
+            check = TokenCheck(spec, self.vocab.strings)
+            for attr, _ in check.attrs:
+                if attr and attr not in self.attrs:
+                    self.attrs.append(attr)
+                self.seen_attrs.add(attr)
+            for _, attr, _, _ in check.predicates:
+                if not isinstance(attr, tuple) and attr not in self.attrs:
+                    self.attrs.append(attr)
+            self.checks[name] = check
+            self.check_list.append(check)
+        return self.checks[name]
+
+    def index_pattern(self, i, tokens):
+        """
+        Index pattern by tokens, which can start its matches.
+        The first tokens up to the first required one are indexed, pattern is tried at every token
+        if some of them can't be indexed.
+        """
+        triggers = []
+        for op, check in tokens:
+            if op == ZERO:
+                self.always.append(i)
+                return
+            trigger = self.trigger(check)
+            if trigger is None:
+                self.always.append(i)
+                return
+            triggers.append(trigger)
+            if op == ONE:
+                break
+        else:
+            # all tokens are optional, the pattern gives empty matches at every token
+            self.always.append(i)
+            return
+        for kind, attr, values in triggers:
+            if kind == "attr":
+                for value in values:
+                    self.index.setdefault(attr, dict()).setdefault(value, []).append(i)
+            elif kind == "extension":
+                self.extension_index.setdefault((attr, values), []).append(i)
+            else:
+                self.regex_index.setdefault(values, []).append(i)
+
+    def trigger(self, check):
+        """
+        Get the cheapest condition of check: exact values of attribute or extension, value of extension
+        or regular expression.
+        """
+        for attr, value in check.attrs:
+            if attr:
+                return ("attr", attr, [value])
+        for _, attr, type_, arg in check.predicates:
+            if type_ == "IN":
+                return ("attr", attr, arg)
+        for name, value in check.extensions:
+            return ("extension", name, value)
+        for _, attr, type_, arg in check.predicates:
+            if type_ == "REGEX" and attr == IDS["ORTH"]:
+                return ("regex", attr, arg)
+        return None
+
+    def candidates(self, tokens, i):
+        """
+        Get indices of patterns, which can start at token, in the order of their addition.
+        """
+        found = set(self.always)
+        columns = tokens.columns
+        for attr, index in self.index.items():
+            value = columns[attr][i]
+            if value in index:
+                found.update(index[value])
+        for (name, value), patterns in self.extension_index.items():
+            if tokens.extension_column(name)[i] == value:
+                found.update(patterns)
+        if self.regex is not None:
+            text = tokens.doc[i].text
+            regexes = self.regex_cache.get(text)
+            if regexes is None:
+                regexes = tuple(regex for regex in self.regex_index if regex.search(text)) \
+                    if self.regex.search(text) else ()
+                self.regex_cache.put(text, regexes)
+            for regex in regexes:
+                found.update(self.regex_index[regex])
+        return sorted(found)
+
+    def __call__(self, doc):
+        """
+        Find all matches of patterns.
+        Parameters
+        ----------
+        doc : Spacy doc
+            Tagged sentence.
+
+        Returns
+        -------
+        matches : list
+            List of matches (key, start, end) in the same order as spacy Matcher.
+        """
+        if self.seen_attrs & {LEMMA, POS, TAG} and not doc.is_tagged:
+            raise ValueError("Patterns with LEMMA, POS or TAG need tagged doc")
+        if DEP in self.seen_attrs and not doc.is_parsed:
+            raise ValueError("Patterns with DEP need parsed doc")
+        if len(doc) == 0:
+            return []
+        tokens = DocTokens(doc, self.attrs)
+        for attr in self.index:
+            if isinstance(attr, tuple):
+                tokens.extension_ids(attr[1])
+        matches = []
+        states = []
+        for i in range(len(doc)):
+            candidates = self.candidates(tokens, i)
+            self.stats['tokens'] += 1
+            self.stats['candidates'] += len(candidates)
+            states.extend((j, 0, i, 0) for j in candidates)
+            states = self.transition(states, matches, tokens, i)
+        self.finish(states, matches)
+
+        output = []
+        seen = set()
+        for match in matches:
+            if match not in seen:
+                output.append(match)
+                seen.add(match)
+        return output
+
+    def transition(self, states, matches, tokens, i):
+        """
+        Move states (pattern, token of pattern, start, length) by token, the same as spacy Matcher.
+        """
+        alive = []
+        new_states = []
+        checks = self.check_list
+        patterns = self.patterns
+        keys = self.keys
+        results = dict()
+        for j, k, start, length in states:
+            pattern = patterns[j]
+            op, check, on_match, on_miss = pattern[k]
+            is_match = results.get(check)
+            if is_match is None:
+                is_match = results[check] = checks[check](tokens, i)
+            action = on_match if is_match else on_miss
+            if action == REJECT:
+                continue
+            while action >= RETRY:
+                if action == RETRY_EXTEND:
+                    new_states.append((j, k, start, length + 1))
+                elif action == RETRY_ADVANCE:
+                    new_states.append((j, k + 1, start, length + 1))
+                k += 1
+                op, check, on_match, on_miss = pattern[k]
+                is_match = results.get(check)
+                if is_match is None:
+                    is_match = results[check] = checks[check](tokens, i)
+                action = on_match if is_match else on_miss
+            if action == ADVANCE:
+                alive.append((j, k + 1, start, length + 1))
+            elif action == MATCH:
+                matches.append((keys[j], start, start + length + 1))
+            elif action == MATCH_DOUBLE:
+                if length > 0:
+                    matches.append((keys[j], start, start + length))
+                matches.append((keys[j], start, start + length + 1))
+            elif action == MATCH_REJECT:
+                matches.append((keys[j], start, start + length))
+            elif action == MATCH_EXTEND:
+                matches.append((keys[j], start, start + length))
+                alive.append((j, k, start, length + 1))
+        return alive + new_states
+
+    def finish(self, states, matches):
+        """
+        Add matches of states, which end in optional tokens of patterns.
+        """
+        for j, k, start, length in states:
+            pattern = self.patterns[j]
+            while k < len(pattern) and pattern[k][0] in (ZERO_PLUS, ZERO_ONE):
+                if k + 1 == len(pattern):
+                    matches.append((self.keys[j], start, start + length))
+                    break
+                k += 1
+
+
+class DispatchRuler:
+    """
+    Entity ruler based on DispatchMatcher, which sets the same entities as spacy EntityRuler
+    with token patterns.
+    Parameters
+    ----------
+    nlp : Spacy Language
+        Language of matched docs.
+    overwrite_ents : bool, (default=False)
+        Flag, which allows to overwrite existing entities of docs.
+
+    Examples
+    --------
+    >>> from TimeExpressions.dispatch import DispatchRuler
+    >>> ruler = DispatchRuler(nlp)
+    >>> ruler.add_patterns([{"label": "EXPR", "pattern": [{"LEMMA": "вчера"}], "id": "yesterday"}])
+    >>> ruler(doc)
+    """
+
+    # name of pipeline component and separator of labels and ids of patterns, the same as in EntityRuler
+    name = "entity_ruler"
+    ent_id_sep = "||"
+
+    def __init__(self, nlp, overwrite_ents=False):
+        self.nlp = nlp
+        self.overwrite = overwrite_ents
+        self.matcher = DispatchMatcher(nlp.vocab)
+        self.ent_ids = dict()
+        self.token_patterns = []
+
+    def __len__(self):
+        return len(self.token_patterns)
+
+    def add_patterns(self, patterns):
+        """
+        Add patterns in the format of EntityRuler: dicts with label, token pattern and optional id.
+        Parameters
+        ----------
+        patterns : list
+            List of patterns.
+        """
+        grouped = dict()
+        for entry in patterns:
+            label = entry["label"]
+            if "id" in entry:
+                name = "{}{}{}".format(label, self.ent_id_sep, entry["id"])
+                self.ent_ids[self.nlp.vocab.strings.add(name)] = (label, entry["id"])
+            else:
+                name = label
+            grouped.setdefault(name, []).append(entry["pattern"])
+            self.token_patterns.append(entry)
+        for name, group in grouped.items():
+            self.matcher.add(name, group)
+
+    def __call__(self, doc):
+        """
+        Find matches in doc and add them as entities in the same way as EntityRuler:
+        longer matches win, then the later ones.
+        Parameters
+        ----------
+        doc : Spacy doc
+            Tagged sentence.
+
+        Returns
+        -------
+        doc : Spacy doc
+            Doc with entities.
+        """
+        matches = set([(m_id, start, end) for m_id, start, end in self.matcher(doc) if start != end])
+        matches = sorted(matches, key=lambda m: (m[2] - m[1], m[1]), reverse=True)
+        entities = list(doc.ents)
+        new_entities = []
+        seen_tokens = set()
+        for match_id, start, end in matches:
+            if any(t.ent_type for t in doc[start:end]) and not self.overwrite:
+                continue
+            if start not in seen_tokens and end - 1 not in seen_tokens:
+                if match_id in self.ent_ids:
+                    label, ent_id = self.ent_ids[match_id]
+                    span = Span(doc, start, end, label=label)
+                    if ent_id:
+                        for token in span:
+                            token.ent_id_ = ent_id
+                else:
+                    span = Span(doc, start, end, label=match_id)
+                new_entities.append(span)
+                entities = [e for e in entities if not (e.start < end and e.end > start)]
+                seen_tokens.update(range(start, end))
+        doc.ents = entities + new_entities
+        return doc
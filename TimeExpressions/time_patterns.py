@@ -1,7 +1,10 @@
-from datetime import date, datetime
+from datetime import date
 from dateutil.relativedelta import relativedelta
 
-strptime = datetime.strptime
+import sys
+sys.path.append("..")
+# strptime of utils parses fixed layouts of norm functions faster than datetime.strptime
+from utils import TokenShapes, set_text_extension, strptime
 
 SEASONS = {"лето": '15.07.', "зима": '15.01.', "весна": '15.04.', "осень": '15.10.'}
 DAYTIME = {"день": 0, "утро": 0, "вечер": 12, "ночь": 0}
@@ -56,82 +59,121 @@ date_my2d = r'(^{}[.-/]{}$)'.format(month,year2d)
 time = r'(^{}[-.:-]{}$)'.format(hour,minute)
 yearfull = r'^{}$'.format(year4d)
 
+# shapes of words checked by rules, they are found once per word by TokenShapes
+shapes = {
+    "date": date,
+    "shortdate": shortdate,
+    "month_year4": date_my4d,
+    "month_year2": date_my2d,
+    "day_month": r'^{}[.]{}$'.format(day,month),
+    "time": time,
+    "decimal": r'^\d[.,]\d$',
+    "year": yearfull,
+    "range": range_r,
+    "digits2": r'^\d\d$',
+    "digits12": r'^\d$|^\d\d$',
+    "hour_minute": r'^{}.{}$'.format(hour,minute),
+    "days_date": r'^{}[-–]{}.{}.{}$'.format(day,day,month,year4d),
+    "days_shortdate": r'^{}[-–]{}[.]{}[.]{}$'.format(day,day,month,year2d),
+    "digits4": r'^\d\d\d\d$',
+    "month_dot_year4": r'^{}[.]{}$'.format(month,year4d),
+    "day_month_dot": r'^{}[.]{}[.]$'.format(day,month),
+    "day_month_end": r'^{}.{}.$'.format(day,month),
+    "hour_dash_minute": r'^{}-{}$'.format(hour,minute),
+    "month_sep_year4": r'^{}.{}$'.format(month,year4d),
+    "month_sep_year2": r'^{}.{}$'.format(month,year2d),
+    "day_sep_month": r'^{}.{}$'.format(day,month),
+    "digit": r'^\d$',
+}
+# combinations of shapes, which words can have, e.g. '12.05' is time, day and month, month and year,
+# are found from the expressions by TokenShapes, so words with any combination are matched by rules.
+token_shapes = TokenShapes(shapes)
+set_text_extension("time_shape", token_shapes)
+
+
+def shape(name):
+    """
+    Get token spec of words, which have the shape.
+    """
+    return {"_": {"time_shape": {"IN": token_shapes.values(name)}}}
+
+
 rules = {
 ########## SIMPLE DATE RULES ##########
 # '31.12.1997'
-'r_date': {'pattern': [{"TEXT": {"REGEX": date}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_date': {'pattern': [shape("date"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime(ent[0].text, '%d.%m.%Y'), 
               'uncertain': delta_day,
               'form': triangle,
               'stamp': 1},
 # '31.12.97'
-'r_date_b': {'pattern': [{"TEXT": {"REGEX": shortdate}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_date_b': {'pattern': [shape("shortdate"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime(ent[0].text, '%d.%m.%y'), 
               'uncertain': delta_day,
               'form': triangle,
               'stamp': 1},
 # '12.1998'
-'r_date_my4d': {'pattern': [{"TEXT": {"REGEX": date_my4d}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_date_my4d': {'pattern': [shape("month_year4"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('15.{}'.format(ent[0].text), '%d.%m.%Y'), 
               'uncertain': delta_month,
               'form': triangle,
               'stamp': 1},
 # '12.97'
-'r_date_my2d': {'pattern': [{"TEXT": {"REGEX": date_my2d}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_date_my2d': {'pattern': [shape("month_year2"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('15.{}'.format(ent[0].text), '%d.%m.%y'), 
               'uncertain': delta_month,
               'form': triangle,
               'stamp': 1},
 # 'от 12.1998'
-'r_ot_date_my4d': {'pattern': [{"LEMMA": 'от'}, {"TEXT": {"REGEX": date_my4d}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_ot_date_my4d': {'pattern': [{"LEMMA": 'от'}, shape("month_year4"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('15.{}'.format(ent[1].text), '%d.%m.%Y'), 
               'uncertain': delta_month,
               'form': triangle,
               'stamp': 1},
 # 'от 12.97'
-'r_ot_date_my2d': {'pattern': [{"LEMMA": 'от'}, {"TEXT": {"REGEX": date_my2d}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_ot_date_my2d': {'pattern': [{"LEMMA": 'от'}, shape("month_year2"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('15.{}'.format(ent[1].text), '%d.%m.%y'), 
               'uncertain': delta_month,
               'form': triangle,
               'stamp': 1},
 # 'от 31.12.1997'
-'r_ot_date': {'pattern': [{"LEMMA": 'от'}, {"TEXT": {"REGEX": date}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_ot_date': {'pattern': [{"LEMMA": 'от'}, shape("date"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime(ent[1].text, '%d.%m.%Y'), 
               'uncertain': delta_day,
               'form': triangle,
               'stamp': 1},
 # 'от 31.12.97'
-'r_ot_date_b': {'pattern': [{"LEMMA": 'от'}, {"TEXT": {"REGEX": shortdate}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_ot_date_b': {'pattern': [{"LEMMA": 'от'}, shape("shortdate"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime(ent[1].text, '%d.%m.%y'), 
               'uncertain': delta_day,
               'form': triangle,
               'stamp': 1},
 # '13.01'
-'r_date_short': {'pattern': [{"TEXT": {"REGEX": r'^{}[.]{}$'.format(day,month)}}], 
+'r_date_short': {'pattern': [shape("day_month")], 
               'norm': lambda ent: strptime('{}.{}'.format(ent[0].text, ent.doc._.date.year), '%d.%m.%Y'), 
               'uncertain': relativedelta(days=1),
               'form': triangle,
               'stamp': 1},
 # от 17.07
-'r_ot_date_short': {'pattern': [{"LEMMA": 'от'}, {"TEXT": {"REGEX": r'^{}[.]{}$'.format(day,month)}}], 
+'r_ot_date_short': {'pattern': [{"LEMMA": 'от'}, shape("day_month")], 
               'norm': lambda ent: strptime('{}.{}'.format(ent[1].text, ent.doc._.date.year), '%d.%m.%Y'), 
               'uncertain': relativedelta(days=1),
               'form': triangle,
               'stamp': 1},
 # '12.00 31.12.1997'
-'r_time_date': {'pattern': [{"TEXT": {"REGEX": time}}, {"TEXT": {"REGEX": date}}], 
+'r_time_date': {'pattern': [shape("time"), shape("date")], 
               'norm': lambda ent: strptime(ent.text, '%H.%M %d.%m.%Y'), 
               'uncertain': delta_hour,
               'form': triangle,
               'stamp': 1},
 # '12.00 31.12.97'
-'r_time_shortdate': {'pattern': [{"TEXT": {"REGEX": time}}, {"TEXT": {"REGEX": shortdate}}], 
+'r_time_shortdate': {'pattern': [shape("time"), shape("shortdate")], 
               'norm': lambda ent: strptime(ent.text, '%H.%M %d.%m.%y'), 
               'uncertain': delta_hour,
               'form': triangle,
               'stamp': 1},
 # около 23.30
-'r_around_time': {'pattern': [{"LEMMA": {"IN": fuzzy_words}}, {"TEXT": {"REGEX": time}}, {"LEMMA": 'час', "OP": "?"}], 
+'r_around_time': {'pattern': [{"LEMMA": {"IN": fuzzy_words}}, shape("time"), {"LEMMA": 'час', "OP": "?"}], 
               'norm': lambda ent: strptime('{} {}'.format(ent[1].text, ent.doc._.date.date()), '%H.%M %Y-%m-%d'), 
               'uncertain': delta_hour,
               'form': triangle,
@@ -211,13 +253,13 @@ rules = {
               'form': triangle,
               'stamp': 1},
 # 1,5 года назад
-'r_float_year_ago': {'pattern': [{"TEXT": {"REGEX": r'^\d[.,]\d$'}}, {"LEMMA": 'год'}, {"TEXT": "назад"}], 
+'r_float_year_ago': {'pattern': [shape("decimal"), {"LEMMA": 'год'}, {"TEXT": "назад"}], 
               'norm': lambda ent: ent.doc._.date - relativedelta(years=int(ent[0].text[0]), months=6), 
               'uncertain': delta_year,
               'form': triangle,
               'stamp': 1},
 # 1,5 месяца назад
-'r_float_month_ago': {'pattern': [{"TEXT": {"REGEX": r'^\d[.,]\d$'}}, {"LEMMA": 'месяц'}, {"TEXT": "назад"}], 
+'r_float_month_ago': {'pattern': [shape("decimal"), {"LEMMA": 'месяц'}, {"TEXT": "назад"}], 
               'norm': lambda ent: ent.doc._.date - relativedelta(months=int(ent[0].text[0]), days=15), 
               'uncertain': delta_month,
               'form': triangle,
@@ -225,115 +267,115 @@ rules = {
 
 ########## ONCE EVENTS ##########
 # в 11.00 24.12.10 г
-'r_in_time_shortdate': {'pattern': [{"LEMMA": 'в'}, {"TEXT": {"REGEX": time}}, {"TEXT": {"REGEX": shortdate}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_in_time_shortdate': {'pattern': [{"LEMMA": 'в'}, shape("time"), shape("shortdate"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{} {}'.format(ent[1].text, ent[2].text), '%H.%M %d.%m.%y'), 
               'uncertain': delta_hour,
               'form': triangle,
               'stamp': 1},
 # 28.12.10 в 08.30
-'r_shortdate_in_time_': {'pattern': [{"TEXT": {"REGEX": shortdate}}, {"LEMMA": 'в'}, {"TEXT": {"REGEX": time}}], 
+'r_shortdate_in_time_': {'pattern': [shape("shortdate"), {"LEMMA": 'в'}, shape("time")], 
               'norm': lambda ent: strptime('{} {}'.format(ent[2].text, ent[0].text), '%H.%M %d.%m.%y'), 
               'uncertain': delta_hour,
               'form': triangle,
               'stamp': 1},
 # 26.07.2014 в 10.00
-'r_date_in_time_': {'pattern': [{"TEXT": {"REGEX": date}}, {"LEMMA": 'в'}, {"TEXT": {"REGEX": time}}], 
+'r_date_in_time_': {'pattern': [shape("date"), {"LEMMA": 'в'}, shape("time")], 
               'norm': lambda ent: strptime('{} {}'.format(ent[2].text, ent[0].text), '%H.%M %d.%m.%Y'), 
               'uncertain': delta_hour,
               'form': triangle,
               'stamp': 1},
 # 28.09.10 около 07:00
-'r_shortdate_around_time_': {'pattern': [{"TEXT": {"REGEX": shortdate}}, {"LEMMA": 'около'}, {"TEXT": {"REGEX": time}}], 
+'r_shortdate_around_time_': {'pattern': [shape("shortdate"), {"LEMMA": 'около'}, shape("time")], 
               'norm': lambda ent: strptime('{} {}'.format(ent[2].text, ent[0].text), '%H.%M %d.%m.%y'),
               'uncertain': delta_hour,
               'form': fuzzy_triangle,
               'stamp': 1},
 # 28.09.2010 около 07:00
-'r_date_around_time_': {'pattern': [{"TEXT": {"REGEX": date}}, {"LEMMA": 'около'}, {"TEXT": {"REGEX": time}}], 
+'r_date_around_time_': {'pattern': [shape("date"), {"LEMMA": 'около'}, shape("time")], 
               'norm': lambda ent: strptime('{} {}'.format(ent[2].text, ent[0].text), '%H.%M %d.%m.%Y'), 
               'uncertain': delta_hour,
               'form': fuzzy_triangle,
               'stamp': 1},
 # 30.09.2011 года приблизительно в 2:40
-'r_date_year_around_time_': {'pattern': [{"TEXT": {"REGEX": date}}, {"LEMMA": 'год'}, {"LEMMA": {"IN": fuzzy_words}}, {"LEMMA": 'в'}, {"TEXT": {"REGEX": time}}], 
+'r_date_year_around_time_': {'pattern': [shape("date"), {"LEMMA": 'год'}, {"LEMMA": {"IN": fuzzy_words}}, {"LEMMA": 'в'}, shape("time")], 
               'norm': lambda ent: strptime('{} {}'.format(ent[4].text, ent[0].text), '%H.%M %d.%m.%Y'), 
               'uncertain': delta_hour,
               'form': fuzzy_triangle,
               'stamp': 1},
 # 2005 год
-'r_year4d_year': {'pattern': [{"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_year4d_year': {'pattern': [shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('01.07.{}'.format(ent[0].text), '%d.%m.%Y'), 
               'uncertain': delta_year,
               'form': triangle,
               'stamp': 1},
 # 2011 г в 17-00 часов
-'r_year4d_year_in_time': {'pattern': [{"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год'}, {"LEMMA": 'в'}, {"TEXT": {"REGEX": time}}, {"LEMMA": 'час', "OP": "?"}], 
+'r_year4d_year_in_time': {'pattern': [shape("year"), {"LEMMA": 'год'}, {"LEMMA": 'в'}, shape("time"), {"LEMMA": 'час', "OP": "?"}], 
               'norm': lambda ent: strptime('01.07.{}'.format(ent[0].text), '%d.%m.%Y'), 
               'uncertain': delta_year,
               'form': triangle,
               'stamp': 1},
 # в 2005 год
-'r_in_year4d_year': {'pattern': [{"LEMMA": {"IN": ['в', 'от']}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_in_year4d_year': {'pattern': [{"LEMMA": {"IN": ['в', 'от']}}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('01.07.{}'.format(ent[1].text), '%d.%m.%Y'), 
               'uncertain': delta_year,
               'form': triangle,
               'stamp': 1},
 # в 2005 г
-'r_in_year4d_year_a': {'pattern': [{"LEMMA": 'в'}, {"TEXT": {"REGEX": yearfull}}, {"TEXT": "г"}], 
+'r_in_year4d_year_a': {'pattern': [{"LEMMA": 'в'}, shape("year"), {"TEXT": "г"}], 
               'norm': lambda ent: strptime('01.07.{}'.format(ent[1].text), '%d.%m.%Y'), 
               'uncertain': delta_year,
               'form': triangle,
               'stamp': 1},
 # В конце 2010
-'r_in_yearpart_year4d': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": {"IN": list(YEAR_PART.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_in_yearpart_year4d': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": {"IN": list(YEAR_PART.keys())}}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{}{}'.format(YEAR_PART[ent[1].lemma_],ent[2].text), '%d.%m.%Y'), 
               'uncertain': relativedelta(days=45),
               'form': triangle,
               'stamp': 1},
 # конец 2010
-'r_yearpart_year4d': {'pattern': [{"LEMMA": {"IN": list(YEAR_PART.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_yearpart_year4d': {'pattern': [{"LEMMA": {"IN": list(YEAR_PART.keys())}}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{}{}'.format(YEAR_PART[ent[0].lemma_],ent[1].text), '%d.%m.%Y'), 
               'uncertain': relativedelta(days=45),
               'form': triangle,
               'stamp': 1},
 # В марте - апреле 2010 года
-'r_month_dash_month_yeard4d_year': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": '-'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год'}], 
+'r_month_dash_month_yeard4d_year': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": '-'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, shape("year"), {"LEMMA": 'год'}], 
               'norm': lambda ent: strptime('{}{}'.format(MONTHS[ent[3].lemma_],ent[4].text), '%d.%m.%Y'),
               'uncertain': delta_month,
               'form': triangle,
               'stamp': 1},
 # В марте и апреле 2010 года
-'r_month_and_month_yeard4d_year': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": 'и'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год'}], 
+'r_month_and_month_yeard4d_year': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": 'и'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, shape("year"), {"LEMMA": 'год'}], 
               'norm': lambda ent: strptime('{}{}'.format(MONTHS[ent[3].lemma_],ent[4].text), '%d.%m.%Y'), 
               'uncertain': delta_month,
               'form': triangle,
               'stamp': 1},
 # август 2008 г 
-'r_month_yeard4d_year': {'pattern': [{"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_month_yeard4d_year': {'pattern': [{"LEMMA": {"IN": list(MONTHS.keys())}}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{}{}'.format(MONTHS[ent[0].lemma_], ent[1].text), '%d.%m.%Y'), 
               'uncertain': delta_month,
               'form': triangle,
               'stamp': 1},
 # 2010 март
-'r_yeard4d_month': {'pattern': [{"TEXT": {"REGEX": yearfull}}, {"LEMMA": {"IN": list(MONTHS.keys())}}], 
+'r_yeard4d_month': {'pattern': [shape("year"), {"LEMMA": {"IN": list(MONTHS.keys())}}], 
               'norm': lambda ent: strptime('{}{}'.format(MONTHS[ent[1].lemma_], ent[0].text), '%d.%m.%Y'), 
               'uncertain': delta_month,
               'form': triangle,
               'stamp': 1},
 # В мае 2009 года	
-'r_in_month_yeard4d_year': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_in_month_yeard4d_year': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{}{}'.format(MONTHS[ent[1].lemma_],ent[2].text), '%d.%m.%Y'), 
               'uncertain': delta_month,
               'form': triangle,
               'stamp': 1},
 # 1-10 марта 2010 г	
-'r_range_month_year4d_year': {'pattern': [{"TEXT": {"REGEX": range_r}}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_range_month_year4d_year': {'pattern': [shape("range"), {"LEMMA": {"IN": list(MONTHS.keys())}}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{}{}{}'.format(ent[0].text[:ent[0].text.find('-')], MONTHS[ent[1].lemma_][2:], ent[2].text), '%d.%m.%Y'), 
               'uncertain': delta_month,
               'form': triangle,
               'stamp': 1},
 # от июня 2009 г	
-'r_ot_month_yeard4d_year': {'pattern': [{"LEMMA": 'от'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_ot_month_yeard4d_year': {'pattern': [{"LEMMA": 'от'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{}{}'.format(MONTHS[ent[1].lemma_],ent[2].text), '%d.%m.%Y'), 
               'uncertain': delta_month,
               'form': triangle,
@@ -357,31 +399,31 @@ rules = {
               'form': triangle,
               'stamp': 1},
 # Зимой 2010 
-'r_season_yeard4d_year': {'pattern': [{"LEMMA": {"IN": list(SEASONS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_season_yeard4d_year': {'pattern': [{"LEMMA": {"IN": list(SEASONS.keys())}}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{}{}'.format(SEASONS[ent[0].lemma_], ent[1].text), '%d.%m.%Y'), 
               'uncertain': relativedelta(days=45),
               'form': triangle,
               'stamp': 1},
 # зима 89 года
-'r_season_yeard2d_year': {'pattern': [{"LEMMA": {"IN": list(SEASONS.keys())}}, {"TEXT": {"REGEX": r'^\d\d$'}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_season_yeard2d_year': {'pattern': [{"LEMMA": {"IN": list(SEASONS.keys())}}, shape("digits2"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{}{}'.format(SEASONS[ent[0].lemma_], int(ent[1].text)+1905), '%d.%m.%Y'),
               'uncertain': relativedelta(years=5),
               'form': triangle,
               'stamp': 1},
 # зимой и летом 2001 года
-'r_season_season_yeard4d_year': {'pattern': [{"LEMMA": {"IN": list(SEASONS.keys())}}, {"TEXT": "и"}, {"LEMMA": {"IN": list(SEASONS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_season_season_yeard4d_year': {'pattern': [{"LEMMA": {"IN": list(SEASONS.keys())}}, {"TEXT": "и"}, {"LEMMA": {"IN": list(SEASONS.keys())}}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{}{}'.format(SEASONS[ent[2].lemma_], ent[3].text), '%d.%m.%Y'), 
               'uncertain': relativedelta(days=45),
               'form': triangle,
               'stamp': 1},
 # в первом квартале 2007 года
-'r_in_quart_yeard4d_year': {'pattern': [{"LEMMA": 'в'},  {"LEMMA": {"IN": list(numeric_quart.keys())}}, {"LEMMA": "квартал"}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_in_quart_yeard4d_year': {'pattern': [{"LEMMA": 'в'},  {"LEMMA": {"IN": list(numeric_quart.keys())}}, {"LEMMA": "квартал"}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{}{}'.format(numeric_quart[ent[1].lemma_], ent[3].text), '%d.%m.%Y'), 
               'uncertain': relativedelta(days=45),
               'form': triangle,
               'stamp': 1},
 # в первое полугодие 2007 года
-'r_in_halfyear_yeard4d_year': {'pattern': [{"LEMMA": 'в'},  {"LEMMA": {"IN": list(numeric_hy.keys())}}, {"LEMMA": "полугодие"}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_in_halfyear_yeard4d_year': {'pattern': [{"LEMMA": 'в'},  {"LEMMA": {"IN": list(numeric_hy.keys())}}, {"LEMMA": "полугодие"}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{}{}'.format(numeric_hy[ent[1].lemma_], ent[3].text), '%d.%m.%Y'), 
               'uncertain': relativedelta(days=90),
               'form': triangle,
@@ -405,43 +447,43 @@ rules = {
               'form': triangle,
               'stamp': 1},
 # 2 декабря 2010
-'r_int_month_yeard4d_year': {'pattern': [{"TEXT": {"REGEX": r'^\d$|^\d\d$'}}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_int_month_yeard4d_year': {'pattern': [shape("digits12"), {"LEMMA": {"IN": list(MONTHS.keys())}}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{}{}{}'.format(ent[0].text, MONTHS[ent[1].lemma_][2:], ent[2].text), '%d.%m.%Y'), 
               'uncertain': delta_day,
               'form': triangle,
               'stamp': 1},
 # 7 июля
-'r_int_month': {'pattern': [{"TEXT": {"REGEX": r'^\d$|^\d\d$'}}, {"LEMMA": {"IN": list(MONTHS.keys())}}], 
+'r_int_month': {'pattern': [shape("digits12"), {"LEMMA": {"IN": list(MONTHS.keys())}}], 
               'norm': lambda ent: strptime('{}{}{}'.format(ent[0].text, MONTHS[ent[1].lemma_][2:], ent.doc._.date.year), '%d.%m.%Y'), 
               'uncertain': delta_day,
               'form': triangle,
               'stamp': 1},
 # 1 апреля текущего года
-'r_int_month_now_year': {'pattern': [{"TEXT": {"REGEX": r'^\d$|^\d\d$'}}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"LEMMA": "текущий"}, {"LEMMA": "год"}], 
+'r_int_month_now_year': {'pattern': [shape("digits12"), {"LEMMA": {"IN": list(MONTHS.keys())}}, {"LEMMA": "текущий"}, {"LEMMA": "год"}], 
               'norm': lambda ent: strptime('{}{}{}'.format(ent[0].text, MONTHS[ent[1].lemma_][2:], ent.doc._.date.year), '%d.%m.%Y'), 
               'uncertain': delta_day,
               'form': triangle,
               'stamp': 1},
 # ночью 9 июля
-'r_daytime_int_month': {'pattern': [{"LEMMA": {"IN": list(DAYTIME.keys())}}, {"TEXT": {"REGEX": r'^\d$|^\d\d$'}}, {"LEMMA": {"IN": list(MONTHS.keys())}}], 
+'r_daytime_int_month': {'pattern': [{"LEMMA": {"IN": list(DAYTIME.keys())}}, shape("digits12"), {"LEMMA": {"IN": list(MONTHS.keys())}}], 
               'norm': lambda ent: strptime('{}{}{} {}'.format(ent[1].text, MONTHS[ent[2].lemma_][2:], ent.doc._.date.year, DAYTIMEH[ent[0].lemma_]), '%d.%m.%Y %H'), 
               'uncertain': delta_day,
               'form': triangle,
               'stamp': 1},
 # между 5 и 17 июня
-'r_bet_int_int_month': {'pattern': [{"LEMMA": 'между'}, {"TEXT": {"REGEX": r'^\d$|^\d\d$'}}, {"LEMMA": 'и'}, {"TEXT": {"REGEX": r'^\d$|^\d\d$'}}, {"LEMMA": {"IN": list(MONTHS.keys())}}], 
+'r_bet_int_int_month': {'pattern': [{"LEMMA": 'между'}, shape("digits12"), {"LEMMA": 'и'}, shape("digits12"), {"LEMMA": {"IN": list(MONTHS.keys())}}], 
               'norm': lambda ent: strptime('{}{}{}'.format(round((int(ent[1].text)+int(ent[3].text))/2), MONTHS[ent[1].lemma_][2:], ent.doc._.date.year), '%d.%m.%Y'), 
               'uncertain': lambda ent: relativedelta(days=round((int(ent[1].text)+int(ent[3].text))/2)),
               'form': triangle,
               'stamp': 1},
 # в конце января 2011
-'r_in_monthpart_month_year4d': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": {"IN": list(YEAR_PART.keys())}}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_in_monthpart_month_year4d': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": {"IN": list(YEAR_PART.keys())}}, {"LEMMA": {"IN": list(MONTHS.keys())}}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{}{}{}'.format(MONTH_PART[ent[1].lemma_],MONTHS[ent[2].lemma_][2:], ent[3].lemma_), '%d.%m.%Y'), 
               'uncertain': relativedelta(days=15),
               'form': triangle,
               'stamp': 1},
 # конец января 2011
-'r_monthpart_month_year4d': {'pattern': [{"LEMMA": {"IN": list(YEAR_PART.keys())}}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_monthpart_month_year4d': {'pattern': [{"LEMMA": {"IN": list(YEAR_PART.keys())}}, {"LEMMA": {"IN": list(MONTHS.keys())}}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{}{}{}'.format(MONTH_PART[ent[0].lemma_],MONTHS[ent[1].lemma_][2:], ent[2].lemma_), '%d.%m.%Y'), 
               'uncertain': relativedelta(days=15),
               'form': triangle,
@@ -453,37 +495,37 @@ rules = {
               'form': triangle,
               'stamp': 1},
 # около 2 часов ночи 17.12.2010
-'r_around_int_hour_daytime_date': {'pattern': [{"LEMMA": "около"}, {"_": {"is_digit": True}}, {"LEMMA": 'час'}, {"LEMMA": {"IN": list(DAYTIME.keys())}}, {"TEXT": {"REGEX": date}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_around_int_hour_daytime_date': {'pattern': [{"LEMMA": "около"}, {"_": {"is_digit": True}}, {"LEMMA": 'час'}, {"LEMMA": {"IN": list(DAYTIME.keys())}}, shape("date"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{} {}'.format(int(ent[1].text)+DAYTIME[ent[3].lemma_], ent[4].text), '%H %d.%m.%Y'), 
               'uncertain': delta_hour,
               'form': fuzzy_triangle,
               'stamp': 1},
 # 2 ч ночи 17.12.2010
-'r_int_h_daytime_date': {'pattern': [{"_": {"is_digit": True}}, {"TEXT": 'ч'}, {"LEMMA": {"IN": list(DAYTIME.keys())}}, {"TEXT": {"REGEX": date}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_int_h_daytime_date': {'pattern': [{"_": {"is_digit": True}}, {"TEXT": 'ч'}, {"LEMMA": {"IN": list(DAYTIME.keys())}}, shape("date"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{} {}'.format(ent[3].text, int(ent[0].text)+DAYTIME[ent[2].lemma_]), '%d.%m.%Y %H'), 
               'uncertain': delta_hour,
               'form': triangle,
               'stamp': 1},
 # около 2 ч ночи 17.12.2010
-'r_around_int_h_daytime_date': {'pattern': [{"LEMMA": "около"}, {"_": {"is_digit": True}}, {"TEXT": 'ч'}, {"LEMMA": {"IN": list(DAYTIME.keys())}}, {"TEXT": {"REGEX": date}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_around_int_h_daytime_date': {'pattern': [{"LEMMA": "около"}, {"_": {"is_digit": True}}, {"TEXT": 'ч'}, {"LEMMA": {"IN": list(DAYTIME.keys())}}, shape("date"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{} {}'.format(ent[4].text, int(ent[1].text)+DAYTIME[ent[3].lemma_]), '%d.%m.%Y %H'), 
               'uncertain': delta_hour,
               'form': fuzzy_triangle,
               'stamp': 1},
 # 2 часа ночи 17.12.2010
-'r_int_hour_daytime_date': {'pattern': [{"_": {"is_digit": True}}, {"LEMMA": 'час'}, {"LEMMA": {"IN": list(DAYTIME.keys())}}, {"TEXT": {"REGEX": date}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_int_hour_daytime_date': {'pattern': [{"_": {"is_digit": True}}, {"LEMMA": 'час'}, {"LEMMA": {"IN": list(DAYTIME.keys())}}, shape("date"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{} {}'.format(ent[3].text, int(ent[0].text)+DAYTIME[ent[2].lemma_]), '%d.%m.%Y %H'), 
               'uncertain': delta_hour,
               'form': triangle,
               'stamp': 1},
 # около 2 ночи 17.12.2010
-'r_around_int_daytime_date': {'pattern': [{"LEMMA": "около"}, {"_": {"is_digit": True}}, {"LEMMA": {"IN": list(DAYTIME.keys())}}, {"TEXT": {"REGEX": date}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_around_int_daytime_date': {'pattern': [{"LEMMA": "около"}, {"_": {"is_digit": True}}, {"LEMMA": {"IN": list(DAYTIME.keys())}}, shape("date"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{} {}'.format(ent[3].text, int(ent[1].text)+DAYTIME[ent[2].lemma_]), '%d.%m.%Y %H'), 
               'uncertain': delta_hour,
               'form': fuzzy_triangle,
               'stamp': 1},
 # 2 ночи 17.12.2010
-'r_int_daytime_date': {'pattern': [{"_": {"is_digit": True}}, {"LEMMA": {"IN": list(DAYTIME.keys())}}, {"TEXT": {"REGEX": date}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_int_daytime_date': {'pattern': [{"_": {"is_digit": True}}, {"LEMMA": {"IN": list(DAYTIME.keys())}}, shape("date"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{} {}'.format(ent[2].text, int(ent[0].text)+DAYTIME[ent[1].lemma_]), '%d.%m.%Y %H'), 
               'uncertain': delta_hour,
               'form': triangle,
@@ -507,49 +549,49 @@ rules = {
               'form': triangle,
               'stamp': 1},
 # утром 17.12.2010
-'r_daytime_date': {'pattern': [{"LEMMA": {"IN": list(DAYTIME.keys())}}, {"TEXT": {"REGEX": date}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_daytime_date': {'pattern': [{"LEMMA": {"IN": list(DAYTIME.keys())}}, shape("date"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{} {}'.format(ent[1].text, DAYTIMEH[ent[0].lemma_]), '%d.%m.%Y %H'), 
               'uncertain': delta_hour,
               'form': triangle,
               'stamp': 1},
 # 17.12.2010 утром
-'r_date_datetime': {'pattern': [{"TEXT": {"REGEX": date}}, {"LEMMA": {"IN": list(DAYTIME.keys())}}], 
+'r_date_datetime': {'pattern': [shape("date"), {"LEMMA": {"IN": list(DAYTIME.keys())}}], 
               'norm': lambda ent: strptime('{} {}'.format(ent[0].text, DAYTIMEH[ent[1].lemma_]), '%d.%m.%Y %H'), 
               'uncertain': delta_hour,
               'form': triangle,
               'stamp': 1},
 # 25.12.10 ночью
-'r_shortdate_datetime': {'pattern': [{"TEXT": {"REGEX": shortdate}}, {"LEMMA": {"IN": list(DAYTIME.keys())}}], 
+'r_shortdate_datetime': {'pattern': [shape("shortdate"), {"LEMMA": {"IN": list(DAYTIME.keys())}}], 
               'norm': lambda ent: strptime('{} {}'.format(ent[0].text, DAYTIMEH[ent[1].lemma_]), '%d.%m.%y %H'), 
               'uncertain': delta_hour,
               'form': triangle,
               'stamp': 1},
 # 6.30 утра 20.12.2010 года
-'r_time_daytime_date': {'pattern': [{"TEXT": {"REGEX": time}}, {"LEMMA": {"IN": list(DAYTIME.keys())}}, {"TEXT": {"REGEX": date}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_time_daytime_date': {'pattern': [shape("time"), {"LEMMA": {"IN": list(DAYTIME.keys())}}, shape("date"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{} {}'.format(ent[2].text, ent[0].text), '%d.%m.%Y %H.%M')+relativedelta(hours=DAYTIME[ent[1].lemma_]), 
               'uncertain': delta_hour,
               'form': triangle,
               'stamp': 1},
 # около 6.30 утра 20.12.2010 года
-'r_around_time_daytime_date': {'pattern': [{"LEMMA": "около"}, {"TEXT": {"REGEX": time}}, {"LEMMA": {"IN": list(DAYTIME.keys())}}, {"TEXT": {"REGEX": date}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_around_time_daytime_date': {'pattern': [{"LEMMA": "около"}, shape("time"), {"LEMMA": {"IN": list(DAYTIME.keys())}}, shape("date"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{} {}'.format(ent[3].text, ent[1].text), '%d.%m.%Y %H.%M')+relativedelta(hours=DAYTIME[ent[2].lemma_]), 
               'uncertain': relativedelta(hours=2),
               'form': fuzzy_triangle,
               'stamp': 1},
 # 12.10.2011 года в 8 часов утра
-'r_date_in_time_daytime': {'pattern': [{"TEXT": {"REGEX": date}}, {"LEMMA": 'год'}, {"TEXT": "в"}, {"_": {"is_digit": True}}, {"LEMMA": 'час'}, {"LEMMA": {"IN": list(DAYTIME.keys())}}], 
+'r_date_in_time_daytime': {'pattern': [shape("date"), {"LEMMA": 'год'}, {"TEXT": "в"}, {"_": {"is_digit": True}}, {"LEMMA": 'час'}, {"LEMMA": {"IN": list(DAYTIME.keys())}}], 
               'norm': lambda ent: strptime('{} {}'.format(ent[0].text, int(ent[3].text)+DAYTIME[ent[5].lemma_]), '%d.%m.%Y %H'), 
               'uncertain': delta_hour,
               'form': triangle,
               'stamp': 1},
 # сегодня в 16.00
-'r_event_time': {'pattern': [{"LEMMA": {"IN": list(time_events.keys())}}, {"TEXT": "в"}, {"TEXT": {"REGEX": r'^{}.{}$'.format(hour,minute)}}], 
+'r_event_time': {'pattern': [{"LEMMA": {"IN": list(time_events.keys())}}, {"TEXT": "в"}, shape("hour_minute")], 
               'norm': lambda ent: strptime('{} {}'.format(ent.doc._.date.date()-delta_day*time_events[ent[0].lemma_], ent[2].text), '%Y-%m-%d %H.%M'), 
               'uncertain': delta_hour,
               'form': triangle,
               'stamp': 1},
 # сегодня около 11-00 часов
-'r_event_around_time': {'pattern': [{"LEMMA": {"IN": list(time_events.keys())}}, {"TEXT": "около"}, {"TEXT": {"REGEX": time}}, {"LEMMA": 'час', "OP": "?"}], 
+'r_event_around_time': {'pattern': [{"LEMMA": {"IN": list(time_events.keys())}}, {"TEXT": "около"}, shape("time"), {"LEMMA": 'час', "OP": "?"}], 
               'norm': lambda ent: strptime('{} {}'.format(ent.doc._.date.date()-delta_day*time_events[ent[0].lemma_], ent[2].text), '%Y-%m-%d %H.%M'), 
               'uncertain': delta_hour*2,
               'form': triangle,
@@ -609,13 +651,13 @@ rules = {
               'form': fuzzy_triangle,
               'stamp': 1},
 # 10-00 часов 17.12.2010 года
-'r_time_h__date': {'pattern': [{"TEXT": {"REGEX": time}}, {"LEMMA": "час"}, {"TEXT": {"REGEX": date}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_time_h__date': {'pattern': [shape("time"), {"LEMMA": "час"}, shape("date"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{} {}'.format(ent[0].text, ent[2].text), '%H.%M %d.%m.%Y'),
               'uncertain': delta_hour,
               'form': triangle,
               'stamp': 1},
 # около 10-00 часов 17.12.2010 года
-'r_around_time_h_date': {'pattern': [{"LEMMA": "около"}, {"TEXT": {"REGEX": time}}, {"LEMMA": "час"}, {"TEXT": {"REGEX": date}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_around_time_h_date': {'pattern': [{"LEMMA": "около"}, shape("time"), {"LEMMA": "час"}, shape("date"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{} {}'.format(ent[1].text, ent[3].text), '%H.%M %d.%m.%Y'),
               'uncertain': delta_hour,
               'form': fuzzy_triangle,
@@ -627,13 +669,13 @@ rules = {
               'form': triangle,
               'stamp': 1},
 # от 24-25.11.2010
-'r_ot_day_dash_date': {'pattern': [{"LEMMA": 'от'}, {"TEXT": {"REGEX": r'^{}[-–]{}.{}.{}$'.format(day,day,month,year4d)}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_ot_day_dash_date': {'pattern': [{"LEMMA": 'от'}, shape("days_date"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime(ent[1].text[ent[1].text.find('-')+1:], '%d.%m.%Y'), 
               'uncertain': delta_day,
               'form': triangle,
               'stamp': 1},
 # от 10-13.09.11 г
-'r_ot_day_dash_shortdate': {'pattern': [{"LEMMA": 'от'}, {"TEXT": {"REGEX": r'^{}[-–]{}[.]{}[.]{}$'.format(day,day,month,year2d)}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_ot_day_dash_shortdate': {'pattern': [{"LEMMA": 'от'}, shape("days_shortdate"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime(ent[1].text[ent[1].text.find('-')+1:], '%d.%m.%y'), 
               'uncertain': delta_day,
               'form': triangle,
@@ -645,13 +687,13 @@ rules = {
               'form': triangle,
               'stamp': 1},
 # в 90-х годах
-'r_in_int_h_2dyear': {'pattern': [{"LEMMA": "в"}, {"TEXT": {"REGEX": r'^\d\d$'}}, {"TEXT": {"IN": ['годах', 'годы']}}], 
+'r_in_int_h_2dyear': {'pattern': [{"LEMMA": "в"}, shape("digits2"), {"TEXT": {"IN": ['годах', 'годы']}}], 
               'norm': lambda ent: strptime('01.07.{}'.format(int(ent[1].text)+1905), '%d.%m.%Y'),
               'uncertain': relativedelta(years=5),
               'form': triangle,
               'stamp': 1},
 # в 1990-х годах
-'r_in_int_h_4dyear': {'pattern': [{"LEMMA": "в"}, {"TEXT": {"REGEX": r'^\d\d\d\d$'}}, {"TEXT": {"IN": ['годах', 'годы']}}], 
+'r_in_int_h_4dyear': {'pattern': [{"LEMMA": "в"}, shape("digits4"), {"TEXT": {"IN": ['годах', 'годы']}}], 
               'norm': lambda ent: strptime('01.07.{}'.format(int(ent[1].text)+5), '%d.%m.%Y'),
               'uncertain': relativedelta(years=5),
               'form': triangle,
@@ -669,43 +711,43 @@ rules = {
               'form': triangle,
               'stamp': 1},
 # 90-х годах
-'r_int_h_2dyear': {'pattern': [{"TEXT": {"REGEX": r'^\d\d$'}}, {"TEXT": {"IN": ['годах', 'годы']}}], 
+'r_int_h_2dyear': {'pattern': [shape("digits2"), {"TEXT": {"IN": ['годах', 'годы']}}], 
               'norm': lambda ent: strptime('01.07.{}'.format(int(ent[0].text)+1905), '%d.%m.%Y'),
               'uncertain': relativedelta(years=5),
               'form': triangle,
               'stamp': 1},
 # 1990-х годах
-'r_int_h_4dyear': {'pattern': [{"TEXT": {"REGEX": r'^\d\d\d\d$'}}, {"TEXT": {"IN": ['годах', 'годы']}}], 
+'r_int_h_4dyear': {'pattern': [shape("digits4"), {"TEXT": {"IN": ['годах', 'годы']}}], 
               'norm': lambda ent: strptime('01.07.{}'.format(int(ent[0].text)+5), '%d.%m.%Y'),
               'uncertain': relativedelta(years=5),
               'form': triangle,
               'stamp': 1},
 # в 12.2013 г
-'r_in_month_year': {'pattern': [{"LEMMA": 'в'}, {"TEXT": {"REGEX": r'^{}[.]{}$'.format(month,year4d)}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_in_month_year': {'pattern': [{"LEMMA": 'в'}, shape("month_dot_year4"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('15.{}'.format(ent[1].text), '%d.%m.%Y'), 
               'uncertain': delta_month,
               'form': triangle,
               'stamp': 1},
 # 28.08.	
-'r_day_month': {'pattern': [{"TEXT": {"REGEX": r'^{}[.]{}[.]$'.format(day,month)}}], 
+'r_day_month': {'pattern': [shape("day_month_dot")], 
               'norm': lambda ent: strptime('{}{}'.format(ent[0].text, ent.doc._.date.year), '%d.%m.%Y'), 
               'uncertain': delta_day,
               'form': triangle,
               'stamp': 1},
 # от 06.04.	
-'r_ot_day_month': {'pattern': [{"LEMMA": 'от'},{"TEXT": {"REGEX": r'^{}.{}.$'.format(day,month)}}], 
+'r_ot_day_month': {'pattern': [{"LEMMA": 'от'},shape("day_month_end")], 
               'norm': lambda ent: strptime('{}{}'.format(ent[1].text, ent.doc._.date.year), '%d.%m.%Y'), 
               'uncertain': delta_day,
               'form': triangle,
               'stamp': 1},
 # сегодня в 16.00
-'r_event_from_time': {'pattern': [{"LEMMA": {"IN": list(time_events.keys())}}, {"TEXT": "с"}, {"TEXT": {"REGEX": r'^{}.{}$'.format(hour,minute)}}], 
+'r_event_from_time': {'pattern': [{"LEMMA": {"IN": list(time_events.keys())}}, {"TEXT": "с"}, shape("hour_minute")], 
               'norm': lambda ent: strptime(str(ent.doc._.date.date()-delta_day*time_events[ent[0].lemma_])+ent[2].text, '%Y-%m-%d%H.%M'), 
               'uncertain': delta_hour,
               'form': triangle,
               'stamp': 1},
 # Сегодня 27.07.13 около 15 ч
-'r_event_shortdate_around_time': {'pattern': [{"LEMMA": {"IN": list(time_events.keys())}}, {"TEXT": {"REGEX": shortdate}}, {"LEMMA": 'около'}, {"_": {"is_digit": True}}, {"LEMMA": {"IN": ['час', 'часть']}, "OP": "?"}], 
+'r_event_shortdate_around_time': {'pattern': [{"LEMMA": {"IN": list(time_events.keys())}}, shape("shortdate"), {"LEMMA": 'около'}, {"_": {"is_digit": True}}, {"LEMMA": {"IN": ['час', 'часть']}, "OP": "?"}], 
               'norm': lambda ent: strptime(ent[1].text +' ' +ent[3].text, '%d.%m.%y %H'), 
               'uncertain': delta_hour,
               'form': fuzzy_triangle,
@@ -719,97 +761,97 @@ rules = {
               'form': trapezoid,
               'stamp': 2},
 # с 9 мая 2010
-'r_from_int_month_yeard4d_year': {'pattern': [{"LEMMA": 'с'}, {"_": {"is_digit": True}}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_from_int_month_yeard4d_year': {'pattern': [{"LEMMA": 'с'}, {"_": {"is_digit": True}}, {"LEMMA": {"IN": list(MONTHS.keys())}}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [strptime('{}.{}.{}'.format(ent[1].text, MONTHS[ent[2].lemma_][3:5], ent[3].text), '%d.%m.%Y'), ent.doc._.date], 
               'uncertain': [delta_day, relativedelta(days=0)],
               'form': trapezoid,
               'stamp': 2},
 # c 1-10 марта 2010 г	
-'r_from_range_month_year4d_year': {'pattern': [{"LEMMA": 'с'}, {"TEXT": {"REGEX": range_r}}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_from_range_month_year4d_year': {'pattern': [{"LEMMA": 'с'}, shape("range"), {"LEMMA": {"IN": list(MONTHS.keys())}}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [strptime(ent[1].text[0]+MONTHS[ent[2].lemma_][2:]+ent[3].lemma_, '%d.%m.%Y'), ent.doc._.date], #
               'uncertain': [delta_month, relativedelta(days=0)],
               'form': trapezoid,
               'stamp': 2},
 # С конца 2011
-'r_from_yearpart_year4d': {'pattern': [{"LEMMA": 'с'}, {"LEMMA": {"IN": list(YEAR_PART.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_from_yearpart_year4d': {'pattern': [{"LEMMA": 'с'}, {"LEMMA": {"IN": list(YEAR_PART.keys())}}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [strptime(YEAR_PART[ent[1].lemma_]+ent[2].text, '%d.%m.%Y'), ent.doc._.date], 
               'uncertain': [relativedelta(days=45), relativedelta(days=0)],
               'form': trapezoid,
               'stamp': 2},
 # С конца января 2011
-'r_from_monthpart_month_year4d': {'pattern': [{"LEMMA": 'с'}, {"LEMMA": {"IN": list(YEAR_PART.keys())}}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_from_monthpart_month_year4d': {'pattern': [{"LEMMA": 'с'}, {"LEMMA": {"IN": list(YEAR_PART.keys())}}, {"LEMMA": {"IN": list(MONTHS.keys())}}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [strptime('{}.{}.{}'.format(MONTH_PART[ent[1].lemma_],MONTHS[ent[2].lemma_][3:5], ent[3].lemma_), '%d.%m.%Y'), ent.doc._.date], 
               'uncertain': [relativedelta(days=15), relativedelta(days=0)],
               'form': trapezoid,
               'stamp': 2},
 # с утра 04.09.2010
-'r_from_daytime_date': {'pattern': [{"LEMMA": 'с'},{"LEMMA": {"IN": list(DAYTIME.keys())}}, {"TEXT": {"REGEX": date}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_from_daytime_date': {'pattern': [{"LEMMA": 'с'},{"LEMMA": {"IN": list(DAYTIME.keys())}}, shape("date"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [strptime('{} {}'.format(ent[2].text, DAYTIMEH[ent[1].lemma_]), '%d.%m.%Y %H'), ent.doc._.date], 
               'uncertain': [delta_hour, relativedelta(days=0)],
               'form': trapezoid,
               'stamp': 2},
 # с 23.00 21.12.2010
-'r_from_time_date_a': {'pattern': [{"LEMMA": 'с'}, {"TEXT": {"REGEX": r'^{}.{}$'.format(hour,minute)}}, {"TEXT": {"REGEX": date}}], 
+'r_from_time_date_a': {'pattern': [{"LEMMA": 'с'}, shape("hour_minute"), shape("date")], 
               'norm': lambda ent: [strptime('{} {}'.format(ent[1].text, ent[2].text), '%H.%M %d.%m.%Y'), ent.doc._.date],
               'uncertain': [delta_hour, relativedelta(days=0)],
               'form': trapezoid,
               'stamp': 2},
 # с 17.00 07.08.13
-'r_from_time_shortdate': {'pattern': [{"LEMMA": 'с'}, {"TEXT": {"REGEX": r'^{}.{}$'.format(hour,minute)}}, {"TEXT": {"REGEX": shortdate}}], 
+'r_from_time_shortdate': {'pattern': [{"LEMMA": 'с'}, shape("hour_minute"), shape("shortdate")], 
               'norm': lambda ent: [strptime(ent.text[2:], '%H.%M %d.%m.%y'), ent.doc._.date], 
               'uncertain': [delta_hour, relativedelta(days=0)],
               'form': trapezoid,
               'stamp': 2},
 # 'с 23-00 21.12.2010'
-'r_from_time_date_b': {'pattern': [{"LEMMA": 'с'}, {"TEXT": {"REGEX": r'^{}-{}$'.format(hour,minute)}}, {"TEXT": {"REGEX": date}}], 
+'r_from_time_date_b': {'pattern': [{"LEMMA": 'с'}, shape("hour_dash_minute"), shape("date")], 
               'norm': lambda ent: [strptime(ent.text[2:], '%H-%M %d.%m.%Y'), ent.doc._.date], 
               'uncertain': [delta_hour, relativedelta(days=0)],
               'form': trapezoid,
               'stamp': 2},
 # 11.09.2010 с 20.00
-'r_date_from_time': {'pattern': [{"TEXT": {"REGEX": date}}, {"LEMMA": 'с'}, {"TEXT": {"REGEX": time}}], 
+'r_date_from_time': {'pattern': [shape("date"), {"LEMMA": 'с'}, shape("time")], 
               'norm': lambda ent: [strptime('{} {}'.format(ent[2].text, ent[0].text), '%H.%M %d.%m.%Y'), ent.doc._.date], 
               'uncertain': [delta_hour, relativedelta(days=0)],
               'form': trapezoid,
               'stamp': 2},
 # 'с 21.12.2010'
-'r_from_date': {'pattern': [{"LEMMA": 'с'}, {"TEXT": {"REGEX": date}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_from_date': {'pattern': [{"LEMMA": 'с'}, shape("date"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [strptime(ent[1].text, '%d.%m.%Y'), ent.doc._.date], 
               'uncertain': [delta_day, relativedelta(days=0)],
               'form': trapezoid,
               'stamp': 2},
 # с 27.12.10
-'r_from_shortdate': {'pattern': [{"LEMMA": 'с'}, {"TEXT": {"REGEX": shortdate}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_from_shortdate': {'pattern': [{"LEMMA": 'с'}, shape("shortdate"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [strptime(ent[1].text, '%d.%m.%y'), ent.doc._.date], 
               'uncertain': [delta_day, relativedelta(days=0)],
               'form': trapezoid,
               'stamp': 2},
 # с 2010
-'r_from_year4d_year': {'pattern': [{"LEMMA": 'с'}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_from_year4d_year': {'pattern': [{"LEMMA": 'с'}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [strptime('01.07.{}'.format(ent[1].text), '%d.%m.%Y'), ent.doc._.date], 
               'uncertain': [delta_year, relativedelta(days=0)],
               'form': trapezoid,
               'stamp': 2},
 # с 02.2009 год
-'r_from_shortdate_year_a': {'pattern': [{"LEMMA": 'с'}, {"TEXT": {"REGEX": r'^{}.{}$'.format(month,year4d)}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_from_shortdate_year_a': {'pattern': [{"LEMMA": 'с'}, shape("month_sep_year4"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [strptime('15.{}'.format(ent[1].text), '%d.%m.%Y'), ent.doc._.date], 
               'uncertain': [delta_month, relativedelta(days=0)],
               'form': trapezoid,
               'stamp': 2},
 # с 02.98 год
-'r_from_shortdate_year_b': {'pattern': [{"LEMMA": 'с'}, {"TEXT": {"REGEX": r'^{}.{}$'.format(month,year2d)}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_from_shortdate_year_b': {'pattern': [{"LEMMA": 'с'}, shape("month_sep_year2"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [strptime('15.{}'.format(ent[1].text), '%d.%m.%y'), ent.doc._.date], 
               'uncertain': [delta_year, relativedelta(days=0)],
               'form': trapezoid,
               'stamp': 2},
 # с мая 2010
-'r_from_month_yeard4d_year': {'pattern': [{"LEMMA": 'с'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_from_month_yeard4d_year': {'pattern': [{"LEMMA": 'с'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [strptime('{}{}'.format(MONTHS[ent[1].lemma_], ent[2].text), '%d.%m.%Y'), ent.doc._.date], 
               'uncertain': [delta_month, relativedelta(days=0)],
               'form': trapezoid,
               'stamp': 2},
 # С осени 2005 г 
-'r_from_season_yeard4d_year': {'pattern': [{"LEMMA": 'с'}, {"LEMMA": {"IN": list(SEASONS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_from_season_yeard4d_year': {'pattern': [{"LEMMA": 'с'}, {"LEMMA": {"IN": list(SEASONS.keys())}}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [strptime(SEASONS[ent[1].lemma_]+ent[2].lemma_, '%d.%m.%Y'), ent.doc._.date], 
               'uncertain': [relativedelta(days=60), relativedelta(days=0)],
               'form': trapezoid,
@@ -841,13 +883,13 @@ rules = {
 
 ########## BEFORE RULES ##########
 # до 9 мая 2010
-'r_before_int_month_yeard4d_year': {'pattern': [{"LEMMA": 'до'}, {"_": {"is_digit": True}}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_before_int_month_yeard4d_year': {'pattern': [{"LEMMA": 'до'}, {"_": {"is_digit": True}}, {"LEMMA": {"IN": list(MONTHS.keys())}}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [ent.doc._.birthday, strptime('{}{}{}'.format(ent[1].text, MONTHS[ent[2].lemma_][2:], ent[3].text), '%d.%m.%Y')], 
               'uncertain': [relativedelta(days=0), delta_day],
               'form': trapezoid,
               'stamp': 2},
 # до 5-6 декабря 2009
-'r_before_int_dash_int_month_yeard4d_year': {'pattern': [{"LEMMA": 'до'}, {"TEXT": {"REGEX": range_r}}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_before_int_dash_int_month_yeard4d_year': {'pattern': [{"LEMMA": 'до'}, shape("range"), {"LEMMA": {"IN": list(MONTHS.keys())}}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [ent.doc._.birthday, strptime('{}{}{}'.format(ent[1][0].text, MONTHS[ent[2].lemma_][2:], ent[3].text), '%d.%m.%Y')], 
               'uncertain': [relativedelta(days=0), delta_day],
               'form': trapezoid,
@@ -859,7 +901,7 @@ rules = {
               'form': trapezoid,
               'stamp': 2},
 # до декабря 2009
-'r_before_month_year': {'pattern': [{"LEMMA": 'до'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_before_month_year': {'pattern': [{"LEMMA": 'до'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [ent.doc._.birthday, strptime('{}{}'.format(MONTHS[ent[1].lemma_], ent[2].text), '%d.%m.%Y')], 
               'uncertain': [relativedelta(days=0), delta_month],
               'form': trapezoid,
@@ -871,31 +913,31 @@ rules = {
               'form': trapezoid,
               'stamp': 2},
 # до 2006 года	
-'r_before_int_yeard4d_year': {'pattern': [{"LEMMA": 'до'}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_before_int_yeard4d_year': {'pattern': [{"LEMMA": 'до'}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [ent.doc._.birthday, strptime('01.07.{}'.format(ent[1].text), '%d.%m.%Y')],
               'uncertain': [relativedelta(days=0), delta_year],
               'form': trapezoid,
               'stamp': 2},
 # до 9.01.2011	
-'r_before_date': {'pattern': [{"LEMMA": 'до'}, {"TEXT": {"REGEX": date}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_before_date': {'pattern': [{"LEMMA": 'до'}, shape("date"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [ent.doc._.birthday, strptime(ent[1].text, '%d.%m.%Y')], 
               'uncertain': [relativedelta(days=0), delta_day],
               'form': trapezoid,
               'stamp': 2},
 # до 9.01.11	
-'r_before_shortdate': {'pattern': [{"LEMMA": 'до'}, {"TEXT": {"REGEX": shortdate}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_before_shortdate': {'pattern': [{"LEMMA": 'до'}, shape("shortdate"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [ent.doc._.birthday, strptime(ent[1].text, '%d.%m.%y')], 
               'uncertain': [relativedelta(days=0), delta_day],
               'form': trapezoid,
               'stamp': 2},
 # к 29.12	
-'r_before_day_month': {'pattern': [{"LEMMA": 'к'}, {"TEXT": {"REGEX": r'^{}.{}$'.format(day,month)}}], 
+'r_before_day_month': {'pattern': [{"LEMMA": 'к'}, shape("day_sep_month")], 
               'norm': lambda ent: [ent.doc._.birthday, strptime('{}.{}'.format(ent[1].text, ent.doc._.date.year), '%d.%m.%Y')], 
               'uncertain': [relativedelta(days=0), delta_day],
               'form': trapezoid,
               'stamp': 2},
 # до середины ноября 2011
-'r_before_monthpart_month_year4d': {'pattern': [{"LEMMA": 'до'}, {"LEMMA": {"IN": list(YEAR_PART.keys())}}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_before_monthpart_month_year4d': {'pattern': [{"LEMMA": 'до'}, {"LEMMA": {"IN": list(YEAR_PART.keys())}}, {"LEMMA": {"IN": list(MONTHS.keys())}}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [ent.doc._.birthday, strptime('{}{}{}'.format(MONTH_PART[ent[1].lemma_],MONTHS[ent[2].lemma_][2:], ent[3].lemma_), '%d.%m.%Y')], 
               'uncertain': [relativedelta(days=0), relativedelta(days=15)],
               'form': trapezoid,
@@ -933,7 +975,7 @@ rules = {
               'form': trapezoid,
               'stamp': 2},
 # в 71 год
-'r_in_int_year': {'pattern': [{"LEMMA": 'в'}, {"TEXT": {"REGEX": r'^\d\d$'}}, {"TEXT": {"IN": ['год', 'л', 'г', 'лет']}}], #  {"_": {"is_digit": True}}
+'r_in_int_year': {'pattern': [{"LEMMA": 'в'}, shape("digits2"), {"TEXT": {"IN": ['год', 'л', 'г', 'лет']}}], #  {"_": {"is_digit": True}}
               'norm': lambda ent: ent.doc._.birthday + relativedelta(years=int(ent[1].text)), 
               'uncertain': delta_year,
               'form': triangle,
@@ -947,13 +989,13 @@ rules = {
               'form': trapezoid,
               'stamp': 2},
 # в течение 2010 года
-'r_dur_yearfull_unit': {'pattern': [{"LEMMA": {"IN": ['в', 'на']}}, {"LEMMA": {"IN": ['течение', 'протяжение']}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": {"IN": unit}}], 
+'r_dur_yearfull_unit': {'pattern': [{"LEMMA": {"IN": ['в', 'на']}}, {"LEMMA": {"IN": ['течение', 'протяжение']}}, shape("year"), {"LEMMA": {"IN": unit}}], 
               'norm': lambda ent: strptime('15.07.{}'.format(ent[2].text), '%d.%m.%Y'), 
               'uncertain': lambda ent: delta_year,
               'form': triangle,
               'stamp': 2},
 # в течение 2-3 лет
-'r_dur_range_unit': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": "течение"}, {"TEXT": {"REGEX": range_r}}, {"LEMMA": {"IN": unit}}], 
+'r_dur_range_unit': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": "течение"}, shape("range"), {"LEMMA": {"IN": unit}}], 
               'norm': lambda ent: [ent.doc._.date - relativedelta(**{relative_dict[ent[3].lemma_]:int(ent[2].text[0])}), ent.doc._.date], 
               'uncertain': lambda ent: [relativedelta(**{relative_dict[ent[3].lemma_]:1}), relativedelta(days=0)],
               'form': trapezoid,
@@ -983,13 +1025,13 @@ rules = {
               'form': trapezoid,
               'stamp': 2},
 # в течение последних 1,5 месяцев
-'r_dur_last_float_month': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": "течение"}, {"LEMMA": "последний"}, {"TEXT": {"REGEX": r'^\d[.,]\d$'}}, {"LEMMA": 'месяц'}], 
+'r_dur_last_float_month': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": "течение"}, {"LEMMA": "последний"}, shape("decimal"), {"LEMMA": 'месяц'}], 
               'norm': lambda ent: [ent.doc._.date - relativedelta(months=int(ent[3].text[0]), days=15), ent.doc._.date], 
               'uncertain': [delta_month, relativedelta(days=0)],
               'form': trapezoid,
               'stamp': 2},
 # в течение последних 1,5 лет
-'r_dur_last_float_year': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": "течение"}, {"LEMMA": "последний"}, {"TEXT": {"REGEX": r'^\d[.,]\d$'}}, {"LEMMA": 'год'}], 
+'r_dur_last_float_year': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": "течение"}, {"LEMMA": "последний"}, shape("decimal"), {"LEMMA": 'год'}], 
               'norm': lambda ent: [ent.doc._.date - relativedelta(years=int(ent[3].text[0]), months=6), ent.doc._.date], 
               'uncertain': [delta_year, relativedelta(days=0)],
               'form': trapezoid,
@@ -1019,31 +1061,31 @@ rules = {
               'form': trapezoid,
               'stamp': 2},
 # в течение 1,5 последних месяцев
-'r_dur_float_last_month': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": "течение"}, {"TEXT": {"REGEX": r'^\d[.,]\d$'}}, {"LEMMA": "последний"}, {"LEMMA": 'месяц'}], 
+'r_dur_float_last_month': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": "течение"}, shape("decimal"), {"LEMMA": "последний"}, {"LEMMA": 'месяц'}], 
               'norm': lambda ent: [ent.doc._.date - relativedelta(months=int(ent[2].text[0]), days=15), ent.doc._.date], 
               'uncertain': [delta_month, relativedelta(days=0)],
               'form': trapezoid,
               'stamp': 2},
 # в течение 1,5 последних лет
-'r_dur_float_last_year': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": "течение"}, {"TEXT": {"REGEX": r'^\d[.,]\d$'}}, {"LEMMA": "последний"}, {"LEMMA": 'год'}], 
+'r_dur_float_last_year': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": "течение"}, shape("decimal"), {"LEMMA": "последний"}, {"LEMMA": 'год'}], 
               'norm': lambda ent: [ent.doc._.date - relativedelta(years=int(ent[2].text[0]), months=6), ent.doc._.date], 
               'uncertain': [delta_year, relativedelta(days=0)],
               'form': trapezoid,
               'stamp': 2},
 # в течение 1,5 месяцев
-'r_dur_float_month': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": "течение"}, {"TEXT": {"REGEX": r'^\d[.,]\d$'}}, {"LEMMA": 'месяц'}], 
+'r_dur_float_month': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": "течение"}, shape("decimal"), {"LEMMA": 'месяц'}], 
               'norm': lambda ent: [ent.doc._.date - relativedelta(months=int(ent[2].text[0]), days=15), ent.doc._.date], 
               'uncertain': [delta_month, relativedelta(days=0)],
               'form': trapezoid,
               'stamp': 2},
 # в течение 1,5 лет
-'r_dur_float_year': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": "течение"}, {"TEXT": {"REGEX": r'^\d[.,]\d$'}}, {"LEMMA": 'год'}], 
+'r_dur_float_year': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": "течение"}, shape("decimal"), {"LEMMA": 'год'}], 
               'norm': lambda ent: [ent.doc._.date - relativedelta(years=int(ent[2].text[0]), months=6), ent.doc._.date], 
               'uncertain': [delta_year, relativedelta(days=0)],
               'form': trapezoid,
               'stamp': 2},
 # Последние 1.5 недели
-'r_last_float_unit': {'pattern': [{"LEMMA": "последний"}, {"TEXT": {"REGEX": r'^\d[.,]\d$'}}, {"LEMMA": {"IN": ["неделя", "день"]}}], 
+'r_last_float_unit': {'pattern': [{"LEMMA": "последний"}, shape("decimal"), {"LEMMA": {"IN": ["неделя", "день"]}}], 
               'norm': lambda ent: [ent.doc._.date - relativedelta(**{relative_dict[ent[2].lemma_]:int(float(ent[1].text.replace(',', '.')))}), ent.doc._.date], 
               'uncertain': [delta_year, relativedelta(days=0)],
               'form': trapezoid,
@@ -1085,7 +1127,7 @@ rules = {
               'form': trapezoid,
               'stamp': 2},
 # в течение 5-7 минут
-'r_dur_range_minute': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": "течение"}, {"TEXT": {"REGEX": range_r}}, {"LEMMA": "минута"}], 
+'r_dur_range_minute': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": "течение"}, shape("range"), {"LEMMA": "минута"}], 
               'norm': lambda ent: None, 
               'uncertain': None,
               'form': [None],
@@ -1099,7 +1141,7 @@ rules = {
               'form': [None],
               'stamp': 4},
 # через 1-2 месяца
-'r_thr_range_unit': {'pattern': [{"LEMMA": {"IN": ["через", "спустя"]}}, {"TEXT": {"REGEX": range_r}}, {"LEMMA": {"IN": unit}}], 
+'r_thr_range_unit': {'pattern': [{"LEMMA": {"IN": ["через", "спустя"]}}, shape("range"), {"LEMMA": {"IN": unit}}], 
               'norm': lambda ent: None, 
               'uncertain': None,
               'form': [None],
@@ -1185,97 +1227,97 @@ rules = {
               'form': trapezoid,
               'stamp': 2},
 # с 2005 года по 2009 год
-'r_from_year4d_year_till_year4d_year': {'pattern': [{"LEMMA": 'с'}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год'}, {"TEXT": 'по'}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год'}], 
+'r_from_year4d_year_till_year4d_year': {'pattern': [{"LEMMA": 'с'}, shape("year"), {"LEMMA": 'год'}, {"TEXT": 'по'}, shape("year"), {"LEMMA": 'год'}], 
               'norm': lambda ent: [strptime('01.07.{}'.format(ent[1].text), '%d.%m.%Y'), strptime('01.07.{}'.format(ent[4].text), '%d.%m.%Y')], 
               'uncertain': delta_year,
               'form': trapezoid,
               'stamp': 2},
 # С декабря 2008 года по март 2009 года
-'r_from_month_year4d_year_till_month_year4d_year': {'pattern': [{"LEMMA": 'с'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год'}, {"TEXT": 'по'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год'}], 
+'r_from_month_year4d_year_till_month_year4d_year': {'pattern': [{"LEMMA": 'с'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, shape("year"), {"LEMMA": 'год'}, {"TEXT": 'по'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, shape("year"), {"LEMMA": 'год'}], 
               'norm': lambda ent: [strptime('{}{}'.format(MONTHS[ent[1].lemma_], ent[2].text), '%d.%m.%Y'), strptime('{}{}'.format(MONTHS[ent[5].lemma_],ent[6].text), '%d.%m.%Y')], 
               'uncertain': delta_month,
               'form': trapezoid,
               'stamp': 2},
 # с 08.06.10 по 22.06.10
-'r_from_shortdate_till_shortdate': {'pattern': [{"LEMMA": 'с'}, {"TEXT": {"REGEX": shortdate}}, {"TEXT": 'по'}, {"TEXT": {"REGEX": shortdate}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_from_shortdate_till_shortdate': {'pattern': [{"LEMMA": 'с'}, shape("shortdate"), {"TEXT": 'по'}, shape("shortdate"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [strptime(ent[1].text, '%d.%m.%y'), strptime(ent[3].text, '%d.%m.%y')], 
               'uncertain': delta_day,
               'form': trapezoid,
               'stamp': 2},
 # с 08.06.10 г по 22.06.10 г
-'r_from_shortdate_till_shortdate_year': {'pattern': [{"LEMMA": 'с'}, {"TEXT": {"REGEX": shortdate}}, {"LEMMA": 'год'}, {"TEXT": 'по'}, {"TEXT": {"REGEX": shortdate}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_from_shortdate_till_shortdate_year': {'pattern': [{"LEMMA": 'с'}, shape("shortdate"), {"LEMMA": 'год'}, {"TEXT": 'по'}, shape("shortdate"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [strptime(ent[1].text, '%d.%m.%y'), strptime(ent[4].text, '%d.%m.%y')], 
               'uncertain': delta_day,
               'form': trapezoid,
               'stamp': 2},
 # с 08.06.2010 по 22.06.2010
-'r_from_date_till_date': {'pattern': [{"LEMMA": 'с'}, {"TEXT": {"REGEX": date}}, {"TEXT": 'по'}, {"TEXT": {"REGEX": date}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_from_date_till_date': {'pattern': [{"LEMMA": 'с'}, shape("date"), {"TEXT": 'по'}, shape("date"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [strptime(ent[1].text, '%d.%m.%Y'), strptime(ent[3].text, '%d.%m.%Y')], 
               'uncertain': delta_day,
               'form': trapezoid,
               'stamp': 2},
 # с 08.06.2010 г по 22.06.2010 г
-'r_from_date_till_date_year': {'pattern': [{"LEMMA": 'с'}, {"TEXT": {"REGEX": date}}, {"LEMMA": 'год'}, {"TEXT": 'по'}, {"TEXT": {"REGEX": date}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_from_date_till_date_year': {'pattern': [{"LEMMA": 'с'}, shape("date"), {"LEMMA": 'год'}, {"TEXT": 'по'}, shape("date"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [strptime(ent[1].text, '%d.%m.%Y'), strptime(ent[4].text, '%d.%m.%Y')], 
               'uncertain': delta_day,
               'form': trapezoid,
               'stamp': 2},
 # С 08.06 по 10.06.08
-'r_from_date_my2d_till_date': {'pattern': [{"LEMMA": 'с'}, {"TEXT": {"REGEX": date_my2d}}, {"TEXT": 'по'}, {"TEXT": {"REGEX": shortdate}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_from_date_my2d_till_date': {'pattern': [{"LEMMA": 'с'}, shape("month_year2"), {"TEXT": 'по'}, shape("shortdate"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [strptime(ent[1].text+ent[3].text[-3:], '%d.%m.%y'), strptime(ent[3].text, '%d.%m.%y')], 
               'uncertain': delta_day,
               'form': trapezoid,
               'stamp': 2},
 # с 08.06.10 - 22.06.10
-'r_from_date_dash_date': {'pattern': [{"LEMMA": 'с'}, {"TEXT": {"REGEX": shortdate}}, {"TEXT": {"IN": ["–", "-"]}}, {"TEXT": {"REGEX": shortdate}}], 
+'r_from_date_dash_date': {'pattern': [{"LEMMA": 'с'}, shape("shortdate"), {"TEXT": {"IN": ["–", "-"]}}, shape("shortdate")], 
               'norm': lambda ent: [strptime(ent[1].text, '%d.%m.%y'), strptime(ent[3].text, '%d.%m.%y')], 
               'uncertain': delta_day,
               'form': trapezoid,
               'stamp': 2},
 # 08.06.10 - 22.06.10
-'r_date_dash_date': {'pattern': [{"TEXT": {"REGEX": shortdate}}, {"TEXT": {"IN": ["–", "-"]}}, {"TEXT": {"REGEX": shortdate}}], 
+'r_date_dash_date': {'pattern': [shape("shortdate"), {"TEXT": {"IN": ["–", "-"]}}, shape("shortdate")], 
               'norm': lambda ent: [strptime(ent[0].text, '%d.%m.%y'), strptime(ent[2].text, '%d.%m.%y')], 
               'uncertain': delta_day,
               'form': trapezoid,
               'stamp': 2},
 # с 4.06 – 17.06
-'r_from_shortdate_dash_shortdate': {'pattern': [{"LEMMA": 'с'}, {"TEXT": {"REGEX": r'^{}.{}$'.format(day,month)}}, {"TEXT": {"IN": ["–", "-"]}}, {"TEXT": {"REGEX": r'^{}.{}$'.format(day,month)}}], 
+'r_from_shortdate_dash_shortdate': {'pattern': [{"LEMMA": 'с'}, shape("day_sep_month"), {"TEXT": {"IN": ["–", "-"]}}, shape("day_sep_month")], 
               'norm': lambda ent: [strptime(ent[1].text+'.'+str(ent.doc._.date.year), '%d.%m.%Y'), strptime(ent[3].text+'.'+str(ent.doc._.date.year), '%d.%m.%Y')], 
               'uncertain': delta_day,
               'form': trapezoid,
               'stamp': 2},
 # С 6.12.-10.12.2010
-'r_from_shortdate_dash_date': {'pattern': [{"LEMMA": 'с'}, {"TEXT": {"REGEX": r'^{}.{}$'.format(day,month)}}, {"TEXT": {"IN": ["–", "-"]}}, {"TEXT": {"REGEX": date}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_from_shortdate_dash_date': {'pattern': [{"LEMMA": 'с'}, shape("day_sep_month"), {"TEXT": {"IN": ["–", "-"]}}, shape("date"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [strptime('{}.{}'.format(ent[1].text, ent[3].text[-4:]), '%d.%m.%Y'), strptime(ent[3].text, '%d.%m.%Y')], 
               'uncertain': delta_day,
               'form': trapezoid,
               'stamp': 2},
 # # С 1.12-21.12.10 года
-'r_from_shortdate_dash_date_b': {'pattern': [{"LEMMA": 'с'}, {"TEXT": {"REGEX": r'^{}.{}$'.format(day,month)}}, {"TEXT": {"IN": ["–", "-"]}}, {"TEXT": {"REGEX": shortdate}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_from_shortdate_dash_date_b': {'pattern': [{"LEMMA": 'с'}, shape("day_sep_month"), {"TEXT": {"IN": ["–", "-"]}}, shape("shortdate"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: [strptime('{}.{}'.format(ent[1].text, ent[3].text[-2:]), '%d.%m.%y'), strptime(ent[3].text, '%d.%m.%y')], 
               'uncertain': delta_day,
               'form': trapezoid,
               'stamp': 2},
 # 1976 - 1978 гг
-'r_yead4d_dash_year4d_year': {'pattern': [{"TEXT": {"REGEX": yearfull}}, {"TEXT": {"IN": ["–", "-"]}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год'}], 
+'r_yead4d_dash_year4d_year': {'pattern': [shape("year"), {"TEXT": {"IN": ["–", "-"]}}, shape("year"), {"LEMMA": 'год'}], 
               'norm': lambda ent: [strptime('01.07.{}'.format(ent[0].text), '%d.%m.%Y'), strptime('01.07.{}'.format(ent[2].text), '%d.%m.%Y')], 
               'uncertain': delta_year,
               'form': trapezoid,
               'stamp': 2},
 # с 1976 - 1978 гг
-'r_from_yead4d_dash_year4d_year': {'pattern': [{"LEMMA": 'с'}, {"TEXT": {"REGEX": yearfull}}, {"TEXT": {"IN": ["–", "-"]}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год'}], 
+'r_from_yead4d_dash_year4d_year': {'pattern': [{"LEMMA": 'с'}, shape("year"), {"TEXT": {"IN": ["–", "-"]}}, shape("year"), {"LEMMA": 'год'}], 
               'norm': lambda ent: [strptime('01.07.{}'.format(ent[1].text), '%d.%m.%Y'), ent.doc._.date], 
               'uncertain': [delta_year, relativedelta(days=0)],
               'form': trapezoid,
               'stamp': 2},
 # с марта по апрель 2010 года
-'r_from_month_till_month_year4d_year': {'pattern': [{"LEMMA": 'с'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": 'по'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год'}], 
+'r_from_month_till_month_year4d_year': {'pattern': [{"LEMMA": 'с'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": 'по'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, shape("year"), {"LEMMA": 'год'}], 
               'norm': lambda ent: [strptime(MONTHS[ent[1].lemma_]+ent[4].text, '%d.%m.%Y'), strptime(MONTHS[ent[3].lemma_]+ent[4].text, '%d.%m.%Y')], 
               'uncertain': delta_month,
               'form': trapezoid,
               'stamp': 2},
 # С декабря 2009 по май 2010 года
-'r_from_month_year4d_till_month_year4d_year': {'pattern': [{"LEMMA": 'с'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"TEXT": 'по'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год'}], 
+'r_from_month_year4d_till_month_year4d_year': {'pattern': [{"LEMMA": 'с'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, shape("year"), {"TEXT": 'по'}, {"LEMMA": {"IN": list(MONTHS.keys())}}, shape("year"), {"LEMMA": 'год'}], 
               'norm': lambda ent: [strptime('{}{}'.format(MONTHS[ent[1].lemma_],ent[2].text), '%d.%m.%Y'), strptime('{}{}'.format(MONTHS[ent[4].lemma_],ent[5].text), '%d.%m.%Y')], 
               'uncertain': delta_month,
               'form': trapezoid,
@@ -1299,7 +1341,7 @@ rules = {
               'form': trapezoid,
               'stamp': 2},
 # последние 3-4 дня
-'r_last_range_unit': {'pattern': [{"LEMMA": "последний"}, {"TEXT": {"REGEX": range_r}}, {"LEMMA": {"IN": unit}}], 
+'r_last_range_unit': {'pattern': [{"LEMMA": "последний"}, shape("range"), {"LEMMA": {"IN": unit}}], 
               'norm': lambda ent: [ent.doc._.date-delta_dict[ent[2].lemma_]*int(ent[1].lemma_[2]), ent.doc._.date], 
               'uncertain': lambda ent: [delta_dict[ent[2].lemma_], relativedelta(days=0)],
               'form': trapezoid,
@@ -1323,7 +1365,7 @@ rules = {
               'form': trapezoid,
               'stamp': 2},
 # лет 7-8
-'r_unit_range': {'pattern': [{"TEXT": "лет"}, {"TEXT": {"REGEX": range_r}}],
+'r_unit_range': {'pattern': [{"TEXT": "лет"}, shape("range")],
               'norm': lambda ent: [ent.doc._.date-relativedelta(**{relative_dict[ent[0].lemma_]:int(ent[1].text[0])}), ent.doc._.date], 
               'uncertain': lambda ent: [delta_dict[ent[0].lemma_]*1, relativedelta(days=0)],
               'form': trapezoid,
@@ -1365,7 +1407,7 @@ rules = {
               'form': trapezoid,
               'stamp': 2},
 # 3 года
-'r_int_year': {'pattern': [{"TEXT": {"REGEX": r'^\d$'}}, {"TEXT": {"IN": ['года', 'лет']}}],
+'r_int_year': {'pattern': [shape("digit"), {"TEXT": {"IN": ['года', 'лет']}}],
               'norm': lambda ent: [ent.doc._.date-relativedelta(**{relative_dict[ent[1].lemma_]:int(ent[0].text)}), ent.doc._.date], 
               'uncertain': lambda ent: [delta_year, relativedelta(days=0)],
               'form': trapezoid,
@@ -1403,43 +1445,43 @@ rules = {
               'form': [None],
               'stamp': 3},
 # 'до 1 раз в 3-4 дня'
-'r_prep_int_times_in_range_unit': {'pattern': [{"LEMMA": {"IN": ["до", "около"]}}, {"_": {"is_digit": True}}, {"TEXT": {"IN": ["раза", "раз", "р"]}}, {"TEXT": "в"}, {"TEXT": {"REGEX": range_r}}, {"LEMMA": {"IN": time_unit}}], 
+'r_prep_int_times_in_range_unit': {'pattern': [{"LEMMA": {"IN": ["до", "около"]}}, {"_": {"is_digit": True}}, {"TEXT": {"IN": ["раза", "раз", "р"]}}, {"TEXT": "в"}, shape("range"), {"LEMMA": {"IN": time_unit}}], 
               'norm': lambda ent: None, 
               'uncertain': None,
               'form': [None],
               'stamp': 3},
 # '1 раз в 3-4 дня'
-'r_int_times_in_range_unit': {'pattern': [{"_": {"is_digit": True}}, {"TEXT": {"IN": ["раза", "раз", "р"]}}, {"TEXT": "в"}, {"TEXT": {"REGEX": range_r}}, {"LEMMA": {"IN": time_unit}}], 
+'r_int_times_in_range_unit': {'pattern': [{"_": {"is_digit": True}}, {"TEXT": {"IN": ["раза", "раз", "р"]}}, {"TEXT": "в"}, shape("range"), {"LEMMA": {"IN": time_unit}}], 
               'norm': lambda ent: None, 
               'uncertain': None,
               'form': [None],
               'stamp': 3},
 # 'один раз в 3-4 дня'
-'r_num_times_in_range_unit': {'pattern': [{"LEMMA": {"IN": list(digit1d.keys())}}, {"TEXT": {"IN": ["раза", "раз", "р"]}}, {"TEXT": "в"}, {"TEXT": {"REGEX": range_r}}, {"LEMMA": {"IN": time_unit}}], 
+'r_num_times_in_range_unit': {'pattern': [{"LEMMA": {"IN": list(digit1d.keys())}}, {"TEXT": {"IN": ["раза", "раз", "р"]}}, {"TEXT": "в"}, shape("range"), {"LEMMA": {"IN": time_unit}}], 
               'norm': lambda ent: None, 
               'uncertain': None,
               'form': [None],
               'stamp': 3},
 # '1-2 раз в мес'
-'r_range_times_in_unit': {'pattern': [{"TEXT": {"REGEX": range_r}}, {"TEXT": {"IN": ["раза", "раз", "р"]}}, {"TEXT": "в"}, {"LEMMA": {"IN": time_unit}}], 
+'r_range_times_in_unit': {'pattern': [shape("range"), {"TEXT": {"IN": ["раза", "раз", "р"]}}, {"TEXT": "в"}, {"LEMMA": {"IN": time_unit}}], 
               'norm': lambda ent: None, 
               'uncertain': None,
               'form': [None],
               'stamp': 3},
 # 2-3 в месяц
-'r_range_in_unit': {'pattern': [{"TEXT": {"REGEX": range_r}}, {"TEXT": "в"}, {"LEMMA": {"IN": unit}}], 
+'r_range_in_unit': {'pattern': [shape("range"), {"TEXT": "в"}, {"LEMMA": {"IN": unit}}], 
               'norm': lambda ent: None, 
               'uncertain': None,
               'form': [None],
               'stamp': 3},
 # '1-2 раз в 6 мес'
-'r_range_times_in_int_unit': {'pattern': [{"TEXT": {"REGEX": range_r}}, {"TEXT": {"IN": ["раза", "раз", "р"]}}, {"TEXT": "в"}, {"_": {"is_digit": True}}, {"LEMMA": {"IN": time_unit}}], 
+'r_range_times_in_int_unit': {'pattern': [shape("range"), {"TEXT": {"IN": ["раза", "раз", "р"]}}, {"TEXT": "в"}, {"_": {"is_digit": True}}, {"LEMMA": {"IN": time_unit}}], 
               'norm': lambda ent: None, 
               'uncertain': None,
               'form': [None],
               'stamp': 3},
 # '1-2 раз в шесть мес'
-'r_range_times_in__numunit': {'pattern': [{"TEXT": {"REGEX": range_r}}, {"TEXT": {"IN": ["раза", "раз", "р"]}}, {"TEXT": "в"}, {"LEMMA": {"IN": list(digit1d.keys())}}, {"LEMMA": {"IN": time_unit}}], 
+'r_range_times_in__numunit': {'pattern': [shape("range"), {"TEXT": {"IN": ["раза", "раз", "р"]}}, {"TEXT": "в"}, {"LEMMA": {"IN": list(digit1d.keys())}}, {"LEMMA": {"IN": time_unit}}], 
               'norm': lambda ent: None, 
               'uncertain': None,
               'form': [None],
@@ -1549,25 +1591,25 @@ rules = {
               'form': [None],
               'stamp': 1},
 # в пятницу, 13 октября
-'r_in_weekday_sep_day_month': {'pattern': [{"LEMMA": "в"}, {"LEMMA": {"IN": weekday}}, {"TEXT": ","}, {"TEXT": {"REGEX": r'^\d$|^\d\d$'}}, {"LEMMA": {"IN": list(MONTHS.keys())}}], 
+'r_in_weekday_sep_day_month': {'pattern': [{"LEMMA": "в"}, {"LEMMA": {"IN": weekday}}, {"TEXT": ","}, shape("digits12"), {"LEMMA": {"IN": list(MONTHS.keys())}}], 
               'norm': lambda ent: strptime('{}{}{}'.format(ent[3].text, MONTHS[ent[4].lemma_][2:], ent.doc._.date.year), '%d.%m.%Y'), 
               'uncertain': delta_day,
               'form': triangle,
               'stamp': 1},
 # в пятницу, 13 октября 2009 года
-'r_in_weekday_sep_day_month_year': {'pattern': [{"LEMMA": "в"}, {"LEMMA": {"IN": weekday}}, {"TEXT": ","}, {"TEXT": {"REGEX": r'^\d$|^\d\d$'}}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_in_weekday_sep_day_month_year': {'pattern': [{"LEMMA": "в"}, {"LEMMA": {"IN": weekday}}, {"TEXT": ","}, shape("digits12"), {"LEMMA": {"IN": list(MONTHS.keys())}}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{}{}{}'.format(ent[3].text, MONTHS[ent[4].lemma_][2:], ent[5].text), '%d.%m.%Y'), 
               'uncertain': delta_day,
               'form': triangle,
               'stamp': 1},
 # в пятницу 13 октября
-'r_in_weekday_day_month': {'pattern': [{"LEMMA": "в"}, {"LEMMA": {"IN": weekday}}, {"TEXT": {"REGEX": r'^\d$|^\d\d$'}}, {"LEMMA": {"IN": list(MONTHS.keys())}}], 
+'r_in_weekday_day_month': {'pattern': [{"LEMMA": "в"}, {"LEMMA": {"IN": weekday}}, shape("digits12"), {"LEMMA": {"IN": list(MONTHS.keys())}}], 
               'norm': lambda ent: strptime('{}{}{}'.format(ent[2].text, MONTHS[ent[3].lemma_][2:], ent.doc._.date.year), '%d.%m.%Y'), 
               'uncertain': delta_day,
               'form': triangle,
               'stamp': 1},
 # в пятницу 13 октября 2009 года
-'r_in_weekday_day_month_year': {'pattern': [{"LEMMA": "в"}, {"LEMMA": {"IN": weekday}}, {"TEXT": {"REGEX": r'^\d$|^\d\d$'}}, {"LEMMA": {"IN": list(MONTHS.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"LEMMA": 'год', "OP": "?"}], 
+'r_in_weekday_day_month_year': {'pattern': [{"LEMMA": "в"}, {"LEMMA": {"IN": weekday}}, shape("digits12"), {"LEMMA": {"IN": list(MONTHS.keys())}}, shape("year"), {"LEMMA": 'год', "OP": "?"}], 
               'norm': lambda ent: strptime('{}{}{}'.format(ent[2].text, MONTHS[ent[3].lemma_][2:], ent[4].text), '%d.%m.%Y'), 
               'uncertain': delta_day,
               'form': triangle,
@@ -1581,13 +1623,13 @@ rules = {
               'form': trapezoid,
               'stamp': 2},
     
-'r_from_time': {'pattern': [{"LEMMA": 'с'}, {"TEXT": {"REGEX": time}}], 
+'r_from_time': {'pattern': [{"LEMMA": 'с'}, shape("time")], 
               'norm': lambda ent: None, 
               'uncertain': None,
               'form': [None],
               'stamp': 2},
 # В 9.00
-'r_in_time': {'pattern': [{"LEMMA": 'в'}, {"TEXT": {"REGEX": time}}], 
+'r_in_time': {'pattern': [{"LEMMA": 'в'}, shape("time")], 
               'norm': lambda ent: None, 
               'uncertain': None,
               'form': [None],
@@ -1601,7 +1643,7 @@ rules = {
 
 ########## OTHER RULES ##########
 # в конце 2009 , начале 2010
-'r_in_part_year4d_part_year4d': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": {"IN": list(YEAR_PART.keys())}}, {"TEXT": {"REGEX": yearfull}}, {"TEXT": ','}, {"LEMMA": {"IN": list(YEAR_PART.keys())}}, {"TEXT": {"REGEX": yearfull}}],
+'r_in_part_year4d_part_year4d': {'pattern': [{"LEMMA": 'в'}, {"LEMMA": {"IN": list(YEAR_PART.keys())}}, shape("year"), {"TEXT": ','}, {"LEMMA": {"IN": list(YEAR_PART.keys())}}, shape("year")],
               'norm': lambda ent: strptime('{}{}'.format(YEAR_PART[ent[4].lemma_], ent[5].text), '%d.%m.%Y'), 
               'uncertain': relativedelta(days=45),
               'form': triangle,
@@ -0,0 +1,981 @@
+"""
+Benchmarks of processing stages on the project datasets.
+Run from the project root, for example:
+
+    python benchmarks.py batching
+"""
+import re
+import subprocess
+import time
+import sys
+
+import pandas as pd
+
+
+def measure(func, *args, **kwargs):
+    """
+    Measure wall time of a single call.
+    Parameters
+    ----------
+    func : callable
+        Benchmarked function.
+
+    Returns
+    -------
+    seconds : float
+        Time of the call.
+    result : object
+        Result of the call.
+    """
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def load_sentences(path='data/train_time.csv', column='sentence', limit=None):
+    """
+    Load sentences from dataset.
+    Parameters
+    ----------
+    path : str, (default='data/train_time.csv')
+        Path to the dataset.
+    column : str, (default='sentence')
+        Column with sentences.
+    limit : int, (default=None)
+        Maximum number of sentences.
+
+    Returns
+    -------
+    sentences : list
+        List of sentences.
+    """
+    sentences = pd.read_csv(path)[column].fillna('').tolist()
+    return sentences[:limit]
+
+
+def benchmark_batching(parser=None, path='data/train_time.csv', limit=None, batch=3, batch_tokens=(64, 128, 256)):
+    """
+    Compare fixed batches with length-bucketed token budget batches.
+    Parameters
+    ----------
+    parser : Parser, (default=None)
+        Syntax parser, a new one is created if None. Its cache is not used during the benchmark.
+    path : str, (default='data/train_time.csv')
+        Path to the dataset.
+    limit : int, (default=None)
+        Maximum number of sentences.
+    batch : int, (default=3)
+        Size of fixed batches.
+    batch_tokens : tuple, (default=(64, 128, 256))
+        Token budgets to compare.
+
+    Returns
+    -------
+    result : Pandas DataFrame
+        Time and sentences per second of every batching mode.
+    """
+    if parser is None:
+        from syntax.parser import Parser
+        parser = Parser()
+    sentences = load_sentences(path, limit=limit)
+
+    cache, parser.cache = parser.cache, None
+    rows = []
+    try:
+        modes = [('batch={}'.format(batch), dict(batch=batch))]
+        modes += [('batch_tokens={}'.format(tokens), dict(batch_tokens=tokens)) for tokens in batch_tokens]
+        for mode, kwargs in modes:
+            seconds, _ = measure(parser.parse, list(sentences), **kwargs)
+            rows.append({'mode': mode, 'seconds': seconds, 'sentences/sec': len(sentences) / seconds})
+    finally:
+        parser.cache = cache
+
+    return pd.DataFrame(rows)
+
+
+def benchmark_pool(path='data/train_time.csv', limit=200, processes=(2, 4), batch=3):
+    """
+    Compare parsing in one process with parsing through ParserPool.
+    Parameters
+    ----------
+    path : str, (default='data/train_time.csv')
+        Path to the dataset.
+    limit : int, (default=200)
+        Maximum number of sentences.
+    processes : tuple, (default=(2, 4))
+        Numbers of worker processes to compare.
+    batch : int, (default=3)
+        Size of batches of the model.
+
+    Returns
+    -------
+    result : Pandas DataFrame
+        Time and sentences per second of every mode, startup of the pool is measured separately.
+    """
+    from syntax.parser import Parser, ParserPool
+    sentences = load_sentences(path, limit=limit)
+
+    parser = Parser()
+    seconds, expected = measure(parser.parse, list(sentences), batch=batch)
+    rows = [{'mode': 'Parser', 'startup': 0.0, 'seconds': seconds, 'sentences/sec': len(sentences) / seconds}]
+    for count in processes:
+        startup, pool = measure(ParserPool, count)
+        with pool:
+            # the first task waits for the models of workers
+            measure(pool.parse, list(sentences[:count]), batch=batch)
+            seconds, parsed = measure(pool.parse, list(sentences), batch=batch)
+        if parsed != expected:
+            raise AssertionError('ParserPool gives other parses than Parser')
+        rows.append({'mode': 'ParserPool({})'.format(count), 'startup': startup, 'seconds': seconds,
+                     'sentences/sec': len(sentences) / seconds})
+
+    return pd.DataFrame(rows)
+
+
+STARTUP_CODE = """
+import time
+start = time.perf_counter()
+from {module} import {name}
+imported = time.perf_counter()
+{name}({args})
+print(imported - start, time.perf_counter() - imported)
+"""
+
+
+def benchmark_startup(repeat=3, parser=True):
+    """
+    Measure import time of modules and construction time of processors in fresh interpreters.
+    Parameters
+    ----------
+    repeat : int, (default=3)
+        The total number of measurements of every object, the best one is reported.
+    parser : bool, (default=True)
+        Flag, which allows to measure construction of Parser with the model.
+
+    Returns
+    -------
+    result : Pandas DataFrame
+        Import and construction time of every object.
+    """
+    objects = [('TimeExpressions.TimeProcessor', 'TimeProcessor', ''),
+               ('negations.negations', 'Negator', ''),
+               ('syntax.parser', 'Parser', 'lazy=True')]
+    if parser:
+        objects.append(('syntax.parser', 'Parser', ''))
+
+    rows = []
+    for module, name, args in objects:
+        code = STARTUP_CODE.format(module=module, name=name, args=args)
+        runs = []
+        for _ in range(repeat):
+            output = subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE,
+                                    check=True, universal_newlines=True).stdout
+            runs.append([float(x) for x in output.split()[-2:]])
+        import_time, init_time = min(runs, key=sum)
+        rows.append({'object': '{}({})'.format(name, args), 'import': import_time, 'init': init_time})
+
+    return pd.DataFrame(rows)
+
+
+
+def reference_pre_process_sentence(sentence):
+    """
+    Original implementation of utils.pre_process_sentence with sequential uncompiled substitutions.
+    It is kept as the reference for equivalence and speed of the compiled one.
+    Parameters
+    ----------
+    sentence : str
+        Original sentence.
+
+    Returns
+    -------
+    sentence : str
+        Processed sentence.
+    """
+    day = r'(?:[12][0-9]|3[01]|0?[1-9])'
+    month = r'(?:10|11|12|0[1-9])'
+    year4d = r'(?:19[1-9][0-9]|20[0-9][0-9])'
+    year2d = r'(?:\d\d)'
+
+    day_r = r'((?:[12][0-9]|3[01]|0?[1-9]))'
+    month_r = r'((?:10|11|12|0[1-9]))'
+    year4d_r = r'((?:19[1-9][0-9]|20[1-9][0-9]))'
+    year2d_r = r'((?:\d\d))'
+    hour_r = r'((?:[01][0-9]|2[0-3]|[0-9]))'
+    minute_r = r'((?:[0-5][0-9]))'
+
+    shortdate_r = r'{}[-./,]{}[-./,]{}'.format(day_r, month_r, year2d_r)
+    date_r = r'{}[-./,]{}[-./,]{}'.format(day_r, month_r, year4d_r)
+    date_my4d_r = r'{}[.-/]{}'.format(month_r, year4d_r)
+    date_my2d_r = r'{}[.-/]{}'.format(month_r, year2d_r)
+    time_r = r'{}[-,.:-]{}'.format(hour_r, minute_r)
+
+    for i in [r"[-]+", r"[\s]+", r"[,]+", r"[.]+", r"[:]+"]:
+        sentence = re.sub(i, lambda x: x.group(0)[0], sentence)
+
+    sentence = re.sub(r"[А-Яа-я\d][-–,][А-Яа-я]", lambda x: x.group(
+        0).replace(x.group(0)[1], " "+x.group(0)[1]+" "), sentence)
+    sentence = re.sub(
+        r"[А-Яа-я]\d", lambda x: x.group(0).replace(x.group(0)[0], x.group(0)[0]+" "), sentence)
+    sentence = re.sub(
+        r"\d[А-Яа-я]", lambda x: x.group(0).replace(x.group(0)[-1], " "+x.group(0)[-1]), sentence)
+    sentence = re.sub(r"г.\w", lambda x: x.group(
+        0).replace("г.", "г "), sentence)
+    sentence = re.sub(r"- х", '', sentence)
+    sentence = re.sub(r" х ", ' ', sentence)
+    sentence = re.sub(r"- е", '', sentence)
+    sentence = re.sub(r" е ", ' ', sentence)
+    sentence = re.sub(r"(19[0-9][0-9]|20[0-9][0-9])[,]",
+                      lambda x: x.group(0).replace(',', ' , '), sentence)
+    sentence = re.sub(r"[А-Яа-я][.][А-Яа-я\d]",
+                      lambda x: x.group(0).replace('.', ' . '), sentence)
+    sentence = re.sub(r"[Пп]ациент \d+ лет",
+                      lambda x: x.group(0)[0:7], sentence)
+    sentence = re.sub(r"[Пп]ациентка \d+ лет",
+                      lambda x: x.group(0)[0:9], sentence)
+
+    sentence = re.sub(r"–", '-', sentence)
+    sentence = re.sub(r"[.]:", '. :', sentence)
+    sentence = re.sub(r"[.]-", '-', sentence)
+    sentence = re.sub(r"[.],\w", lambda x: x.group(
+        0).replace(',', ' , '), sentence)
+    sentence = re.sub(r"\d[.],", lambda x: x.group(
+        0).replace(',', ' , '), sentence)
+    sentence = re.sub(r"[.],", lambda x: x.group(
+        0).replace(',', ' , '), sentence)
+    sentence = re.sub(
+        r"\w-\s", lambda x: x.group(0).replace('- ', ' - '), sentence)
+    sentence = re.sub(
+        r"\s-\w", lambda x: x.group(0).replace(' -', ' - '), sentence)
+    sentence = re.sub(r'({}[./-]{}[.-/]{}[-])'.format(day, month,
+                                                      year4d), lambda x: x.group(0)[:-1] + ' ', sentence)
+    sentence = re.sub(r"\D,\d", lambda x: x.group(
+        0).replace(',', ' , '), sentence)
+
+    sentence = re.sub(r"\sг[.],\s", lambda x: x.group(
+        0).replace("г.,", "г ,"), sentence)
+    sentence = re.sub(r"г.[\s\w]", lambda x: x.group(
+        0).replace("г.", "г "), sentence)
+
+    sentence = re.sub(r'({}.{}).[-–]({}.{}.{})'.format(day, month, day, month, year4d),
+                      lambda x: '{} - {}'.format(x.group(1), x.group(2)), sentence)  # 6.12.-10.12.2010
+    sentence = re.sub(r'({}.{}).[-–]({}.{}.{})'.format(day, month, day, month, year2d),
+                      lambda x: '{} - {}'.format(x.group(1), x.group(2)), sentence)  # 6.12.-10.12.10
+    sentence = re.sub(r'({}.{})[-–]({}.{}.{})'.format(day, month, day, month, year4d),
+                      lambda x: '{} - {}'.format(x.group(1), x.group(2)), sentence)  # 6.12-10.12.2010
+    sentence = re.sub(r'({}.{})[-–]({}.{}.{})'.format(day, month, day, month, year2d),
+                      lambda x: '{} - {}'.format(x.group(1), x.group(2)), sentence)  # 6.12-10.12.10
+    sentence = re.sub(r'({}[./,-]{}[./,-]{})[-–]({}[./,-]{}[./,-]{})'.format(day, month, year2d, day,
+                                                                             month, year4d), lambda x: '{} - {}'.format(x.group(1), x.group(2)), sentence)  # 16.07.12-23.07.2012
+    sentence = re.sub(r'({}[./,-]{}[./,-]{})[-–]({}[./,-]{}[./,-]{})'.format(day, month, year2d, day,
+                                                                             month, year2d), lambda x: '{} - {}'.format(x.group(1), x.group(2)), sentence)  # 16.07.12-23.07.12
+    sentence = re.sub(r'({})[-–]({}[./,-]{}[./,-]{})'.format(day, day, month, year4d),
+                      lambda x: '{} - {}'.format(x.group(1), x.group(2)), sentence)  # 10-13.09.2011
+    sentence = re.sub(r'({})[-–]({}[./,-]{}[./,-]{})'.format(day, day, month, year2d),
+                      lambda x: '{} - {}'.format(x.group(1), x.group(2)), sentence)  # 10-13.09.11
+    sentence = re.sub(date_r, lambda x: '{}.{}.{}'.format(
+        x.group(1), x.group(2), x.group(3)), sentence)
+    sentence = re.sub(shortdate_r, lambda x: '{}.{}.{}'.format(
+        x.group(1), x.group(2), x.group(3)), sentence)
+    sentence = re.sub(date_my4d_r, lambda x: '{}.{}'.format(
+        x.group(1), x.group(2)), sentence)
+    sentence = re.sub(date_my2d_r, lambda x: '{}.{}'.format(
+        x.group(1), x.group(2)), sentence)
+    sentence = re.sub(time_r, lambda x: '{}.{}'.format(
+        x.group(1), x.group(2)), sentence)
+
+    if sentence[-1] != ".":
+        sentence = sentence + " ."
+    return sentence
+
+
+def benchmark_preprocessing(path='data/train_time.csv', limit=None, repeat=3):
+    """
+    Check that compiled pre_process_sentence gives the same results as the reference implementation
+    and compare their speed.
+    Parameters
+    ----------
+    path : str, (default='data/train_time.csv')
+        Path to the dataset.
+    limit : int, (default=None)
+        Maximum number of sentences.
+    repeat : int, (default=3)
+        The total number of measurements, the best one is reported.
+
+    Returns
+    -------
+    result : Pandas DataFrame
+        Time and sentences per second of every implementation.
+    """
+    from utils import pre_process_sentence, apply_pre_process_steps, pre_process_cache
+
+    sentences = [sent for sent in load_sentences(path, limit=limit) if sent]
+    for sent in sentences:
+        expected, result = reference_pre_process_sentence(sent), apply_pre_process_steps(sent)
+        if expected != result:
+            raise AssertionError('{!r} is preprocessed to {!r} instead of {!r}'.format(sent, result, expected))
+
+    def run(func):
+        # the memoized function starts every run with an empty cache
+        pre_process_cache.clear()
+        return [func(sent) for sent in sentences]
+
+    rows = []
+    for name, func in [('reference', reference_pre_process_sentence), ('compiled', apply_pre_process_steps),
+                       ('memoized', pre_process_sentence)]:
+        seconds = min(measure(run, func)[0] for _ in range(repeat))
+        rows.append({'implementation': name, 'seconds': seconds, 'sentences/sec': len(sentences) / seconds})
+    rows[-1].update(pre_process_cache.info())
+
+    return pd.DataFrame(rows)
+
+
+def reference_doc_from_conllu(vocab, lines):
+    """
+    Original implementation of utils.doc_from_conllu, which sets attributes and heads token by token.
+    It is kept as the reference for equivalence and speed of the bulk one.
+    Parameters
+    ----------
+    vocab : Spacy vocab
+        Spacy model vocabulary.
+    lines : list
+        Sentence in CONLL-U.
+
+    Returns
+    -------
+    result : Spacy doc
+    """
+    from spacy.tokens import Doc
+
+    words, spaces, tags, poses, lemmas, heads, deps = [], [], [], [], [], [], []
+    for line in lines:
+        id_, word, lemma, pos, tag, morph, head, dep, _1, misc = line.split("\t")
+        if "." in id_ or "-" in id_:
+            continue
+        spaces.append("SpaceAfter=No" not in misc)
+        id_ = int(id_) - 1
+        heads.append((int(head) - 1) if head not in ("0", "_") else id_)
+        tags.append(pos if tag == "_" else tag)
+        deps.append("ROOT" if dep == "root" else dep)
+        words.append(word)
+        lemmas.append(lemma)
+        poses.append(pos)
+
+    doc = Doc(vocab, words=words, spaces=spaces)
+    for i in range(len(doc)):
+        doc[i].tag_ = tags[i]
+        doc[i].pos_ = poses[i]
+        doc[i].dep_ = deps[i]
+        doc[i].lemma_ = lemmas[i]
+        doc[i].head = doc[heads[i]]
+    doc.is_parsed = True
+    doc.is_tagged = True
+    return doc
+
+
+def doc_signature(doc):
+    """
+    Get attributes and dependency tree of doc for comparison.
+    """
+    return [(token.text, token.whitespace_, token.tag_, token.pos_, token.dep_, token.lemma_, token.head.i,
+             [child.i for child in token.children], token.left_edge.i, token.right_edge.i, token.is_sent_start)
+            for token in doc]
+
+
+def benchmark_doc_construction(parser=None, path='data/train_time.csv', limit=None, repeat=3):
+    """
+    Check that utils.doc_from_conllu builds the same docs as the reference implementation
+    and compare their speed.
+    Parameters
+    ----------
+    parser : Parser, ConllParser, (default=None)
+        Syntax parser, which gives CONLL-U of the sentences, a new Parser is created if None.
+    path : str, (default='data/train_time.csv')
+        Path to the dataset.
+    limit : int, (default=None)
+        Maximum number of sentences.
+    repeat : int, (default=3)
+        The total number of measurements, the best one is reported.
+
+    Returns
+    -------
+    result : Pandas DataFrame
+        Time and docs per second of every implementation.
+    """
+    from utils import doc_from_conllu, blank_vocab
+
+    if parser is None:
+        from syntax.parser import Parser
+        parser = Parser()
+    parses = [parse.split("\n") for parse in parser.parse(load_sentences(path, limit=limit))]
+
+    vocab = blank_vocab()
+    for lines in parses:
+        expected, result = reference_doc_from_conllu(vocab, lines), doc_from_conllu(vocab, lines)
+        if doc_signature(expected) != doc_signature(result):
+            raise AssertionError('Doc of {!r} differs from the reference one'.format(expected.text))
+
+    def run(func):
+        vocab = blank_vocab()
+        return [func(vocab, lines) for lines in parses]
+
+    rows = []
+    for name, func in [('reference', reference_doc_from_conllu), ('bulk', doc_from_conllu)]:
+        seconds = min(measure(run, func)[0] for _ in range(repeat))
+        rows.append({'implementation': name, 'seconds': seconds, 'docs/sec': len(parses) / seconds})
+
+    return pd.DataFrame(rows)
+
+
+def benchmark_combined(parser=None, path='data/test_time.csv', limit=None, repeat=3):
+    """
+    Compare separate TimeProcessor and Negator with ClinicalProcessor, which makes one doc
+    and one matching pass per sentence. Found spans are checked to be the same.
+    Parameters
+    ----------
+    parser : Parser, ConllParser, (default=None)
+        Syntax parser, a new Parser is created if None. Sentences are parsed once before measurements.
+    path : str, (default='data/test_time.csv')
+        Path to the dataset with sentence, date and birthday columns.
+    limit : int, (default=None)
+        Maximum number of sentences.
+    repeat : int, (default=3)
+        The total number of measurements, the best one is reported.
+
+    Returns
+    -------
+    result : Pandas DataFrame
+        Time and sentences per second of both modes.
+    """
+    from TimeExpressions.TimeProcessor import TimeProcessor
+    from negations.negations import Negator
+    from clinical import ClinicalProcessor
+
+    if parser is None:
+        from syntax.parser import Parser
+        parser = Parser()
+    df = pd.read_csv(path)[:limit]
+    parses = parser.parse(df.sentence.fillna('').tolist())
+    date = df.date.tolist()
+    birthday = df.birthday.where(df.birthday.notna(), None).tolist()
+
+    time_processor, negator, clinical = TimeProcessor(), Negator(), ClinicalProcessor()
+
+    def separate():
+        return (time_processor.process(parsed_sentences=parses, date=date, birthday=birthday),
+                negator.process(parsed_sentences=parses))
+
+    def combined():
+        return clinical.process(parsed_sentences=parses, date=date, birthday=birthday)
+
+    spans = lambda ents: [(ent.start, ent.end, ent.label_, ent.ent_id_) for ent in ents]
+    time_docs, negation_docs = separate()
+    docs = combined()
+    if ([spans(doc.ents) for doc in time_docs] != [spans(doc.ents) for doc in docs]
+            or [spans(doc.ents) for doc in negation_docs] != [spans(doc._.negations) for doc in docs]):
+        raise AssertionError('ClinicalProcessor finds other spans than TimeProcessor and Negator')
+
+    rows = []
+    for name, func in [('separate', separate), ('combined', combined)]:
+        seconds = min(measure(func)[0] for _ in range(repeat))
+        rows.append({'mode': name, 'seconds': seconds, 'sentences/sec': len(parses) / seconds})
+
+    return pd.DataFrame(rows)
+
+
+def benchmark_negation_scopes(parser=None, path='data/test_neg.csv', column='sentences', limit=None):
+    """
+    Measure computation of negated expressions and entities of negations, which are computed once per span.
+    The first conversion to dataframe computes them, the repeated one reads the stored values.
+    Parameters
+    ----------
+    parser : Parser, ConllParser, (default=None)
+        Syntax parser, a new Parser is created if None. Sentences are parsed once before measurements.
+    path : str, (default='data/test_neg.csv')
+        Path to the dataset.
+    column : str, (default='sentences')
+        Column with sentences.
+    limit : int, (default=None)
+        Maximum number of sentences.
+
+    Returns
+    -------
+    result : Pandas DataFrame
+        Time, computed and reused attributes of every stage.
+    """
+    from negations.negations import Negator
+
+    if parser is None:
+        from syntax.parser import Parser
+        parser = Parser()
+    parses = parser.parse(load_sentences(path, column=column, limit=limit))
+
+    rows = []
+    for eager in [False, True]:
+        negator = Negator()
+        stages = [('process', lambda: negator.process(parsed_sentences=parses, eager=eager))]
+        stages += [('dataframe', lambda: negator.convert_to_dataframe(docs)),
+                   ('repeated dataframe', lambda: negator.convert_to_dataframe(docs))]
+        for stage, func in stages:
+            before = negator.stats.copy()
+            seconds, result = measure(func)
+            if stage == 'process':
+                docs = result
+            row = {'eager': eager, 'stage': stage, 'seconds': seconds}
+            for name in ['neg_expr_computed', 'neg_expr_reused', 'neg_ent_computed', 'neg_ent_reused']:
+                row[name] = negator.stats[name] - before[name]
+            rows.append(row)
+
+    return pd.DataFrame(rows)
+
+
+def benchmark_prefilter(parser=None, paths=('data/test_time.csv', 'data/test_neg.csv'), limit=None, repeat=3):
+    """
+    Compare processing of all sentences with skipping of sentences without triggers of rules,
+    which are found by TriggerIndex before construction of docs. Found spans are checked to be the same.
+    Parameters
+    ----------
+    parser : Parser, ConllParser, (default=None)
+        Syntax parser, a new Parser is created if None. Sentences are parsed once before measurements.
+    paths : tuple, (default=('data/test_time.csv', 'data/test_neg.csv'))
+        Paths to the datasets with sentences in column sentence or sentences.
+    limit : int, (default=None)
+        Maximum number of sentences of every dataset.
+    repeat : int, (default=3)
+        The total number of measurements, the best one is reported.
+
+    Returns
+    -------
+    result : Pandas DataFrame
+        Time, sentences per second and share of skipped sentences of every processor and dataset.
+    """
+    from TimeExpressions.TimeProcessor import TimeProcessor
+    from negations.negations import Negator
+    from clinical import ClinicalProcessor
+
+    if parser is None:
+        from syntax.parser import Parser
+        parser = Parser()
+
+    spans = lambda ents: [(ent.start, ent.end, ent.label_, ent.ent_id_) for ent in ents]
+    rows = []
+    for path in paths:
+        df = pd.read_csv(path)[:limit]
+        parses = parser.parse(df['sentence' if 'sentence' in df else 'sentences'].fillna('').tolist())
+        processors = [('time', TimeProcessor(), lambda doc: spans(doc.ents)),
+                      ('negations', Negator(), lambda doc: spans(doc.ents)),
+                      ('clinical', ClinicalProcessor(), lambda doc: spans(doc.ents) + spans(doc._.negations))]
+        for name, processor, found in processors:
+            process = lambda prefilter: processor.process(parsed_sentences=parses, dedup=False, prefilter=prefilter)
+            if [found(doc) for doc in process(False)] != [found(doc) for doc in process(True)]:
+                raise AssertionError('{} finds other spans with prefilter'.format(name))
+            for prefilter in [False, True]:
+                seconds = min(measure(process, prefilter)[0] for _ in range(repeat))
+                processor.stats.clear()
+                process(prefilter)
+                rows.append({'path': path, 'processor': name, 'prefilter': prefilter, 'seconds': seconds,
+                             'sentences/sec': len(parses) / seconds,
+                             'skipped': processor.stats['skipped'] / max(processor.stats['sentences'], 1)})
+
+    return pd.DataFrame(rows)
+
+
+def benchmark_dispatch(parser=None, path='data/train_time.csv', limit=None, repeat=3):
+    """
+    Compare spacy EntityRuler with DispatchRuler on time patterns, which starts states of patterns only
+    at tokens found by the index of their first tokens. Matches and entities are checked to be the same.
+    Parameters
+    ----------
+    parser : Parser, ConllParser, (default=None)
+        Syntax parser, a new Parser is created if None. Sentences are parsed once before measurements.
+    path : str, (default='data/train_time.csv')
+        Path to the dataset.
+    limit : int, (default=None)
+        Maximum number of sentences.
+    repeat : int, (default=3)
+        The total number of measurements, the best one is reported.
+
+    Returns
+    -------
+    result : Pandas DataFrame
+        Time, sentences per second and started states of patterns per token of both rulers.
+    """
+    from spacy.language import Language
+    from spacy.pipeline import EntityRuler
+    from TimeExpressions import time_patterns
+    from TimeExpressions.dispatch import DispatchRuler
+    from utils import parsed_doc, blank_vocab
+
+    if parser is None:
+        from syntax.parser import Parser
+        parser = Parser()
+    nlp = Language(blank_vocab())
+    docs = [parsed_doc(nlp.vocab, parse) for parse in parser.parse(load_sentences(path, limit=limit)) if parse]
+    patterns = [{"label": 'EXPR', "pattern": rule['pattern'], "id": name} for name, rule in time_patterns.rules.items()]
+
+    rulers = []
+    for name, cls in [('EntityRuler', EntityRuler), ('DispatchRuler', DispatchRuler)]:
+        ruler = cls(nlp)
+        ruler.add_patterns(patterns)
+        rulers.append((name, ruler))
+    spacy_ruler, dispatch_ruler = rulers[0][1], rulers[1][1]
+    for doc in docs:
+        if spacy_ruler.matcher(doc) != dispatch_ruler.matcher(doc):
+            raise AssertionError('DispatchMatcher finds other matches than Matcher')
+        doc.ents = []
+        expected = [(ent.start, ent.end, ent.label_, ent.ent_id_) for ent in spacy_ruler(doc).ents]
+        doc.ents = []
+        if expected != [(ent.start, ent.end, ent.label_, ent.ent_id_) for ent in dispatch_ruler(doc).ents]:
+            raise AssertionError('DispatchRuler sets other entities than EntityRuler')
+
+    def run(ruler):
+        for doc in docs:
+            doc.ents = []
+            ruler(doc)
+
+    rows = []
+    for name, ruler in rulers:
+        seconds = min(measure(run, ruler)[0] for _ in range(repeat))
+        row = {'ruler': name, 'seconds': seconds, 'sentences/sec': len(docs) / seconds}
+        if name == 'DispatchRuler':
+            stats = ruler.matcher.stats
+            row['candidates/token'] = stats['candidates'] / max(stats['tokens'], 1)
+        else:
+            row['candidates/token'] = len(patterns)
+        rows.append(row)
+
+    return pd.DataFrame(rows)
+
+
+def benchmark_shapes(parser=None, path='data/test_time.csv', limit=None, repeat=3):
+    """
+    Compare time patterns, which check shapes of words (_ time_shape), with the same patterns,
+    which check regular expressions of shapes (TEXT REGEX), on DispatchRuler.
+    Matches and entities are checked to be the same.
+    Parameters
+    ----------
+    parser : Parser, ConllParser, (default=None)
+        Syntax parser, a new Parser is created if None. Sentences are parsed once before measurements.
+    path : str, (default='data/test_time.csv')
+        Path to the dataset.
+    limit : int, (default=None)
+        Maximum number of sentences.
+    repeat : int, (default=3)
+        The total number of measurements, the best one is reported.
+
+    Returns
+    -------
+    result : Pandas DataFrame
+        Time and sentences per second of both pattern sets.
+    """
+    from spacy.language import Language
+    from TimeExpressions import time_patterns
+    from TimeExpressions.dispatch import DispatchRuler
+    from utils import parsed_doc, blank_vocab
+
+    if parser is None:
+        from syntax.parser import Parser
+        parser = Parser()
+    nlp = Language(blank_vocab())
+    docs = [parsed_doc(nlp.vocab, parse) for parse in parser.parse(load_sentences(path, limit=limit)) if parse]
+
+    specs = {repr(time_patterns.shape(name)): {"TEXT": {"REGEX": regex}} for name, regex in time_patterns.shapes.items()}
+    shape_patterns = [{"label": 'EXPR', "pattern": rule['pattern'], "id": name}
+                      for name, rule in time_patterns.rules.items()]
+    regex_patterns = [{"label": 'EXPR', "pattern": [specs.get(repr(spec), spec) for spec in rule['pattern']], "id": name}
+                      for name, rule in time_patterns.rules.items()]
+
+    rulers = []
+    for name, patterns in [('regex', regex_patterns), ('shapes', shape_patterns)]:
+        ruler = DispatchRuler(nlp)
+        ruler.add_patterns(patterns)
+        rulers.append((name, ruler))
+    regex_ruler, shape_ruler = rulers[0][1], rulers[1][1]
+    for doc in docs:
+        if regex_ruler.matcher(doc) != shape_ruler.matcher(doc):
+            raise AssertionError('Patterns with shapes find other matches than patterns with regular expressions')
+        doc.ents = []
+        expected = [(ent.start, ent.end, ent.label_, ent.ent_id_) for ent in regex_ruler(doc).ents]
+        doc.ents = []
+        if expected != [(ent.start, ent.end, ent.label_, ent.ent_id_) for ent in shape_ruler(doc).ents]:
+            raise AssertionError('Patterns with shapes set other entities than patterns with regular expressions')
+
+    def run(ruler):
+        for doc in docs:
+            doc.ents = []
+            ruler(doc)
+
+    rows = []
+    for name, ruler in rulers:
+        seconds = min(measure(run, ruler)[0] for _ in range(repeat))
+        rows.append({'patterns': name, 'seconds': seconds, 'sentences/sec': len(docs) / seconds})
+
+    return pd.DataFrame(rows)
+
+
+def benchmark_normalization(parser=None, path='data/test_time.csv', limit=None, repeat=3):
+    """
+    Compare normalization of time expressions by norm functions of rules with memoized one
+    of TimeProcessor.norm_cache. Normal forms and uncertainties are checked to be the same.
+    Parameters
+    ----------
+    parser : Parser, ConllParser, (default=None)
+        Syntax parser, a new Parser is created if None. Sentences are parsed and matched once before measurements.
+    path : str, (default='data/test_time.csv')
+        Path to the dataset.
+    limit : int, (default=None)
+        Maximum number of sentences.
+    repeat : int, (default=3)
+        The total number of measurements, the best one is reported.
+
+    Returns
+    -------
+    result : Pandas DataFrame
+        Time and sentences per second of both normalizations, statistics of the cache.
+    """
+    from TimeExpressions.TimeProcessor import TimeProcessor
+    from utils import parsed_doc
+
+    if parser is None:
+        from syntax.parser import Parser
+        parser = Parser()
+    data = pd.read_csv(path)[:limit]
+    processors = [('norm', TimeProcessor(cache_size=0)), ('memoized', TimeProcessor())]
+    vocab = processors[0][1].nlp.vocab
+    docs = []
+    for parse, date, birthday in zip(parser.parse(list(data.sentence)), data.date, data.birthday):
+        if parse:
+            time_processor = processors[0][1]
+            docs.append((time_processor.ruler(parsed_doc(vocab, parse)), time_processor.convert_date(date),
+                         time_processor.convert_birthday(birthday)))
+
+    def run(time_processor):
+        # the memoized normalization starts every run with an empty cache
+        time_processor.norm_cache.clear()
+        results = []
+        for doc, date, birthday in docs:
+            try:
+                time_processor.annotate(doc, date, birthday)
+            except Exception as error:
+                # some norm functions fail on unexpected words, e.g. strptime of wrong dates
+                results.append(repr(error))
+                continue
+            results.append([(ent.ent_id_, ent._.normal_form, ent._.uncertain) for ent in doc.ents])
+        return results
+
+    rows, results = [], []
+    for name, time_processor in processors:
+        measurements = [measure(run, time_processor) for _ in range(repeat)]
+        seconds = min(seconds for seconds, _ in measurements)
+        results.append(measurements[0][1])
+        rows.append({'normalization': name, 'seconds': seconds, 'sentences/sec': len(docs) / seconds})
+    rows[-1].update(processors[-1][1].norm_cache.info())
+    if results[0] != results[1]:
+        raise AssertionError('Memoized normalization gives other normal forms than norm functions')
+
+    return pd.DataFrame(rows)
+
+
+def reference_convert_dates(dates, birthdays):
+    """
+    Convert dates of observation and birth dates of sentences by datetime.strptime one by one,
+    as TimeProcessor did before.
+    """
+    from datetime import datetime
+
+    result = []
+    for date, birthday in zip(dates, birthdays):
+        date = datetime.strptime(date[:-3], "%Y-%m-%d %H:%M")
+        try:
+            birthday = datetime.strptime(birthday, "%Y-%m-%d")
+        except ValueError:
+            birthday = datetime.strptime(birthday[:-3], "%Y-%m-%d %H:%M")
+        result.append((date, birthday))
+    return result
+
+
+def benchmark_dates(path='data/train_time.csv', limit=None, repeat=3):
+    """
+    Compare datetime.strptime with strptime of compiled layouts on dates of observation, birth dates
+    and layout '%d.%m.%Y' of norm functions, and conversion of date columns by TimeProcessor.convert_dates,
+    which converts every distinct date once. Results are checked to be the same.
+    Parameters
+    ----------
+    path : str, (default='data/train_time.csv')
+        Path to the dataset.
+    limit : int, (default=None)
+        Maximum number of sentences.
+    repeat : int, (default=3)
+        The total number of measurements, the best one is reported.
+
+    Returns
+    -------
+    result : Pandas DataFrame
+        Time and dates per second of every conversion.
+    """
+    from datetime import datetime
+    from TimeExpressions.TimeProcessor import TimeProcessor
+    from utils import strptime
+
+    data = pd.read_csv(path)[:limit]
+    dates, birthdays = list(data.date), list(data.birthday)
+    # dates in the layout of norm functions, e.g. '14.12.2010'
+    norm_dates = ['{}.{}.{}'.format(date[8:10], date[5:7], date[:4]) for date in dates]
+    time_processor = TimeProcessor()
+
+    def run_processor(dates, birthdays):
+        converted = time_processor.convert_dates(dates, birthdays, ['sentence'] * len(dates))
+        return list(zip(*converted))
+
+    def run_rows(dates, birthdays):
+        return [(time_processor.convert_date(date), time_processor.convert_birthday(birthday))
+                for date, birthday in zip(dates, birthdays)]
+
+    def run_layout(func):
+        return [func(date, '%d.%m.%Y') for date in norm_dates]
+
+    expected = reference_convert_dates(dates, birthdays)
+    if run_rows(dates, birthdays) != expected or run_processor(dates, birthdays) != expected:
+        raise AssertionError('Dates are converted to other values than by datetime.strptime')
+    if run_layout(strptime) != run_layout(datetime.strptime):
+        raise AssertionError('strptime gives other dates than datetime.strptime')
+
+    rows = []
+    for name, func, args in [('datetime.strptime', reference_convert_dates, (dates, birthdays)),
+                             ('strptime', run_rows, (dates, birthdays)),
+                             ('convert_dates', run_processor, (dates, birthdays)),
+                             ("datetime.strptime '%d.%m.%Y'", run_layout, (datetime.strptime,)),
+                             ("strptime '%d.%m.%Y'", run_layout, (strptime,))]:
+        seconds = min(measure(func, *args)[0] for _ in range(repeat))
+        rows.append({'conversion': name, 'seconds': seconds, 'dates/sec': len(dates) / seconds})
+
+    return pd.DataFrame(rows)
+
+
+def reference_finalize(time_processor, ent):
+    """
+    Finalize time expression by lookups of dict rules of time_patterns per attribute,
+    as TimeProcessor.annotate and get_uncertain did before compiled rules.
+    """
+    rule = time_processor.rules[ent.ent_id_]
+    ent._.normal_form = rule['norm'](ent)
+    ent._.form = time_processor.rules[ent.ent_id_]['form']
+    ent._.timestamp = time_processor.rules[ent.ent_id_]['stamp']
+    r_uncertain = time_processor.rules[ent.ent_id_]['uncertain']
+    r_form = time_processor.rules[ent.ent_id_]['form']
+    norm = ent._.normal_form
+    if ent._.form in [[-1, 0, 1], [None], [-2, 0, 2]]:
+        if callable(r_uncertain):
+            ent._.uncertain = [norm + r_uncertain(ent) * i for i in r_form]
+        else:
+            ent._.uncertain = [norm + r_uncertain * i for i in r_form if i is not None]
+    elif callable(r_uncertain):
+        if type(r_uncertain(ent)) is list:
+            ent._.uncertain = [norm[0] - r_uncertain(ent)[0]] + norm + [norm[1] + r_uncertain(ent)[1]]
+        else:
+            ent._.uncertain = [norm[0] - r_uncertain(ent)] + norm + [norm[1] + r_uncertain(ent)]
+    elif type(r_uncertain) is list:
+        ent._.uncertain = [norm[0] - r_uncertain[0]] + norm + [norm[1] + r_uncertain[1]]
+    else:
+        ent._.uncertain = [norm[0] - r_uncertain] + norm + [norm[1] + r_uncertain]
+
+
+def benchmark_rule_table(parser=None, path='data/train_time.csv', limit=None, repeat=3):
+    """
+    Compare finalization of time expressions by dict rules of time_patterns with compiled rules
+    of TimeProcessor.table. Normal forms are not memoized in both cases. Forms, stamps, normal forms
+    and uncertainties are checked to be the same.
+    Parameters
+    ----------
+    parser : Parser, ConllParser, (default=None)
+        Syntax parser, a new Parser is created if None. Sentences are parsed and matched once before measurements.
+    path : str, (default='data/train_time.csv')
+        Path to the dataset.
+    limit : int, (default=None)
+        Maximum number of sentences.
+    repeat : int, (default=3)
+        The total number of measurements, the best one is reported.
+
+    Returns
+    -------
+    result : Pandas DataFrame
+        Time and entities per second of both finalizations.
+    """
+    from TimeExpressions.TimeProcessor import TimeProcessor
+    from utils import parsed_doc
+
+    if parser is None:
+        from syntax.parser import Parser
+        parser = Parser()
+    data = pd.read_csv(path)[:limit]
+    time_processor = TimeProcessor(cache_size=0)
+    vocab = time_processor.nlp.vocab
+    ents = []
+    for parse, date, birthday in zip(parser.parse(list(data.sentence)), data.date, data.birthday):
+        if parse:
+            doc = time_processor.ruler(parsed_doc(vocab, parse))
+            doc._.date = time_processor.convert_date(date)
+            doc._.birthday = time_processor.convert_birthday(birthday)
+            ents.extend(doc.ents)
+
+    def run_dict():
+        results = []
+        for ent in ents:
+            try:
+                reference_finalize(time_processor, ent)
+            except Exception as error:
+                # some norm functions fail on unexpected words, e.g. strptime of wrong dates
+                results.append(repr(error))
+                continue
+            results.append((ent._.form, ent._.timestamp, ent._.normal_form, ent._.uncertain))
+        return results
+
+    def run_table():
+        results = []
+        for ent in ents:
+            try:
+                rule = time_processor.table[ent.ent_id_]
+                norm = time_processor.normal_form(ent, rule)
+                ent._.normal_form = norm
+                ent._.form = rule.form
+                ent._.timestamp = rule.stamp
+                ent._.uncertain = rule.uncertainty(ent, norm)
+            except Exception as error:
+                results.append(repr(error))
+                continue
+            results.append((ent._.form, ent._.timestamp, ent._.normal_form, ent._.uncertain))
+        return results
+
+    rows, results = [], []
+    for name, func in [('dict rules', run_dict), ('compiled rules', run_table)]:
+        measurements = [measure(func) for _ in range(repeat)]
+        seconds = min(seconds for seconds, _ in measurements)
+        results.append(measurements[0][1])
+        rows.append({'rules': name, 'seconds': seconds, 'entities/sec': len(ents) / seconds})
+    if results[0] != results[1]:
+        raise AssertionError('Compiled rules give other results than dict rules')
+
+    return pd.DataFrame(rows)
+
+
+BENCHMARKS = {
+    'batching': benchmark_batching,
+    'pool': benchmark_pool,
+    'startup': benchmark_startup,
+    'preprocessing': benchmark_preprocessing,
+    'doc_construction': benchmark_doc_construction,
+    'combined': benchmark_combined,
+    'negation_scopes': benchmark_negation_scopes,
+    'prefilter': benchmark_prefilter,
+    'dispatch': benchmark_dispatch,
+    'shapes': benchmark_shapes,
+    'normalization': benchmark_normalization,
+    'dates': benchmark_dates,
+    'rule_table': benchmark_rule_table,
+}
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        print(name)
+        print(BENCHMARKS[name]())
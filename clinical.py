@@ -0,0 +1,226 @@
+from collections import Counter, defaultdict
+from datetime import datetime
+from spacy.tokens import Doc, Span
+from spacy.language import Language
+
+from TimeExpressions.TimeProcessor import TimeProcessor
+from TimeExpressions.dispatch import DispatchMatcher
+from negations.negations import Negator
+from negations.neg_patterns import patterns_part, patterns
+from utils import parsed_doc, plain_doc, TriggerIndex, convert_to_dataframe, blank_vocab
+
+
+def select_spans(doc, matches, labels):
+    """
+    Select non-overlapping spans among matches in the same way as EntityRuler:
+    longer matches win, then the later ones.
+    Parameters
+    ----------
+    doc : Spacy doc
+        Parsed sentence.
+    matches : list
+        List of matches (key, start, end) in the order of the matcher.
+    labels : dict
+        Labels and ids of spans by keys of matches.
+
+    Returns
+    -------
+    spans : list
+        List of selected spans in the order of the sentence.
+    """
+    matches = set([(key, start, end) for key, start, end in matches if start != end])
+    matches = sorted(matches, key=lambda m: (m[2] - m[1], m[1]), reverse=True)
+    spans = []
+    seen_tokens = set()
+    for key, start, end in matches:
+        if start not in seen_tokens and end - 1 not in seen_tokens:
+            label, ent_id = labels[key]
+            span = Span(doc, start, end, label=label)
+            if ent_id:
+                for token in span:
+                    token.ent_id_ = ent_id
+            spans.append(span)
+            seen_tokens.update(range(start, end))
+    return sorted(spans, key=lambda span: span.start)
+
+
+class ClinicalProcessor:
+    """
+    Combined processing of time expressions and negations.
+    Every sentence is converted to one doc in the shared vocabulary and the rules of both modules
+    are applied in one matching pass. Time expressions are set to doc.ents as in TimeProcessor,
+    negations are set to doc._.negations. Their attributes are the same as in TimeProcessor and Negator.
+    Parameters
+    ----------
+    normalize : bool, (default=True)
+        Flag, which allows to normalize time expressions.
+    event : bool, (default=True)
+        Flag, which allows to parse events for time expressions.
+
+    Attributes
+    ----------
+    stats : Counter
+        Counts of processed sentences ('sentences'), analysed sentences ('analysed'),
+        repeated sentences, which reused results of identical ones ('reused'),
+        and sentences without triggers of rules, which were not matched ('skipped').
+    triggers : TriggerIndex
+        Index of tokens required by time and negation patterns.
+
+    Examples
+    --------
+    >>> from clinical import ClinicalProcessor
+    >>> from syntax.parser import Parser
+    >>> processor = ClinicalProcessor()
+    >>> docs = processor.process(sentence=list(df.sentence), date=list(df.date),
+    ...                          birthday=list(df.birthday), parser=Parser())
+    >>> [(ent.text, ent._.normal_form) for ent in docs[0].ents]
+    >>> [(ent.text, ent._.neg_expr) for ent in docs[0]._.negations]
+    """
+
+    # separator of labels and ids of patterns, the same as in EntityRuler
+    ent_id_sep = "||"
+
+    def __init__(self, normalize=True, event=True):
+        # processors share the vocabulary of docs, their rules and helpers are used with the matcher
+        self.nlp = Language(blank_vocab())
+        self.time_processor = TimeProcessor(normalize=normalize, event=event, vocab=self.nlp.vocab)
+        self.negator = Negator(vocab=self.nlp.vocab)
+
+        self.matcher = DispatchMatcher(self.nlp.vocab)
+        self.time_labels = dict()
+        self.negation_labels = dict()
+        for rule in self.time_processor.rules:
+            self.add_patterns(self.time_labels, "EXPR", rule,
+                              [self.time_processor.rules[rule]['pattern']])
+        for group in [patterns_part, patterns]:
+            grouped = defaultdict(list)
+            for entry in group:
+                grouped[entry["label"]].append(entry["pattern"])
+            for label in grouped:
+                self.add_patterns(self.negation_labels, label, None, grouped[label])
+        self.triggers = TriggerIndex([self.time_processor.rules[rule]['pattern'] for rule in self.time_processor.rules]
+                                     + [entry["pattern"] for entry in patterns_part + patterns])
+
+        self.stats = Counter()
+
+        Doc.set_extension("negations", default=None, force=True)
+
+    def add_patterns(self, labels, label, ent_id, patterns):
+        """
+        Add patterns to the matcher under the same key as in EntityRuler.
+        Parameters
+        ----------
+        labels : dict
+            Labels and ids of spans by keys of matches, which is updated.
+        label : str
+            Label of spans.
+        ent_id : str, None
+            Id of spans, e.g. name of time rule.
+        patterns : list
+            List of token patterns.
+        """
+        name = label if ent_id is None else "{}{}{}".format(label, self.ent_id_sep, ent_id)
+        key = self.nlp.vocab.strings.add(name)
+        labels[key] = (label, ent_id)
+        self.matcher.add(name, patterns)
+
+    def match(self, doc):
+        """
+        Find time expressions and negations in one pass of the matcher.
+        Parameters
+        ----------
+        doc : Spacy doc
+            Parsed sentence.
+        """
+        matches = self.matcher(doc)
+        doc.ents = select_spans(doc, [m for m in matches if m[0] in self.time_labels], self.time_labels)
+        doc._.negations = select_spans(doc, [m for m in matches if m[0] in self.negation_labels],
+                                       self.negation_labels)
+
+    def process(self, parsed_sentences=None, sentence=None, parser=None, date=None, birthday=None, to_dataframe=False, save=False, dedup=True, eager=False, prefilter=False):
+        """
+        Process time expressions and negations.
+        Parameters
+        ----------
+        sentence : list, str
+            List of sentences or sentence, used if parsed_sentences is None.
+        date : list, str, datetime (default=None)
+            List of dates of observation or date in string or datetime format.
+        birthday : list, str, datetime (default=None)
+            List of birth dates or date in string or datetime format.
+        parser : object (default=None)
+            Syntax parser, used if parsed_sentences is None.
+        parsed_sentences : list (default=None)
+            List of parsed senteces, if they are already parsed in conllu format,
+            or list of docs restored by syntax.corpus.CorpusReader. Docs are processed in place, if they have
+            the vocabulary of the processor and were not processed yet, other docs are copied (see utils.parsed_doc).
+        to_dataframe : bool (default=False)
+            Flag, which allows to convert result to dataframe.
+        save : bool (default=False)
+            Flag, which allows to save result of parsing in conllu format.
+        dedup : bool (default=True)
+            Flag, which allows to analyse identical sentences with identical dates once.
+            Such sentences share one doc in the result.
+        eager : bool (default=False)
+            Flag, which allows to compute ent._.neg_expr and ent._.neg_ent for all negations during processing
+            instead of the first access.
+        prefilter : bool (default=False)
+            Flag, which allows to skip matching of sentences without triggers of time and negation patterns.
+            Docs of such sentences from CONLL-U have words only, without tags and dependency tree.
+        Returns
+        -------
+        result : list
+            List of parsed docs with time expressions in doc.ents and negations in doc._.negations.
+        """
+        docs = list()
+
+        if isinstance(sentence, str):
+            sentence = [sentence]
+            date = [date]
+            birthday = [birthday]
+
+        if parsed_sentences is None:
+            parsed_sentences = parser.parse(sentence, save=save)
+
+        now = str(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        dates = [now] * len(parsed_sentences) if date is None else date
+        birthdays = [now] * len(parsed_sentences) if birthday is None else birthday
+
+        converted_dates, converted_birthdays = self.time_processor.convert_dates(dates, birthdays, parsed_sentences)
+        processed = dict()
+        for sent in range(len(parsed_sentences)):
+            if len(parsed_sentences[sent]) == 0:
+                continue
+            self.stats['sentences'] += 1
+            if dedup:
+                key = (parsed_sentences[sent], str(dates[sent]), str(birthdays[sent]))
+                if key in processed:
+                    self.stats['reused'] += 1
+                    docs.append(processed[key])
+                    continue
+
+            if prefilter and not self.triggers.check(parsed_sentences[sent]):
+                doc = plain_doc(self.nlp.vocab, parsed_sentences[sent])
+                doc.ents = []
+                doc._.negations = []
+                self.time_processor.annotate(doc, converted_dates[sent], converted_birthdays[sent])
+                self.stats['skipped'] += 1
+            else:
+                doc = parsed_doc(self.nlp.vocab, parsed_sentences[sent])
+                self.match(doc)
+                self.time_processor.annotate(doc, converted_dates[sent], converted_birthdays[sent])
+                if eager:
+                    self.negator.compute(doc._.negations)
+                self.stats['analysed'] += 1
+            if dedup:
+                processed[key] = doc
+            docs.append(doc)
+
+        if to_dataframe == True:
+            df = convert_to_dataframe(docs)
+            negations = self.negator.convert_to_dataframe(docs, [doc._.negations for doc in docs])
+            df['neg_expr'] = negations['neg_expr'].values
+            df['neg_ent'] = negations['neg_ent'].values
+            return df
+
+        return docs
@@ -1,14 +1,14 @@
+from collections import Counter
+import time
 from spacy.pipeline import EntityRuler
 from spacy.tokens import Doc, Span
-from spacy.vocab import Vocab
 from spacy.language import Language
-import pandas as pd
 
 from negations.neg_patterns import patterns_part, patterns
 
 import sys
 sys.path.append("..")
-from utils import doc_from_conllu
+from utils import parsed_doc, plain_doc, TriggerIndex, DependencyRange, dependency_tree, doc_cache, blank_vocab
 
 # negative particles
 negations = ['не', 'нет', 'отрицать', 'отсутствовать', 'без', 'избегать', 'отказаться']
@@ -20,6 +20,21 @@ class Negator:
     This class includes methods for searching negations in sentences.
     It includes methods of splitting complex sentences.
     Results are available through attributes  ent._.neg_expr, ent._.neg_ent.
+    Parameters
+    ----------
+    vocab : Spacy vocab, (default=None)
+        Vocabulary of docs, e.g. shared with other processors. A new one is created if None.
+
+    Attributes
+    ----------
+    stats : Counter
+        Counts of processed sentences ('sentences'), analysed sentences ('analysed'),
+        repeated sentences, which reused results of identical ones ('reused'),
+        and sentences without triggers of rules, which were not matched ('skipped').
+        Counts of computed ('neg_expr_computed', 'neg_ent_computed') and reused ('neg_expr_reused',
+        'neg_ent_reused') attributes of spans and time of their computation ('neg_expr_seconds', 'neg_ent_seconds').
+    triggers : TriggerIndex
+        Index of tokens required by negation patterns.
 
     Examples
     --------
@@ -37,13 +52,16 @@ class Negator:
       'восстановлен синусовый ритм')]
     """
 
-    def __init__(self):
+    def __init__(self, vocab=None):
 
-        self.nlp = Language(Vocab())
+        self.nlp = Language(blank_vocab() if vocab is None else vocab)
         self.ruler = EntityRuler(self.nlp)
         self.ruler.add_patterns(patterns_part)
         self.ruler.add_patterns(patterns)
         self.nlp.add_pipe(self.ruler)
+        self.triggers = TriggerIndex([entry["pattern"] for entry in patterns_part + patterns])
+
+        self.stats = Counter()
 
         self.Span = Span
         self.Doc = Doc
@@ -51,9 +69,42 @@ class Negator:
         self.Span.set_extension("neg_expr", getter=self.get_negated_expressions, force=True)
         self.Span.set_extension("neg_ent", getter=self.get_negated_ent, force=True)
 
+    def cached(self, name, span, func):
+        """
+        Get attribute of span, which is computed once and stored in doc_cache of its doc.
+        Tokens of attribute are stored by their indices, so the cache does not refer to the doc.
+        Parameters
+        ----------
+        name : str
+            Name of attribute.
+        span : Spacy Span
+            Negation.
+        func : callable
+            Function, which computes attribute of span.
+
+        Returns
+        -------
+        result : object
+            Value of attribute.
+        """
+        key = (name, span.start, span.end, span.label)
+        cache = doc_cache(span.doc)
+        if key in cache:
+            self.stats[name + '_reused'] += 1
+            indices = cache[key]
+            # None marks the span itself
+            return span if indices is None else [span.doc[i] for i in indices]
+        start = time.perf_counter()
+        result = func(span)
+        self.stats[name + '_seconds'] += time.perf_counter() - start
+        self.stats[name + '_computed'] += 1
+        cache[key] = None if result is span else [token.i for token in result]
+        return result
+
     def get_negated_expressions(self, span):
         """
         Extract negated expressions from spacy doc.
+        The expression is found once per span, next calls return the stored one.
         Parameters
         ----------
         span : Spacy Span
@@ -64,6 +115,12 @@ class Negator:
         result : list
             list of negated entities.
         """
+        return self.cached("neg_expr", span, self.negated_expressions)
+
+    def negated_expressions(self, span):
+        """
+        Find negated expression of span, the expression of NEG_PART is searched in the dependency tree.
+        """
         doc = span.doc
         if span.label_ == "NEG_PART":
             neg_expr = self.find_negated_expressions(doc, span[0])
@@ -73,6 +130,7 @@ class Negator:
     def get_negated_ent(self, span):
         """
         Extract negated entity from spacy doc.
+        The entity is found once per span, next calls return the stored one.
         Parameters
         ----------
         span : Spacy Span
@@ -83,6 +141,12 @@ class Negator:
         result : list
             list of negated entities.
         """
+        return self.cached("neg_ent", span, self.negated_ent)
+
+    def negated_ent(self, span):
+        """
+        Find negated entity of span, i.e. words of its negated expression except negations and verbs.
+        """
         ent = span._.neg_expr
         result = []
         for word in ent:
@@ -91,6 +155,18 @@ class Negator:
 
         return result
 
+    def compute(self, spans):
+        """
+        Compute negated expressions and entities of spans in advance.
+        Parameters
+        ----------
+        spans : list
+            List of negations, e.g. doc.ents.
+        """
+        for span in spans:
+            span._.neg_expr
+            span._.neg_ent
+
     def split_sentence(self, word, sent, negation):
         """
         Split complex sentence into simple sentences and return part,
@@ -99,35 +175,35 @@ class Negator:
         ----------
         word : Spacy.token
             current word
-        sent : Spacy.doc
-            parsed sentence
+        sent : DependencyRange
+            dependency tree of parsed sentence
         negation : Spacy.token
             current negation part
 
         Returns
         -------
+        sent : DependencyRange
+            dependency tree of new simple sentence
         word : Spacy.token
-            current word in new sentence
-        sent : Spacy.doc
-            new simple sentence
+            current word
         negation : Spacy.token
-            current negation part in new sentence
+            current negation part
         """
-        internal_sent = list(word.subtree)
-        if internal_sent[0].dep_ == 'punct':
+        internal_sent = sent.subtree(word)
+        if sent.dep(internal_sent[0]) == 'punct':
             internal_sent.remove(internal_sent[0])
         index_list = [w.i for w in internal_sent]
         min_i = min(index_list)
         max_i = max(index_list)
-        new_sent = Span(sent, min_i, max_i+1).as_doc()
-        head = [w for w in new_sent if w.text == word.text][0]
-        negation = [w for w in new_sent if w.text == negation.text][0]
+        new_sent = DependencyRange(sent.doc, min_i, max_i+1, parent=sent)
 
-        return new_sent, head, negation
+        return new_sent, word, negation
 
     def find_negated_expressions(self, sent, negation):
         """
         Find negated_expression for particular negation part.
+        Parts of complex sentence are processed as ranges of its tokens without copies of the doc,
+        the dependency tree of the whole sentence is indexed once.
         Parameters
         ----------
         sent : Spacy doc
@@ -140,77 +216,81 @@ class Negator:
         result : list
             negated expression.
         """
+        tree = dependency_tree(sent)
         head = negation.head
-        filter = lambda root, excp: [w for w in root.children if (w.dep_ != 'punct') and (w != excp)]
+        filter = lambda root, excp: [w for w in tree.children(root) if (tree.dep(w) != 'punct') and (w != excp)]
 
         # special rule for searching expression for particles 'отрицать', 'отказаться', 'нет'
         if negation.lemma_ in ['отрицать', 'отказаться', 'нет']:
-            for child in negation.children:
-                if child.dep_ in ['nsubj', 'nsubj:pass', 'obj']:
-                    return [negation] + list(child.subtree)
-            for child in negation.children:
-                if child.dep_ in ['obl']:
-                    return [negation] + list(child.subtree)
+            for child in tree.children(negation):
+                if tree.dep(child) in ['nsubj', 'nsubj:pass', 'obj']:
+                    return [negation] + tree.subtree(child)
+            for child in tree.children(negation):
+                if tree.dep(child) in ['obl']:
+                    return [negation] + tree.subtree(child)
 
         # check for branches with dependecies 'nsubj', 'nsubj:pass', 'obj'
-        for child in head.children:
-            if child.dep_ in ['nsubj', 'nsubj:pass', 'obj']:
-                if 'conj' not in [w.dep_ for w in child.children]:
-                    return [negation, head] + list(child.subtree)
+        for child in tree.children(head):
+            if tree.dep(child) in ['nsubj', 'nsubj:pass', 'obj']:
+                if 'conj' not in [tree.dep(w) for w in tree.children(child)]:
+                    return [negation, head] + tree.subtree(child)
                 else:
                     return [negation, head, child]
         
         # Determining which part of the sentence the expression is in.
-        if head.dep_ in conj:
-            sent, head, negation = self.split_sentence(head, sent, negation)
-            head = [i for i in sent if i.text == head.text][0]
+        if tree.is_clause(head):
+            tree, head, negation = self.split_sentence(head, tree, negation)
 
         # Checking whether clauses remain in the sentence
-        for word in head.subtree:
-            if word.dep_ in conj:
-                indexes = [w.i for w in word.subtree]
-                if max(indexes) < head.i:
-                    sent = Span(sent, max(indexes)+1, len(sent)).as_doc()
-                elif min(indexes) > head.i:
-                    sent = Span(sent, 0, min(indexes)).as_doc()
-                head = [w for w in sent if w.text == head.text][0]
-                negation = [w for w in sent if w.text == negation.text][0]
-                break
+        if tree.has_clause(head):
+            word = [w for w in tree.subtree(head) if tree.is_clause(w)][0]
+            indexes = [w.i for w in tree.subtree(word)]
+            if max(indexes) < head.i:
+                tree = DependencyRange(sent, max(indexes)+1, tree.end, parent=tree)
+            elif min(indexes) > head.i:
+                tree = DependencyRange(sent, tree.start, min(indexes), parent=tree)
 
         # special rule for searching expression for nouns
-        if head.pos_ == 'NOUN':
-            if len(list(head.children)) == 1:
-                return [negation, head, head.head] + filter(head.head, head)
-            for child in head.children:
-                if child.dep_ in ['nsubj', 'nsubj:pass', 'obj']:
+        if tree.pos(head) == 'NOUN':
+            if len(tree.children(head)) == 1:
+                return [negation, head, tree.head(head)] + filter(tree.head(head), head)
+            for child in tree.children(head):
+                if tree.dep(child) in ['nsubj', 'nsubj:pass', 'obj']:
                     return [negation, head, child]
 
         # in other case extraact all dependent words
-        if len(list(head.children)) < 3:
-            return [w for w in head.subtree if w.dep_ not in ['conj', 'punct']]
+        if len(tree.children(head)) < 3:
+            return [w for w in tree.subtree(head) if tree.dep(w) not in ['conj', 'punct']]
 
         return [negation, head]
 
-    def convert_to_dataframe(self, docs):
+    def convert_to_dataframe(self, docs, ents=None):
         """
         Present spacy docs in pandas dataframe format
         Parameters
         ----------
         docs : list
             list of parsed sentences
+        ents : list (default=None)
+            list of negation spans of every doc, doc.ents are used if None
 
         Returns
         -------
         sentence : Pandas DataFrame
             Table of parsed sentences.
         """
+        import pandas as pd
+
         sentences, neg_expr, neg_ent = [], [], []
 
-        for doc in docs:
+        if ents is None:
+            ents = [doc.ents for doc in docs]
+
+        for doc, spans in zip(docs, ents):
             sentences.append(str(doc))
 
-            neg_expr.append([' '.join([i.text for i in ent._.neg_expr if (i is not None) and (i.tag_ != 'PUNCT')]) for ent in doc.ents])
-            neg_ent.append([' '.join([i.text for i in ent._.neg_ent]) for ent in doc.ents])
+            neg_expr.append([' '.join([i.text for i in ent._.neg_expr if (i is not None) and (i.tag_ != 'PUNCT')]) for ent in spans])
+            neg_ent.append([' '.join([i.text for i in ent._.neg_ent]) for ent in spans])
 
         for i in range(len(neg_ent)):
             for j in range(len(neg_ent[i])):
@@ -224,7 +304,7 @@ class Negator:
 
         return df
 
-    def process(self, parsed_sentences=None, sentence=None, parser=None, to_dataframe=False):
+    def process(self, parsed_sentences=None, sentence=None, parser=None, to_dataframe=False, dedup=True, eager=False, prefilter=False):
         """
         Process time expressions.
         Parameters
@@ -236,24 +316,48 @@ class Negator:
         parser : object (default=None)
             Syntax parser, used if parsed_sentences is None.
         parsed_sentences : list (default=None)
-            List of parsed senteces, if they are already parsed in conllu format.
+            List of parsed senteces, if they are already parsed in conllu format,
+            or list of docs restored by syntax.corpus.CorpusReader. Docs are processed in place, if they have
+            the vocabulary of the processor and were not processed yet, other docs are copied (see utils.parsed_doc).
+        dedup : bool (default=True)
+            Flag, which allows to analyse identical sentences once. Such sentences share one doc in the result.
+        eager : bool (default=False)
+            Flag, which allows to compute ent._.neg_expr and ent._.neg_ent for all negations during processing
+            instead of the first access.
+        prefilter : bool (default=False)
+            Flag, which allows to skip matching of sentences without triggers of negation patterns.
+            Docs of such sentences from CONLL-U have words only, without tags and dependency tree.
         Returns
         -------
         result : list
             List of parsed docs with time expressions, normal forms and stamps.
         """
         docs = list()
+        processed = dict()
 
         if parsed_sentences == None:
             parsed_sentences = parser.parse(sentence)
 
         for sent in range(len(parsed_sentences)):
-            if len(sentence[sent]) == 0:
+            if len(parsed_sentences[sent]) == 0:
+                continue
+            self.stats['sentences'] += 1
+            if dedup and parsed_sentences[sent] in processed:
+                self.stats['reused'] += 1
+                docs.append(processed[parsed_sentences[sent]])
                 continue
 
-            self.doc = doc_from_conllu(
-                self.nlp.vocab, parsed_sentences[sent].split("\n"))
-            self.ruler(self.doc)
+            if prefilter and not self.triggers.check(parsed_sentences[sent]):
+                self.doc = plain_doc(self.nlp.vocab, parsed_sentences[sent])
+                self.stats['skipped'] += 1
+            else:
+                self.doc = parsed_doc(self.nlp.vocab, parsed_sentences[sent])
+                self.ruler(self.doc)
+                if eager:
+                    self.compute(self.doc.ents)
+                self.stats['analysed'] += 1
+            if dedup:
+                processed[parsed_sentences[sent]] = self.doc
             docs.append(self.doc)
 
         if to_dataframe == True:
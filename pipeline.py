@@ -0,0 +1,180 @@
+import asyncio
+import queue
+import threading
+
+from syntax.parser import Parser
+
+
+class Pipeline:
+    """
+    Threaded pipeline of sentence preprocessing, syntax parsing and rule processing.
+    Stages run in separate threads connected by bounded queues, so preprocessing of next batches
+    and rule processing of previous ones are done while the model parses the current batch.
+    Parameters
+    ----------
+    parser : Parser
+        Syntax parser.
+    processor : TimeProcessor, Negator
+        Processor, which has method process(parsed_sentences, ...).
+    batch : int, (default=3)
+        The total number of sentences in one batch passed between stages.
+    queue_size : int, (default=8)
+        Maximum number of batches waiting between two stages.
+
+    Examples
+    --------
+    >>> from pipeline import Pipeline
+    >>> from syntax.parser import Parser
+    >>> from TimeExpressions.TimeProcessor import TimeProcessor
+
+    >>> pipeline = Pipeline(Parser(), TimeProcessor())
+    >>> for doc in pipeline.run(df.sentence, date=df.date, birthday=df.birthday):
+    ...     print([ent.text for ent in doc.ents])
+
+    >>> docs = await pipeline.aprocess(df.sentence, date=df.date, birthday=df.birthday)
+    """
+
+    # mark of the end of the stream
+    done = object()
+
+    def __init__(self, parser, processor, batch=3, queue_size=8):
+        self.parser = parser
+        self.processor = processor
+        self.batch = batch
+        self.queue_size = queue_size
+
+    @staticmethod
+    def put(target, item, stop):
+        """
+        Put item to the queue unless the pipeline is stopped.
+        """
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def stage(self, func, source, target, stop):
+        """
+        Run stage in a thread: read items from the source, transform them and write them to the target.
+        Exceptions are passed to the next stages and raised by the consumer.
+        """
+        try:
+            for item in source:
+                if stop.is_set():
+                    return
+                self.put(target, func(item), stop)
+        except Exception as e:
+            self.put(target, e, stop)
+            return
+        self.put(target, self.done, stop)
+
+    @staticmethod
+    def read(source, stop=None):
+        """
+        Read items from the queue until the end of the stream or the stop of the pipeline.
+        """
+        while True:
+            try:
+                item = source.get(timeout=0.1)
+            except queue.Empty:
+                if stop is not None and stop.is_set():
+                    return
+                continue
+            if item is Pipeline.done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def batches(self, sentences, columns):
+        """
+        Group sentences and their per-sentence parameters into batches.
+        """
+        names = list(columns)
+        rows = zip(sentences, *[columns[name] for name in names])
+        part = []
+        for row in rows:
+            part.append(row)
+            if len(part) == self.batch:
+                yield names, part
+                part = []
+        if part:
+            yield names, part
+
+    def preprocess(self, item):
+        names, part = item
+        return names, part, Parser.preprocess([row[0] for row in part])
+
+    def parse(self, item):
+        names, part, sentences = item
+        parses = list(self.parser.parse_window(sentences, batch=self.batch, preprocess=False))
+        return names, part, parses
+
+    def run(self, sentences, **columns):
+        """
+        Process sentences in the pipeline.
+        Parameters
+        ----------
+        sentences : iterable
+            Iterable of sentences.
+        **columns
+            Iterables of per-sentence parameters of the processor, e.g. date and birthday for TimeProcessor.
+
+        Yields
+        ------
+        doc : Spacy doc
+            Processed sentence in the input order.
+        """
+        stop = threading.Event()
+        preprocessed = queue.Queue(self.queue_size)
+        parsed = queue.Queue(self.queue_size)
+        threads = [
+            threading.Thread(target=self.stage, daemon=True,
+                             args=(self.preprocess, self.batches(sentences, columns), preprocessed, stop)),
+            threading.Thread(target=self.stage, daemon=True,
+                             args=(self.parse, self.read(preprocessed, stop), parsed, stop)),
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for names, part, parses in self.read(parsed):
+                kwargs = {name: [row[i + 1] for row in part] for i, name in enumerate(names)}
+                for doc in self.processor.process(parsed_sentences=parses, **kwargs):
+                    yield doc
+        finally:
+            stop.set()
+
+    async def aiter(self, sentences, **columns):
+        """
+        Process sentences in the pipeline without blocking the event loop.
+        Parameters are the same as in run().
+
+        Yields
+        ------
+        doc : Spacy doc
+            Processed sentence in the input order.
+        """
+        loop = asyncio.get_running_loop()
+        docs = self.run(sentences, **columns)
+        try:
+            while True:
+                doc = await loop.run_in_executor(None, next, docs, self.done)
+                if doc is self.done:
+                    return
+                yield doc
+        finally:
+            docs.close()
+
+    async def aprocess(self, sentences, **columns):
+        """
+        Process sentences in the pipeline without blocking the event loop.
+        Parameters are the same as in run().
+
+        Returns
+        -------
+        result : list
+            List of processed docs in the input order.
+        """
+        return [doc async for doc in self.aiter(sentences, **columns)]
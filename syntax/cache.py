@@ -0,0 +1,124 @@
+import hashlib
+import sqlite3
+import threading
+
+
+class ParseCache:
+    """
+    Persistent on-disk cache of syntax parses.
+    Parses are stored in SQLite database in CONLL-U format and are addressed by hash of
+    preprocessed sentence and name of the parsing model.
+    Parameters
+    ----------
+    path : str, (default='parse_cache.sqlite')
+        Path to the database file. ':memory:' keeps the cache in RAM until the end of the session.
+
+    Examples
+    --------
+    >>> from syntax.parser import Parser
+    >>> from syntax.cache import ParseCache
+
+    >>> parser = Parser(cache=ParseCache('train_time.sqlite'))
+    >>> parser.parse(["Болеет СД 2 типа в течении 5 лет ."])
+    >>> parser.cache.hits, parser.cache.misses
+
+    (0, 1)
+    """
+
+    # maximum number of host parameters in a single SQLite statement
+    chunk = 900
+
+    def __init__(self, path='parse_cache.sqlite'):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS parses (key TEXT PRIMARY KEY, conllu TEXT NOT NULL)")
+        self.connection.commit()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(sentence, model_name):
+        """
+        Get cache key of sentence.
+        Parameters
+        ----------
+        sentence : str
+            Preprocessed sentence.
+        model_name : str
+            Name of the parsing model.
+
+        Returns
+        -------
+        key : str
+            Hex digest of sentence and model name.
+        """
+        return hashlib.sha1((model_name + "\n" + sentence).encode("utf-8")).hexdigest()
+
+    def get_many(self, sentences, model_name):
+        """
+        Find stored parses of sentences.
+        Parameters
+        ----------
+        sentences : list
+            List of preprocessed sentences.
+        model_name : str
+            Name of the parsing model.
+
+        Returns
+        -------
+        result : dict
+            Stored parses in CONLL-U format by positions of sentences in the list.
+        """
+        keys = [self.key(sentence, model_name) for sentence in sentences]
+        found = dict()
+        with self.lock:
+            for i in range(0, len(keys), self.chunk):
+                part = list(set(keys[i:i + self.chunk]))
+                query = "SELECT key, conllu FROM parses WHERE key IN ({})".format(
+                    ", ".join("?" * len(part)))
+                found.update(self.connection.execute(query, part).fetchall())
+
+        result = {i: found[key] for i, key in enumerate(keys) if key in found}
+        self.hits += len(result)
+        self.misses += len(keys) - len(result)
+        return result
+
+    def put_many(self, sentences, parses, model_name):
+        """
+        Store parses of sentences.
+        Parameters
+        ----------
+        sentences : list
+            List of preprocessed sentences.
+        parses : list
+            List of parsed sentences in CONLL-U format.
+        model_name : str
+            Name of the parsing model.
+        """
+        rows = [(self.key(sentence, model_name), parse)
+                for sentence, parse in zip(sentences, parses)]
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO parses (key, conllu) VALUES (?, ?)", rows)
+            self.connection.commit()
+
+    def clear(self):
+        """
+        Remove all stored parses.
+        """
+        with self.lock:
+            self.connection.execute("DELETE FROM parses")
+            self.connection.commit()
+
+    def close(self):
+        """
+        Close the database.
+        """
+        with self.lock:
+            self.connection.close()
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM parses").fetchone()[0]
@@ -0,0 +1,295 @@
+from array import array
+import datetime
+import mmap
+import re
+import sys
+
+from syntax.parser import Parser
+sys.path.append("..")
+from utils import doc_from_conllu
+
+# sequence of non-empty lines, i.e. one sentence in CONLL-U
+block_pattern = re.compile(rb"(?:[^\n]+(?:\n|$))+")
+
+
+def block_offsets(data):
+    """
+    Find sentences in CONLL-U data.
+    Parameters
+    ----------
+    data : bytes, mmap
+        Content of CONLL-U file, where sentences are separated by blank lines.
+
+    Yields
+    ------
+    start : int
+        Offset of the first byte of sentence.
+    end : int
+        Offset of the byte after the last line of sentence without line break.
+    """
+    for match in block_pattern.finditer(data):
+        start, end = match.span()
+        while end > start and data[end - 1:end] in (b"\n", b"\r"):
+            end -= 1
+        if end > start:
+            yield start, end
+
+
+def sentence_key(sentence):
+    """
+    Get lookup key of preprocessed sentence.
+    The model splits text into tokens, so whitespaces are not taken into account.
+    """
+    return "".join(sentence.split())
+
+
+def parse_words(parse):
+    """
+    Get word forms of parsed sentence in CONLL-U format.
+    """
+    words = []
+    for line in parse.split("\n"):
+        if not line or line.startswith("#"):
+            continue
+        parts = line.split("\t")
+        if "." in parts[0] or "-" in parts[0]:
+            continue
+        words.append(parts[1])
+    return words
+
+
+def parse_key(parse):
+    """
+    Get lookup key of parsed sentence in CONLL-U format from its word forms.
+    """
+    return sentence_key("".join(parse_words(parse)))
+
+
+def boundaries(words):
+    """
+    Get offsets of boundaries between words in their text without whitespaces.
+    """
+    result = set()
+    offset = 0
+    for word in words[:-1]:
+        offset += len("".join(word.split()))
+        result.add(offset)
+    return result
+
+
+class ConllParser:
+    """
+    Syntax parser, which serves parses from saved CONLL-U files instead of the model.
+    Files, e.g. written by Parser.parse(save=True), are memory-mapped and indexed by text of sentences,
+    so parsing does not require tensorflow and deeppavlov. The index ignores whitespaces, because the model
+    splits words itself, so words of parse are checked against the sentence on lookup: every whitespace
+    of the sentence must separate words of the parse, e.g. 'в 1 2 раза' does not get parse of 'в 12 раза'.
+    Parameters
+    ----------
+    paths : str, list
+        Path or list of paths to CONLL-U files.
+    fallback : object, (default=None)
+        Syntax parser for sentences, which are not found in the files. KeyError is raised for them if None.
+
+    Examples
+    --------
+    >>> from syntax.conll import ConllParser
+    >>> from TimeExpressions.TimeProcessor import TimeProcessor
+
+    >>> parser = ConllParser('train_time.conll')
+    >>> docs = TimeProcessor().process(sentence=list(df.sentence), date=list(df.date),
+    ...                                birthday=list(df.birthday), parser=parser)
+    """
+
+    def __init__(self, paths, fallback=None):
+        if isinstance(paths, str):
+            paths = [paths]
+        self.fallback = fallback
+        self.files = []
+        self.index = dict()
+        for path in paths:
+            with open(path, "rb") as f:
+                # empty file can not be mapped
+                if not f.read(1):
+                    continue
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            number = len(self.files)
+            self.files.append(data)
+            for start, end in block_offsets(data):
+                key = parse_key(data[start:end].decode("utf-8"))
+                self.index.setdefault(key, []).append((number, start, end))
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, sentence):
+        return self.get(sentence) is not None
+
+    def get(self, sentence):
+        """
+        Find parse of preprocessed sentence.
+        Parameters
+        ----------
+        sentence : str
+            Preprocessed sentence.
+
+        Returns
+        -------
+        parse : str, None
+            Parsed sentence in CONLL-U format or None, if it is not found.
+            Parse with the fewest words split without whitespace is chosen among suitable ones.
+        """
+        words = sentence.split()
+        locations = self.index.get(sentence_key(sentence))
+        if locations is None:
+            return None
+        spaces = boundaries(words)
+        result, extra = None, None
+        for number, start, end in locations:
+            parse = self.files[number][start:end].decode("utf-8")
+            splits = boundaries(parse_words(parse))
+            if not spaces <= splits:
+                continue
+            if result is None or len(splits) - len(spaces) < extra:
+                result, extra = parse, len(splits) - len(spaces)
+        return result
+
+    def parse(self, sentence, save=False, batch=3, batch_tokens=None, max_length=None):
+        """
+        Get parses of sentences from the files.
+        Parameters
+        ----------
+        sentence : list
+            List of sentences or sentence.
+        save : bool, (default=False)
+            Flag, which allows to save result of syntax parsing to Conllu format.
+        batch : int, (default=3)
+            The total number of sentences presented in one batch of the fallback parser.
+        batch_tokens : int, (default=None)
+            Token budget of one batch of the fallback parser.
+        max_length : int, (default=None)
+            Maximum number of tokens in one sequence of the fallback parser.
+
+        Returns
+        -------
+        parsed_sentences : list
+            List of parsed sentences in CONLL-U format.
+        """
+        if isinstance(sentence, str):
+            sentence = [sentence]
+        parsed_sentences = [self.get(sent) for sent in Parser.preprocess(sentence)]
+
+        missing = [sent for sent in range(len(sentence)) if parsed_sentences[sent] is None]
+        if missing:
+            if self.fallback is None:
+                raise KeyError("Parse of sentence '{}' is not found".format(sentence[missing[0]]))
+            parses = self.fallback.parse([sentence[sent] for sent in missing], batch=batch,
+                                         batch_tokens=batch_tokens, max_length=max_length)
+            for sent, parse in zip(missing, parses):
+                parsed_sentences[sent] = parse
+
+        if save == True:
+            name = str(datetime.datetime.now())[:-7]+'.conll'
+            with open(name, 'w') as f:
+                for parse in parsed_sentences:
+                    print(parse, file=f)
+                    print(file=f)
+
+        return parsed_sentences
+
+    def close(self):
+        """
+        Close the files.
+        """
+        for data in self.files:
+            data.close()
+        self.files = []
+
+
+class ConllReader:
+    """
+    Lazy reader of CONLL-U file, e.g. written by Parser.parse(save=True).
+    The file is memory-mapped and only offsets of sentences are kept in memory, so the reader can be
+    passed as parsed_sentences to TimeProcessor.process and Negator.process for corpora larger than RAM.
+    Parameters
+    ----------
+    path : str
+        Path to CONLL-U file.
+
+    Examples
+    --------
+    >>> from syntax.conll import ConllReader
+    >>> from negations.negations import Negator
+
+    >>> with ConllReader('train_neg.conll') as reader:
+    ...     print(len(reader), reader[0])
+    ...     docs = Negator().process(parsed_sentences=reader)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.starts = array("q")
+        self.ends = array("q")
+        self.data = None
+        with open(path, "rb") as f:
+            # empty file can not be mapped
+            if not f.read(1):
+                return
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        for start, end in block_offsets(self.data):
+            self.starts.append(start)
+            self.ends.append(end)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, number):
+        """
+        Get sentence by its number.
+        Parameters
+        ----------
+        number : int, slice
+            Number of sentence in the file or slice of numbers.
+
+        Returns
+        -------
+        parse : str, list
+            Parsed sentence in CONLL-U format or list of them for slice.
+        """
+        if isinstance(number, slice):
+            return [self[i] for i in range(*number.indices(len(self)))]
+        return self.data[self.starts[number]:self.ends[number]].decode("utf-8")
+
+    def __iter__(self):
+        for number in range(len(self)):
+            yield self[number]
+
+    def docs(self, vocab):
+        """
+        Convert sentences to docs one by one.
+        Parameters
+        ----------
+        vocab : Spacy vocab
+            Vocabulary of docs, e.g. processor.nlp.vocab.
+
+        Yields
+        ------
+        doc : Spacy doc
+            Parsed sentence.
+        """
+        for parse in self:
+            yield doc_from_conllu(vocab, parse.split("\n"))
+
+    def close(self):
+        """
+        Close the file.
+        """
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,224 @@
+import struct
+import sys
+import zlib
+
+import numpy
+import srsly
+from spacy.attrs import ORTH, TAG, POS, DEP, LEMMA, HEAD, SPACY
+from spacy.tokens import Doc
+
+sys.path.append("..")
+from utils import doc_from_conllu, conllu_attrs, blank_vocab
+
+# token attributes stored in the corpus after word forms (ORTH),
+# the last column keeps whitespaces after tokens
+corpus_attrs = [TAG, POS, DEP, LEMMA, HEAD]
+# size of compressed chunk written before it
+chunk_header = struct.Struct("<Q")
+
+
+def docs_to_bytes(docs):
+    """
+    Serialize docs into one compressed chunk.
+    Parameters
+    ----------
+    docs : list
+        List of spacy docs.
+
+    Returns
+    -------
+    data : bytes
+        Token attributes, whitespaces and strings of docs.
+    """
+    strings = set()
+    arrays = []
+    for doc in docs:
+        arrays.append(doc.to_array([ORTH] + corpus_attrs + [SPACY]))
+        for token in doc:
+            strings.update((token.text, token.tag_, token.pos_, token.dep_, token.lemma_))
+    tokens = numpy.vstack(arrays) if arrays else numpy.zeros((0, len(corpus_attrs) + 2), dtype="uint64")
+    message = {
+        "strings": sorted(strings),
+        "lengths": [len(doc) for doc in docs],
+        "tokens": numpy.ascontiguousarray(tokens, dtype="uint64").tobytes(),
+    }
+    return zlib.compress(srsly.msgpack_dumps(message))
+
+
+def docs_from_bytes(data, vocab):
+    """
+    Restore docs from the chunk made by docs_to_bytes.
+    Parameters
+    ----------
+    data : bytes
+        Serialized chunk.
+    vocab : Spacy vocab
+        Vocabulary of restored docs.
+
+    Returns
+    -------
+    docs : list
+        List of spacy docs.
+    """
+    message = srsly.msgpack_loads(zlib.decompress(data))
+    strings = vocab.strings
+    for string in message["strings"]:
+        strings.add(string)
+    tokens = numpy.frombuffer(message["tokens"], dtype="uint64").reshape((-1, len(corpus_attrs) + 2))
+    # columns are ORTH, TAG, POS, DEP, LEMMA, HEAD and SPACY. Attributes are set the same way
+    # as in doc_from_conllu: tags, POS and lemmas by tokens, dependency tree by one from_array call
+    rows = tokens.tolist()
+    tree = tokens[:, [corpus_attrs.index(HEAD) + 1, corpus_attrs.index(DEP) + 1]]
+
+    docs = []
+    start = 0
+    for length in message["lengths"]:
+        end = start + length
+        doc = Doc(vocab, words=[strings[row[0]] for row in rows[start:end]],
+                  spaces=[bool(row[-1]) for row in rows[start:end]])
+        for token, row in zip(doc, rows[start:end]):
+            token.tag = row[1]
+            token.pos = row[2]
+            token.lemma = row[4]
+        if length:
+            doc.from_array(conllu_attrs, tree[start:end])
+        doc.is_parsed = True
+        doc.is_tagged = True
+        docs.append(doc)
+        start = end
+    return docs
+
+
+class CorpusWriter:
+    """
+    Writer of parsed docs to binary corpus file.
+    Docs are stored in independently compressed chunks, so the file can be read chunk by chunk
+    without the syntax parser and parsing of CONLL-U.
+    Parameters
+    ----------
+    path : str
+        Path to the corpus file.
+    chunk : int, (default=1000)
+        The total number of docs in one chunk.
+    append : bool, (default=False)
+        Flag, which allows to add docs to the existing file.
+
+    Examples
+    --------
+    >>> from syntax.parser import Parser
+    >>> from syntax.corpus import CorpusWriter
+
+    >>> with CorpusWriter('train_time.docs') as writer:
+    ...     writer.extend(Parser().parse(list(df.sentence)))
+    """
+
+    def __init__(self, path, chunk=1000, append=False):
+        self.path = path
+        self.chunk = chunk
+        self.file = open(path, "ab" if append else "wb")
+        self.vocab = blank_vocab()
+        self.docs = []
+
+    def add(self, doc):
+        """
+        Add doc to the corpus.
+        Parameters
+        ----------
+        doc : Spacy doc, str
+            Parsed sentence as doc or in CONLL-U format.
+        """
+        if isinstance(doc, str):
+            doc = doc_from_conllu(self.vocab, doc.split("\n")) if doc else Doc(self.vocab, words=[])
+        self.docs.append(doc)
+        if len(self.docs) >= self.chunk:
+            self.flush()
+
+    def extend(self, docs):
+        """
+        Add docs to the corpus.
+        Parameters
+        ----------
+        docs : iterable
+            Parsed sentences as docs or in CONLL-U format.
+        """
+        for doc in docs:
+            self.add(doc)
+
+    def flush(self):
+        """
+        Write added docs to the file as one chunk.
+        """
+        if not self.docs:
+            return
+        data = docs_to_bytes(self.docs)
+        self.file.write(chunk_header.pack(len(data)))
+        self.file.write(data)
+        self.file.flush()
+        self.docs = []
+
+    def close(self):
+        """
+        Write the rest of docs and close the file.
+        """
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class CorpusReader:
+    """
+    Reader of binary corpus file written by CorpusWriter.
+    Only one chunk of the file is kept in memory at a time.
+    Parameters
+    ----------
+    path : str
+        Path to the corpus file.
+    vocab : Spacy vocab, (default=None)
+        Vocabulary of restored docs, e.g. processor.nlp.vocab, so docs are processed in place.
+        A new one is created if None, then processors copy docs into their vocabularies.
+
+    Examples
+    --------
+    >>> from syntax.corpus import CorpusReader
+    >>> from TimeExpressions.TimeProcessor import TimeProcessor
+
+    >>> time_processor = TimeProcessor()
+    >>> for docs in CorpusReader('train_time.docs', time_processor.nlp.vocab).chunks():
+    ...     docs = time_processor.process(parsed_sentences=docs)
+    """
+
+    def __init__(self, path, vocab=None):
+        self.path = path
+        self.vocab = blank_vocab() if vocab is None else vocab
+
+    def chunks(self):
+        """
+        Read the file chunk by chunk.
+
+        Yields
+        ------
+        docs : list
+            List of spacy docs of one chunk.
+        """
+        with open(self.path, "rb") as f:
+            while True:
+                header = f.read(chunk_header.size)
+                if not header:
+                    return
+                if len(header) < chunk_header.size:
+                    raise ValueError("Corpus file '{}' is truncated".format(self.path))
+                size, = chunk_header.unpack(header)
+                data = f.read(size)
+                if len(data) < size:
+                    raise ValueError("Corpus file '{}' is truncated".format(self.path))
+                yield docs_from_bytes(data, self.vocab)
+
+    def __iter__(self):
+        for docs in self.chunks():
+            for doc in docs:
+                yield doc
@@ -1,16 +1,14 @@
-from deeppavlov import build_model
-import tensorflow as tf
+from collections import Counter
 import warnings
 import datetime
 import logging
+import multiprocessing
 import os
 
 import sys
 sys.path.append("..")
-from utils import pre_process_sentence
-
-config = tf.ConfigProto()
-config.gpu_options.allow_growth = True
+from utils import pre_process_batch, segment_sentence, merge_conllu
+from syntax.cache import ParseCache
 
 
 class Parser:
@@ -22,6 +20,19 @@ class Parser:
         Flag, which allows to download model from the Internet, if it is not available.
     log : bool, (default=False)
         Flag, which allows turn on logging messages.
+    lazy : bool, (default=False)
+        Flag, which allows to postpone import of tensorflow and deeppavlov and building of the model until the first parsing.
+    cache : str, ParseCache (default=None)
+        Path to the parse cache database or ParseCache object.
+        Sentences found in the cache are not parsed by the model again. ':memory:' keeps parses
+        only for the lifetime of the parser.
+
+    Attributes
+    ----------
+    stats : Counter
+        Counts of input sentences ('sentences'), sentences split into segments ('segmented'),
+        sentences or segments repeated inside a call ('reused'), found in the cache ('cached')
+        and parsed by the model ('parsed') since creation of the parser.
 
     Examples
     --------
@@ -41,23 +52,81 @@ class Parser:
       9\t.\t.\tPUNCT\t_\t_\t1\tpunct\t_\t_']
     """
 
-    def __init__(self, download=True, log=False):
+    model_name = "ru_syntagrus_joint_parsing"
+
+    def __init__(self, download=True, log=False, lazy=False, cache=None):
 
+        self.download = download
+        self.log = log
         if not log:
             warnings.filterwarnings("ignore")
+            logging.disable(logging.WARNING)
+            os.environ["TF_CPP_MIN_LOG_LEVEL"] = "3"
+
+        if isinstance(cache, str):
+            cache = ParseCache(cache)
+        self.cache = cache
+        self.stats = Counter()
+
+        self.model = None
+        if not lazy:
+            self.load_model()
+
+    def load_model(self):
+        """
+        Import tensorflow and deeppavlov and build the parsing model.
+        """
+        import tensorflow as tf
+        from deeppavlov import build_model
+
+        if not self.log:
             warnings.filterwarnings(action="ignore", module="tensorflow")
             tf.compat.v1.logging.set_verbosity(tf.compat.v1.logging.ERROR)
             tf.autograph.set_verbosity(0)
-            logging.disable(logging.WARNING)
-            os.environ["TF_CPP_MIN_LOG_LEVEL"] = "3"
 
-        self.model = build_model(
-            "ru_syntagrus_joint_parsing", download=download)
+        self.model = build_model(self.model_name, download=self.download)
         print('Initialization complete!')
 
-    def parse(self, sentence, save=False, batch=3):
+    def batches(self, sentence, batch=3, batch_tokens=None):
         """
-        Find event for particular time expression.
+        Split sentences into batches for the model.
+        Parameters
+        ----------
+        sentence : list
+            List of preprocessed sentences.
+        batch : int, (default=3)
+            The total number of sentences presented in one batch, used if batch_tokens is None.
+        batch_tokens : int, (default=None)
+            Token budget of one batch. Sentences are sorted by number of tokens and each batch is filled
+            while number of sentences multiplied by length of the longest one fits the budget.
+            A sentence longer than the budget is parsed in a separate batch.
+
+        Returns
+        -------
+        result : list
+            List of batches with positions of sentences in the list.
+        """
+        if batch_tokens is None:
+            return [list(range(i, min(i + batch, len(sentence)))) for i in range(0, len(sentence), batch)]
+
+        lengths = [len(sent.split()) for sent in sentence]
+        if max_length is not None and max_length < 1:
+            raise ValueError("max_length must be at least 1, got {!r}".format(max_length))
+        order = sorted(range(len(sentence)), key=lambda i: lengths[i])
+        result, current = [], []
+        for i in order:
+            # sentences are sorted, so the current one is the longest in the batch
+            if current and (len(current) + 1) * lengths[i] > batch_tokens:
+                result.append(current)
+                current = []
+            current.append(i)
+        if current:
+            result.append(current)
+        return result
+
+    def parse(self, sentence, save=False, batch=3, batch_tokens=None, max_length=None):
+        """
+        Parse sentences.
         Parameters
         ----------
         sentence : list
@@ -67,32 +136,290 @@ class Parser:
         batch : int, (default=3)
             The total number of sentences presented in one batch. It is best to parse in batches of 3-10 sentences.
             Otherwise, there may not be enough GPU memory or the parsing speed will be very slow.
+        batch_tokens : int, (default=None)
+            Token budget of one batch. If it is set, sentences are grouped by length instead of fixed batches
+            and results are returned in the original order.
+        max_length : int, (default=None)
+            Maximum number of tokens in one sequence of the model. Longer sentences are split into segments,
+            which are parsed separately and joined back into one parse. It must be at least 1.
 
         Returns
         -------
-        event : list
-            Time event.
+        parsed_sentences : list
+            List of parsed sentences in CONLL-U format.
         """
-        parsed_sentences = []
-
+        path = None
         if save == True:
-            name = str(datetime.datetime.now())[:-7]+'.conll'
-            f = open(name, 'w')
-
-        for sent in range(len(sentence)):
-            if len(sentence[sent]) == 0:
-                sentence[sent] = '.'
-                continue
-            sentence[sent] = pre_process_sentence(sentence[sent])
-
-        for i in range(0, len(sentence), batch):
-            for parse in self.model(sentence[i:i + batch]):
-                parsed_sentences.append(parse)
-                if save == True:
-                    print(parse, file=f)
-                    print(file=f)
+            path = str(datetime.datetime.now())[:-7]+'.conll'
 
-        if save == True:
-            f.close()
+        return list(self.parse_iter(sentence, path=path, batch=batch, batch_tokens=batch_tokens,
+                                    max_length=max_length, window=None))
+
+    def parse_iter(self, sentences, path=None, batch=3, batch_tokens=None, max_length=None, window=1000):
+        """
+        Parse sentences lazily.
+        Sentences are read from the iterable by windows, so only one window of sentences and parses
+        is kept in memory. Parses are yielded in the input order as soon as their batches are finished.
+        Parameters
+        ----------
+        sentences : iterable
+            Iterable of sentences. Non-string items, e.g. columns of pandas CSV chunks, are iterated as groups of sentences.
+        path : str, (default=None)
+            Path of the file, to which parses are written in Conllu format as they are yielded.
+        batch : int, (default=3)
+            The total number of sentences presented in one batch.
+        batch_tokens : int, (default=None)
+            Token budget of one batch. Sentences are grouped by length inside a window.
+        max_length : int, (default=None)
+            Maximum number of tokens in one sequence of the model. Longer sentences are split into segments,
+            which are parsed separately and joined back into one parse. It must be at least 1.
+        window : int, (default=1000)
+            The total number of sentences read from the iterable at once. The whole input is read if None.
+
+        Yields
+        ------
+        parse : str
+            Parsed sentence in CONLL-U format.
+
+        Examples
+        --------
+        >>> reader = pd.read_csv('data/train_time.csv', chunksize=10000)
+        >>> for parse in parser.parse_iter((chunk.sentence for chunk in reader), path='train_time.conll'):
+        ...     pass
+        """
+        f = open(path, 'w') if path else None
+        try:
+            for part in self.windows(sentences, window):
+                for parse in self.parse_window(part, batch, batch_tokens, max_length):
+                    if f:
+                        print(parse, file=f)
+                        print(file=f)
+                    yield parse
+        finally:
+            if f:
+                f.close()
+
+    @staticmethod
+    def windows(sentences, window):
+        """
+        Split iterable of sentences into lists.
+        Parameters
+        ----------
+        sentences : iterable
+            Iterable of sentences or groups of sentences.
+        window : int
+            The total number of sentences in one list, the whole input if None.
+
+        Yields
+        ------
+        part : list
+            List of sentences.
+        """
+        if isinstance(sentences, str):
+            sentences = [sentences]
+        part = []
+        for item in sentences:
+            group = [item] if isinstance(item, str) else item
+            for sent in group:
+                part.append(sent)
+                if window and len(part) == window:
+                    yield part
+                    part = []
+        if part:
+            yield part
+
+    @staticmethod
+    def preprocess(sentence, processes=1):
+        """
+        Prepare sentences for the model.
+        Parameters
+        ----------
+        sentence : list
+            List of sentences.
+        processes : int, (default=1)
+            The number of processes of utils.pre_process_batch. The pool is not started by default,
+            because the parser process holds the TensorFlow session and may run inside a thread.
+
+        Returns
+        -------
+        result : list
+            List of preprocessed sentences, empty sentences are replaced by dots.
+        """
+        return pre_process_batch(['.' if len(sent) == 0 else sent for sent in sentence], processes=processes)
+
+    def parse_window(self, sentence, batch=3, batch_tokens=None, max_length=None, preprocess=True):
+        """
+        Parse list of sentences and yield parses in the input order as batches are finished.
+        Parameters
+        ----------
+        sentence : list
+            List of sentences. The list is not changed.
+        batch : int, (default=3)
+            The total number of sentences presented in one batch.
+        batch_tokens : int, (default=None)
+            Token budget of one batch.
+        max_length : int, (default=None)
+            Maximum number of tokens in one sequence of the model, at least 1.
+        preprocess : bool, (default=True)
+            Flag, which allows to preprocess sentences. Set it to False if sentences are already preprocessed.
+
+        Yields
+        ------
+        parse : str
+            Parsed sentence in CONLL-U format.
+        """
+        if max_length is not None and max_length < 1:
+            raise ValueError("max_length must be at least 1, got {!r}".format(max_length))
+        if preprocess:
+            sentence = self.preprocess(sentence)
+
+        # long sentences are parsed by segments
+        bounds = [0]
+        units = []
+        for sent in sentence:
+            parts = segment_sentence(sent, max_length) if max_length is not None else [sent]
+            units.extend(parts)
+            bounds.append(len(units))
+        self.stats['sentences'] += len(sentence)
+        self.stats['segmented'] += sum(1 for i in range(len(sentence)) if bounds[i + 1] - bounds[i] > 1)
+
+        # identical sentences are parsed once
+        positions = dict()
+        unique_of = [positions.setdefault(unit, len(positions)) for unit in units]
+        unique = list(positions)
+        self.stats['reused'] += len(units) - len(unique)
+
+        parsed = dict()
+        if self.cache is not None:
+            parsed = self.cache.get_many(unique, self.model_name)
+            self.stats['cached'] += len(parsed)
+        missing = [unit for unit in range(len(unique)) if unit not in parsed]
+
+        if missing and self.model is None:
+            self.load_model()
+
+        def result(sent):
+            parts = unique_of[bounds[sent]:bounds[sent + 1]]
+            if len(parts) == 1:
+                return parsed[parts[0]]
+            return merge_conllu([parsed[unit] for unit in parts])
+
+        ready = 0
+        for indexes in self.batches([unique[unit] for unit in missing], batch, batch_tokens):
+            while ready < len(sentence) and all(unit in parsed for unit in unique_of[bounds[ready]:bounds[ready + 1]]):
+                yield result(ready)
+                ready += 1
+            indexes = [missing[i] for i in indexes]
+            parses = self.model([unique[unit] for unit in indexes])
+            self.stats['parsed'] += len(parses)
+            parsed.update(zip(indexes, parses))
+            if self.cache is not None:
+                self.cache.put_many([unique[unit] for unit in indexes], parses, self.model_name)
+
+        while ready < len(sentence):
+            yield result(ready)
+            ready += 1
+
+
+# parser of the current worker process of ParserPool
+worker_parser = None
+
+
+def init_worker(kwargs, cache):
+    """
+    Build parser in a worker process of ParserPool.
+    """
+    global worker_parser
+    worker_parser = Parser(**kwargs)
+    # SQLite connection can not be shared between processes
+    worker_parser.cache = ParseCache(cache) if cache else None
+
+
+def parse_task(task):
+    """
+    Parse part of sentences in a worker process of ParserPool.
+    """
+    indexes, sentences, batch, batch_tokens, max_length = task
+    return indexes, worker_parser.parse(sentences, batch=batch, batch_tokens=batch_tokens, max_length=max_length)
+
+
+class ParserPool:
+    """
+    Pool of worker processes for syntax parsing.
+    Each worker owns one parsing model. Sentences are split into tasks, which are taken
+    by free workers starting from the longest sentences.
+    Workers are started by 'spawn' method and build their own models, since tensorflow sessions
+    can't be used in forked processes. The main process does not build the model.
+    Parameters
+    ----------
+    processes : int, (default=None)
+        The number of worker processes. Number of CPUs is used if None.
+    chunk : int, (default=3)
+        The total number of sentences in one task.
+    cache : str, (default=None)
+        Path to the parse cache database shared by workers.
+    **kwargs
+        Parameters of Parser.
+
+    Examples
+    --------
+    >>> from syntax.parser import ParserPool
+
+    >>> with ParserPool(processes=4) as pool:
+    ...     parsed_sentences = pool.parse(sentences)
+    """
+
+    def __init__(self, processes=None, chunk=3, cache=None, **kwargs):
+        self.processes = processes or os.cpu_count()
+        self.chunk = chunk
+        context = multiprocessing.get_context("spawn")
+        self.pool = context.Pool(
+            self.processes, initializer=init_worker, initargs=(kwargs, cache))
+
+    def parse(self, sentence, batch=3, batch_tokens=None, max_length=None):
+        """
+        Parse sentences in worker processes.
+        Parameters
+        ----------
+        sentence : list
+            List of sentences.
+        batch : int, (default=3)
+            The total number of sentences presented in one batch of the model.
+        batch_tokens : int, (default=None)
+            Token budget of one batch of the model.
+        max_length : int, (default=None)
+            Maximum number of tokens in one sequence of the model, at least 1.
+
+        Returns
+        -------
+        parsed_sentences : list
+            List of parsed sentences in CONLL-U format in the order of input sentences.
+        """
+        if max_length is not None and max_length < 1:
+            raise ValueError("max_length must be at least 1, got {!r}".format(max_length))
+        order = sorted(range(len(sentence)), key=lambda i: len(sentence[i]), reverse=True)
+        tasks = []
+        for i in range(0, len(order), self.chunk):
+            indexes = order[i:i + self.chunk]
+            tasks.append((indexes, [sentence[sent] for sent in indexes], batch, batch_tokens, max_length))
+
+        parsed_sentences = [None] * len(sentence)
+        # tasks are taken by workers in order, so the longest remaining sentences go first
+        for indexes, parses in self.pool.imap_unordered(parse_task, tasks, chunksize=1):
+            for sent, parse in zip(indexes, parses):
+                parsed_sentences[sent] = parse
 
         return parsed_sentences
+
+    def close(self):
+        """
+        Stop worker processes.
+        """
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# modules of the project are imported from its root, as in the notebooks and benchmarks
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
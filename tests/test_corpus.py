@@ -0,0 +1,78 @@
+import pytest
+
+from negations.negations import Negator
+from syntax.corpus import CorpusWriter, CorpusReader
+from TimeExpressions.TimeProcessor import TimeProcessor
+
+parse = "\n".join("\t".join(row) for row in [
+    ("1", "Пациент", "пациент", "NOUN", "_", "_", "3", "nsubj", "_", "_"),
+    ("2", "не", "не", "PART", "_", "_", "3", "advmod", "_", "_"),
+    ("3", "курит", "курить", "VERB", "_", "_", "0", "root", "_", "_"),
+    ("4", "с", "с", "ADP", "_", "_", "6", "case", "_", "_"),
+    ("5", "2008", "2008", "NUM", "_", "_", "6", "amod", "_", "_"),
+    ("6", "года", "год", "NOUN", "_", "_", "3", "obl", "_", "SpaceAfter=No"),
+    ("7", ".", ".", "PUNCT", "_", "_", "3", "punct", "_", "_"),
+])
+date, birthday = ["2012-01-01 10:00:00"], ["1950-01-01"]
+
+
+@pytest.fixture(scope="module")
+def processors():
+    return TimeProcessor(), Negator()
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    path = str(tmp_path / "corpus.docs")
+    with CorpusWriter(path) as writer:
+        writer.extend([parse])
+    return path
+
+
+def time_result(docs):
+    return [[(ent.text, ent.ent_id_, ent._.normal_form, ent._.uncertain) for ent in doc.ents] for doc in docs]
+
+
+def negation_result(docs, negator):
+    return negator.convert_to_dataframe(docs).values.tolist()
+
+
+@pytest.mark.parametrize("order", ["time_first", "negations_first"])
+def test_restored_docs_are_processed_by_both_processors(processors, corpus, order):
+    time_processor, negator = processors
+    expected_time = time_result(time_processor.process(parsed_sentences=[parse], date=date, birthday=birthday))
+    expected_negations = negation_result(negator.process(parsed_sentences=[parse]), negator)
+    assert expected_time and expected_time[0]
+    assert expected_negations[0][1]
+
+    # docs restored with a new vocabulary are shared by both processors
+    docs = list(CorpusReader(corpus))
+    if order == "time_first":
+        time_docs = time_processor.process(parsed_sentences=docs, date=date, birthday=birthday)
+        negation_docs = negator.process(parsed_sentences=docs)
+    else:
+        negation_docs = negator.process(parsed_sentences=docs)
+        time_docs = time_processor.process(parsed_sentences=docs, date=date, birthday=birthday)
+    assert time_result(time_docs) == expected_time
+    assert negation_result(negation_docs, negator) == expected_negations
+
+
+def test_docs_of_processor_vocabulary_are_processed_in_place(processors, corpus):
+    time_processor, negator = processors
+    docs = list(CorpusReader(corpus, time_processor.nlp.vocab))
+    time_docs = time_processor.process(parsed_sentences=docs, date=date, birthday=birthday)
+    assert time_docs[0] is docs[0]
+
+    # processed docs are copied, so results of the first processor are kept
+    expected = time_result(time_docs)
+    negation_docs = negator.process(parsed_sentences=docs)
+    again = time_processor.process(parsed_sentences=docs, date=date, birthday=birthday)
+    assert negation_docs[0] is not docs[0] and again[0] is not docs[0]
+    assert time_result(time_docs) == expected == time_result(again)
+
+
+def test_vocab_language_is_not_registered(processors, corpus):
+    from spacy import util
+    assert "" not in util.registry.languages
+    doc = next(iter(CorpusReader(corpus, processors[0].nlp.vocab)))
+    assert doc.vocab.lang == "xx"
@@ -0,0 +1,107 @@
+import itertools
+
+import pytest
+from spacy.language import Language
+from spacy.matcher import Matcher
+from spacy.pipeline import EntityRuler
+from spacy.tokens import Doc
+
+from TimeExpressions import time_patterns
+from TimeExpressions.dispatch import DispatchMatcher, DispatchRuler
+from utils import blank_vocab
+
+# words and lemmas of tagged sentences with time expressions
+sentences = [
+    "Пациент/пациент не/не курит/курить с/с 2008/2008 года/год ./.",
+    "Боли/боль беспокоят/беспокоить в/в течение/течение 3/3 лет/год ./.",
+    "Операция/операция 12.05.2015/12.05.2015 г./г. ,/, повторно/повторно 03.2016/03.2016 ./.",
+    "С/с 10/10 до/до 12/12 часов/час вчера/вчера ./.",
+    "Около/около двух/два недель/неделя назад/назад ухудшение/ухудшение ./.",
+    "В/в мае/май 2010/2010 года/год и/и в/в июне/июнь 2011/2011 года/год ./.",
+    "Последние/последний несколько/несколько месяцев/месяц отмечает/отмечать слабость/слабость ./.",
+    "Ежедневно/ежедневно по/по утрам/утро головокружение/головокружение ./.",
+    "Через/через 2/2 часа/час после/после операции/операция ухудшение/ухудшение ./.",
+    "В/в возрасте/возраст 40/40 лет/год инфаркт/инфаркт ,/, в/в прошлом/прошлый году/год инсульт/инсульт ./.",
+    "Между/между 12:30/12:30 и/и 14:00/14:00 сегодня/сегодня утром/утро ./.",
+    "Примерно/примерно полгода/полгода назад/назад ,/, зимой/зима 2015/2015 г./г. ./.",
+]
+
+# patterns of all operators, which overlap on sequences of letters
+operator_patterns = {
+    "STAR": [[{"ORTH": "a"}, {"ORTH": "b", "OP": "*"}, {"ORTH": "c"}]],
+    "PLUS": [[{"ORTH": "a", "OP": "+"}, {"ORTH": "b"}]],
+    "OPTIONAL": [[{"ORTH": "a"}, {"ORTH": "b", "OP": "?"}, {"ORTH": "c", "OP": "?"}]],
+    "NOT": [[{"ORTH": "a"}, {"ORTH": "b", "OP": "!"}, {"ORTH": "c"}]],
+    "NOT_FIRST": [[{"ORTH": "c", "OP": "!"}, {"ORTH": "c"}]],
+    "OPTIONAL_FIRST": [[{"ORTH": "b", "OP": "?"}, {"ORTH": "c"}]],
+    "STAR_LAST": [[{"ORTH": "c"}, {"TEXT": {"IN": ["a", "b"]}, "OP": "*"}]],
+    "PAIR": [[{"ORTH": "a"}, {"ORTH": "b"}], [{"ORTH": "b"}, {"ORTH": "c"}]],
+}
+
+
+def tagged_doc(vocab, sentence):
+    words, lemmas = zip(*(token.rsplit("/", 1) for token in sentence.split()))
+    doc = Doc(vocab, words=words)
+    for token, lemma in zip(doc, lemmas):
+        token.lemma_ = lemma
+    doc.is_tagged = True
+    return doc
+
+
+def letter_docs(vocab, length=6):
+    for size in range(1, length + 1):
+        for words in itertools.product("abc", repeat=size):
+            doc = Doc(vocab, words=words)
+            doc.is_tagged = True
+            yield doc
+
+
+def entities(ruler, doc):
+    doc.ents = []
+    return [(ent.start, ent.end, ent.label_, ent.ent_id_) for ent in ruler(doc).ents]
+
+
+def check_equivalence(patterns, docs):
+    nlp = Language(blank_vocab())
+    matcher, dispatch_matcher = Matcher(nlp.vocab), DispatchMatcher(nlp.vocab)
+    for key, group in patterns.items():
+        matcher.add(key, None, *group)
+        dispatch_matcher.add(key, group)
+    rulers = []
+    for cls in [EntityRuler, DispatchRuler]:
+        ruler = cls(nlp)
+        ruler.add_patterns([{"label": key, "pattern": pattern, "id": key}
+                            for key, group in patterns.items() for pattern in group])
+        rulers.append(ruler)
+
+    found = 0
+    for doc in docs(nlp.vocab):
+        expected = matcher(doc)
+        assert dispatch_matcher(doc) == expected, doc.text
+        assert entities(rulers[1], doc) == entities(rulers[0], doc), doc.text
+        found += len(expected)
+    return found
+
+
+def test_time_rules_match_like_entity_ruler():
+    patterns = {name: [rule["pattern"]] for name, rule in time_patterns.rules.items()}
+    found = check_equivalence(patterns, lambda vocab: [tagged_doc(vocab, sent) for sent in sentences])
+    assert found > len(sentences)
+
+
+def test_operators_match_like_matcher():
+    assert check_equivalence(operator_patterns, letter_docs) > 0
+
+
+def test_integer_values_are_compared():
+    vocab = blank_vocab()
+    matcher = DispatchMatcher(vocab)
+    matcher.add("TWO", [[{"LENGTH": 2}]])
+    doc = Doc(vocab, words=["ab", "c", "de", "fgh"])
+    assert [(start, end) for _, start, end in matcher(doc)] == [(0, 1), (2, 3)]
+
+
+@pytest.mark.parametrize("spec", [{"LEMA": "год"}, {"LENGTH": 2.0}, {"ORTH": None}])
+def test_unsupported_specs_are_rejected(spec):
+    with pytest.raises(ValueError):
+        DispatchMatcher(blank_vocab()).add("KEY", [[spec]])
@@ -0,0 +1,100 @@
+import pickle
+
+from negations.negations import Negator
+from utils import DependencyRange, blank_vocab, parsed_doc
+
+
+def conllu(rows):
+    return "\n".join("\t".join((i, word, lemma, pos, "_", "_", head, dep, "_", "_"))
+                     for i, word, lemma, pos, head, dep in rows)
+
+
+parse = "\n".join("\t".join(row) for row in [
+    ("1", "Пациент", "пациент", "NOUN", "_", "_", "3", "nsubj", "_", "_"),
+    ("2", "не", "не", "PART", "_", "_", "3", "advmod", "_", "_"),
+    ("3", "курит", "курить", "VERB", "_", "_", "0", "root", "_", "SpaceAfter=No"),
+    ("4", ".", ".", "PUNCT", "_", "_", "3", "punct", "_", "_"),
+])
+
+
+def test_cached_negations_keep_docs_serializable():
+    negator = Negator()
+    doc = negator.process(parsed_sentences=[parse], eager=True)[0]
+    expected = [([token.text for token in ent._.neg_expr], [token.text for token in ent._.neg_ent]) for ent in doc.ents]
+    assert expected == [(["не", "курит", "Пациент"], ["Пациент"])]
+    assert negator.stats["neg_expr_computed"] == 1
+
+    assert not doc.user_data
+    doc.to_bytes()
+    restored = pickle.loads(pickle.dumps(doc))
+    assert [token.text for token in restored] == [token.text for token in doc]
+
+    # the second access reuses cached tokens of the same doc
+    assert [([token.text for token in ent._.neg_expr], [token.text for token in ent._.neg_ent])
+            for ent in doc.ents] == expected
+    assert negator.stats["neg_expr_computed"] == 1 and negator.stats["neg_expr_reused"] >= 1
+    assert all(token.doc is doc for ent in doc.ents for token in ent._.neg_expr)
+
+
+def test_repeated_negated_word():
+    repeated = conllu([
+        ("1", "Кашель", "кашель", "NOUN", "2", "nsubj"),
+        ("2", "был", "быть", "VERB", "0", "root"),
+        ("3", ",", ",", "PUNCT", "6", "punct"),
+        ("4", "кашель", "кашель", "NOUN", "6", "nsubj"),
+        ("5", "не", "не", "PART", "6", "advmod"),
+        ("6", "беспокоит", "беспокоить", "VERB", "2", "conj"),
+        ("7", ".", ".", "PUNCT", "2", "punct"),
+    ])
+    negator = Negator()
+    for eager in [True, False]:
+        doc = negator.process(parsed_sentences=[repeated], eager=eager)[0]
+        assert [([token.i for token in ent._.neg_expr], [token.i for token in ent._.neg_ent])
+                for ent in doc.ents] == [([4, 5, 3], [3])]
+
+
+tree = conllu([
+    ("1", "Боли", "боль", "NOUN", "4", "nsubj"),
+    ("2", "в", "в", "ADP", "3", "case"),
+    ("3", "груди", "грудь", "NOUN", "1", "nmod"),
+    ("4", "беспокоят", "беспокоить", "VERB", "0", "root"),
+    ("5", "около", "около", "ADP", "7", "case"),
+    ("6", "трех", "три", "NUM", "7", "nummod"),
+    ("7", "лет", "год", "NOUN", "4", "obl"),
+    ("8", ",", ",", "PUNCT", "10", "punct"),
+    ("9", "не", "не", "PART", "10", "advmod"),
+    ("10", "проходят", "проходить", "VERB", "4", "conj"),
+    ("11", "после", "после", "ADP", "12", "case"),
+    ("12", "отдыха", "отдых", "NOUN", "10", "obl"),
+    ("13", ".", ".", "PUNCT", "4", "punct"),
+])
+
+
+def copy_signature(doc):
+    return [(token.head.i, token.dep_, [child.i for child in token.children], [child.i for child in token.subtree])
+            for token in doc]
+
+
+def range_signature(dependency_range):
+    start = dependency_range.start
+    return [(dependency_range.head(token).i - start, dependency_range.dep(token),
+             [child.i - start for child in dependency_range.children(token)],
+             [child.i - start for child in dependency_range.subtree(token)])
+            for token in dependency_range]
+
+
+def test_dependency_range_matches_span_copies():
+    doc = parsed_doc(blank_vocab(), tree)
+    for start in range(len(doc)):
+        for end in range(start + 1, len(doc) + 1):
+            outer, copy = DependencyRange(doc, start, end), doc[start:end].as_doc()
+            assert range_signature(outer) == copy_signature(copy)
+            assert [root - start for root in outer.roots] == [token.i for token in copy if token.head.i == token.i]
+            # ranges of parts of sentence are built from the tree of the enclosing range
+            for inner_start in range(start, end):
+                for inner_end in range(inner_start + 1, end + 1):
+                    inner = DependencyRange(doc, inner_start, inner_end, parent=outer)
+                    inner_copy = copy[inner_start - start:inner_end - start].as_doc()
+                    assert range_signature(inner) == copy_signature(inner_copy)
+                    assert ([root - inner_start for root in inner.roots] ==
+                            [token.i for token in inner_copy if token.head.i == token.i])
@@ -0,0 +1,22 @@
+import pytest
+
+pytest.importorskip("deeppavlov")
+
+from syntax.parser import Parser, ParserPool
+
+sentences = [
+    "Пациент не курит с 2008 года.",
+    "Боли в груди беспокоят около 3 лет.",
+    "Операция 12.05.2015.",
+    "Отмечает слабость, головокружение и одышку при нагрузке.",
+    "Наследственность не отягощена.",
+    "АД 130/80 мм рт. ст.",
+    "Госпитализирован вчера.",
+]
+
+
+def test_pool_parses_like_parser():
+    parser = Parser()
+    expected = parser.parse(list(sentences))
+    with ParserPool(processes=2, chunk=2) as pool:
+        assert pool.parse(list(sentences)) == expected
@@ -0,0 +1,74 @@
+import pytest
+
+from benchmarks import reference_pre_process_sentence
+from syntax.parser import Parser
+from utils import pre_process_sentence, apply_pre_process_steps, pre_process_cache, pre_process_batch, segment_sentence
+
+sentences = [
+    "Болеет СД 2 типа в течении 5 лет",
+    "Считает себя больной с 1993 года, когда перенесла гинекологическую операцию.",
+    "Около трех лет назад у пациента синусовый ритм был восстановлен ЭИТ.",
+    "Госпитализирован 12.03.2010г.в 14:30 с жалобами на боли",
+    "В 2008г.,после ОРВИ  появилась  одышка",
+    "Ухудшение с 6.12.-10.12.2010, затем 6.12-10.12.10",
+    "Лечился 16.07.12-23.07.2012 и 16.07.12-23.07.12 в стационаре",
+    "Эпизоды 10-13.09.2011, 10–13.09.11 , 10-13/09/11",
+    "Даты 01-02-2011, 1/2/11, 03.2011, 03/11, 7-45 и 23:59",
+    "Пациент 67 лет, пациентка 45 лет. Пациентка 3 лет",
+    "в 2-х лет назад, 3- х кратно, в 5- е сутки, 5 е сутки",
+    "Боли в груди --- сильные,,, длительные... после нагрузки::",
+    "После операции.-отмечает слабость.:иногда.,редко 2.,3",
+    "АД 140/90 мм рт.ст,ЧСС 80 уд/мин",
+    "Пациент-мужчина,курит 20лет,стаж–большой",
+    "в 2010,2011 и 2012, годах; г.Москва и г. Тула",
+    "Анализы от 05.05.2015г., 06.06.15г и 7.7.2015-",
+    "Жалобы\tна\nкашель  в течение  двух недель",
+    "Принимает аспирин 75мг/сут.",
+    "с 1999-2001 гг. наблюдался у кардиолога",
+]
+
+
+@pytest.mark.parametrize("sentence", sentences)
+def test_compiled_steps_match_reference(sentence):
+    assert apply_pre_process_steps(sentence) == reference_pre_process_sentence(sentence)
+
+
+@pytest.mark.parametrize("sentence", sentences)
+def test_memoized_sentence_matches_reference(sentence):
+    pre_process_cache.clear()
+    expected = reference_pre_process_sentence(sentence)
+    assert pre_process_sentence(sentence) == expected
+    # the second call is served from the cache
+    assert pre_process_sentence(sentence) == expected
+
+
+def test_batch_matches_sentences():
+    batch = sentences + sentences[::-1]
+    assert pre_process_batch(batch, processes=1) == [reference_pre_process_sentence(sent) for sent in batch]
+
+
+@pytest.mark.parametrize("missing", [float("nan"), None])
+def test_batch_rejects_missing_sentences(missing):
+    with pytest.raises(TypeError):
+        pre_process_sentence(missing)
+    with pytest.raises(TypeError):
+        pre_process_batch([sentences[0], missing, sentences[1]], processes=1)
+
+
+@pytest.mark.parametrize("max_length", [0, -1])
+def test_segment_rejects_short_max_length(max_length):
+    with pytest.raises(ValueError):
+        segment_sentence("Боли в груди . Слабость", max_length)
+    with pytest.raises(ValueError):
+        Parser(lazy=True).parse(["Боли в груди . Слабость"], max_length=max_length)
+
+
+def test_parser_preprocess_stays_in_process(monkeypatch):
+    import concurrent.futures
+
+    def executor(*args, **kwargs):
+        raise AssertionError("Parser.preprocess started a process pool")
+
+    monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", executor)
+    sentences = ["Боли {} дней".format(i) for i in range(20000)]
+    assert Parser.preprocess(sentences) == [pre_process_sentence(sent) for sent in sentences]
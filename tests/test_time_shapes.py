@@ -0,0 +1,81 @@
+import itertools
+import re
+
+import pytest
+from spacy.tokens import Doc
+from spacy.vocab import Vocab
+
+from TimeExpressions import time_patterns
+from TimeExpressions.dispatch import DispatchMatcher
+from TimeExpressions.time_patterns import shapes, token_shapes, shape
+
+numbers = ["1", "3", "9", "01", "12", "13", "24", "31", "32", "59", "60", "99", "123", "1899", "1999", "2010", "2099"]
+separators = [".", "-", "–", ":", ",", "/", "x"]
+
+
+def sample_words():
+    """
+    Words of digits and separators, which have all kinds of shapes and their combinations.
+    """
+    words = set(numbers) | {"x", "1.5", "1,5", "12.05.", "12.05x", "10-13.09.2011", "10–13.09.11",
+                            "10-13x09x2011", "a1-2b", "٣", "٣٣.12", "1-2-3", "2010г", "г.", "12.051"}
+    for first, separator, second in itertools.product(numbers, separators, numbers):
+        words.add(first + separator + second)
+        for end in separators:
+            words.add(first + separator + second + end)
+    short = ["1", "12", "31", "99", "2010"]
+    for first, separator1, second, separator2, third in itertools.product(short, separators, short, separators, short):
+        words.add(first + separator1 + second + separator2 + third)
+    return sorted(words)
+
+
+words = sample_words()
+
+
+def word_shapes():
+    return [(token.text, token._.time_shape) for token in Doc(Vocab(), words=words)]
+
+
+def test_shapes_are_regular_expressions_of_words():
+    values = {name: set(token_shapes.values(name)) for name in shapes}
+    for word, shape_value in word_shapes():
+        for name, regex in shapes.items():
+            assert (shape_value in values[name]) == bool(re.search(regex, word)), (word, name)
+
+
+def test_found_combinations_are_generated():
+    found = {shape_value for _, shape_value in word_shapes()} - {""}
+    assert len(found) > 40
+    assert found <= set(token_shapes.combinations)
+
+
+def regex_rules():
+    """
+    Rules, where shapes are checked by their regular expressions, as before shapes of words.
+    """
+    specs = {repr(shape(name)): {"TEXT": {"REGEX": regex}} for name, regex in shapes.items()}
+    return {name: [[specs.get(repr(spec), spec) for spec in rule["pattern"]]]
+            for name, rule in time_patterns.rules.items()}
+
+
+@pytest.mark.parametrize("text", [
+    "с 12.05.2010 по 13.05.10 в 10:30 и 7-45",
+    "10-13.09.2011 и 10–13.09.11 , 05.2010 05/10",
+    "в 2010 г 2 раза 1-2 дня 3 года назад 1,5 месяца",
+    "31.12 , 12.05. 2008-2010 гг 12.051",
+])
+def test_rules_with_shapes_match_as_regular_expressions(text):
+    vocab = Vocab()
+    matchers = []
+    for rules in [{name: [rule["pattern"]] for name, rule in time_patterns.rules.items()}, regex_rules()]:
+        matcher = DispatchMatcher(vocab)
+        for name, patterns in rules.items():
+            matcher.add(name, patterns)
+        matchers.append(matcher)
+    doc = Doc(vocab, words=text.split())
+    for token in doc:
+        token.lemma_ = token.text.lower()
+    doc.is_tagged = True
+    matches = matchers[0](doc)
+    assert matches
+    assert matches == matchers[1](doc)
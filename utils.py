@@ -1,11 +1,394 @@
+from collections import OrderedDict
+import copy
+from datetime import datetime
+from spacy.attrs import DEP, HEAD, LANG
 from spacy.tokens import Doc, Token
-import pandas as pd
+from spacy.vocab import Vocab
+import threading
+import weakref
+import numpy
 import re
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:
+    # python before 3.11
+    import sre_parse
+    import sre_constants
+
+
+class LRUCache:
+    """
+    Bounded thread-safe cache, which removes least recently used items when it is full.
+    Parameters
+    ----------
+    maxsize : int, (default=100000)
+        Maximum number of items. Nothing is stored if it is 0.
+
+    Attributes
+    ----------
+    hits : int
+        The total number of found keys.
+    misses : int
+        The total number of missing keys.
+    evictions : int
+        The total number of removed items.
+    """
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """
+        Get value of the key and mark it as recently used.
+        """
+        with self.lock:
+            try:
+                value = self.data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self.data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Store value of the key and remove least recently used items over maxsize.
+        """
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            self.shrink()
+
+    def shrink(self):
+        """
+        Remove least recently used items over maxsize. It is called with acquired lock.
+        """
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+            self.evictions += 1
+
+    def resize(self, maxsize):
+        """
+        Change maximum number of items.
+        """
+        with self.lock:
+            self.maxsize = maxsize
+            self.shrink()
+
+    def clear(self):
+        """
+        Remove all items and reset statistics.
+        """
+        with self.lock:
+            self.data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        """
+        Get statistics of the cache.
+
+        Returns
+        -------
+        result : dict
+            Hits, misses, evictions, hit rate, current and maximum size.
+        """
+        with self.lock:
+            total = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'hit_rate': self.hits / total if total else 0.0,
+                    'size': len(self.data), 'maxsize': self.maxsize}
+
+    def __len__(self):
+        return len(self.data)
+
+
+# extensions of tokens, which depend on their words only, by names. They are computed from words
+# of CONLL-U too, e.g. by TriggerIndex.
+text_extensions = dict()
+
+
+def set_text_extension(name, func):
+    """
+    Set extension of tokens, whose value is computed from the word of token.
+    Parameters
+    ----------
+    name : str
+        Name of extension.
+    func : callable
+        Function of word, which gives value of extension.
+    """
+    text_extensions[name] = func
+    Token.set_extension(name, getter=lambda token: func(token.text), force=True)
+
+
+set_text_extension("is_digit", str.isnumeric)
+
+
+def regex_automaton(regex):
+    """
+    Build nondeterministic automaton of regular expression for shape_combinations.
+    Literals, classes of chars with ranges and digits, any char, groups, alternatives, repeats
+    and anchors ^, $ are supported, other constructs raise ValueError.
+    Parameters
+    ----------
+    regex : str
+        Regular expression.
+
+    Returns
+    -------
+    nodes : list
+        Nodes [kind, argument, next nodes], where kind is 'char' with set of chars or test function,
+        'empty', 'begin', 'end' or 'final'.
+    start : int
+        Index of the start node.
+    chars : set
+        Chars mentioned in the expression.
+    """
+    nodes = [["final", None, []]]
+    chars = set()
+
+    def node(kind, arg, nexts):
+        nodes.append([kind, arg, nexts])
+        return len(nodes) - 1
+
+    def char_test(op, arg, negate=False):
+        if op == sre_constants.LITERAL:
+            chars.add(chr(arg))
+            return lambda char: (char == chr(arg)) != negate
+        if op == sre_constants.NOT_LITERAL:
+            return char_test(sre_constants.LITERAL, arg, not negate)
+        if op == sre_constants.ANY:
+            return lambda char: not negate
+        if op == sre_constants.RANGE:
+            chars.update(chr(code) for code in range(arg[0], arg[1] + 1))
+            return lambda char: (arg[0] <= ord(char) <= arg[1]) != negate
+        if op == sre_constants.CATEGORY and arg in (sre_constants.CATEGORY_DIGIT, sre_constants.CATEGORY_NOT_DIGIT):
+            digit = arg == sre_constants.CATEGORY_DIGIT
+            return lambda char: (char.isdecimal() == digit) != negate
+        if op == sre_constants.IN:
+            negated = bool(arg) and arg[0][0] == sre_constants.NEGATE
+            tests = [char_test(item_op, item_arg) for item_op, item_arg in arg[negated:]]
+            return lambda char: any(test(char) for test in tests) != (negated != negate)
+        raise ValueError("Unsupported construct {} in shape {!r}".format(op, regex))
+
+    def sequence(items, cont):
+        for op, arg in reversed(list(items)):
+            cont = item(op, arg, cont)
+        return cont
+
+    def item(op, arg, cont):
+        if op in (sre_constants.LITERAL, sre_constants.NOT_LITERAL, sre_constants.ANY, sre_constants.IN):
+            return node("char", char_test(op, arg), [cont])
+        if op == sre_constants.BRANCH:
+            return node("empty", None, [sequence(branch, cont) for branch in arg[1]])
+        if op == sre_constants.SUBPATTERN:
+            if arg[1] & ~re.DOTALL or arg[2]:
+                raise ValueError("Unsupported flags in shape {!r}".format(regex))
+            return sequence(arg[3], cont)
+        if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            low, high, items = arg
+            if high == sre_constants.MAXREPEAT:
+                loop = node("empty", None, [])
+                nodes[loop][2] = [sequence(items, loop), cont]
+                tail = loop
+            else:
+                tail = cont
+                for _ in range(high - low):
+                    tail = node("empty", None, [sequence(items, tail), cont])
+            for _ in range(low):
+                tail = sequence(items, tail)
+            return tail
+        if op == sre_constants.AT and arg in (sre_constants.AT_BEGINNING, sre_constants.AT_BEGINNING_STRING):
+            return node("begin", None, [cont])
+        if op == sre_constants.AT and arg in (sre_constants.AT_END, sre_constants.AT_END_STRING):
+            return node("end", None, [cont])
+        raise ValueError("Unsupported construct {} in shape {!r}".format(op, regex))
+
+    parsed = sre_parse.parse(regex)
+    # state of parser is named pattern before python 3.11
+    flags = (parsed.state if hasattr(parsed, "state") else parsed.pattern).flags
+    if flags & ~(re.UNICODE | re.DOTALL):
+        raise ValueError("Unsupported flags in shape {!r}".format(regex))
+    return nodes, sequence(parsed, 0), chars
+
+
+def shape_combinations(shapes):
+    """
+    Find all combinations of shapes, which words can have, i.e. sets of regular expressions, which are found
+    together by re.search in some word. Words are supposed to have no line breaks, like tokens of CONLL-U.
+    Automata of all expressions are run together on classes of chars, which are not distinguished
+    by the expressions, and every reachable state gives the combination of words ending there.
+    Parameters
+    ----------
+    shapes : dict
+        Regular expressions by names of shapes.
+
+    Returns
+    -------
+    result : list
+        Sorted combinations of names of shapes, which words can have, except the empty one.
+    """
+    names = list(shapes)
+    automata = [regex_automaton(regex) for regex in shapes.values()]
+    # one char of every class: mentioned chars, other digits and other chars
+    chars = set().union(*(mentioned for _, _, mentioned in automata))
+    chars.add(next(char for char in "x\u044f\u2603" if char not in chars))
+    chars.add(next(char for char in "\u0663\u0967\uff13" if char not in chars))
+    chars.discard("\n")
+    tests = [arg for nodes, _, _ in automata for kind, arg, _ in nodes if kind == "char"]
+    classes = dict()
+    for char in sorted(chars):
+        classes.setdefault(tuple(test(char) for test in tests), char)
+    chars = list(classes.values())
+
+    def closure(nodes, states, first, last):
+        result, stack = set(), list(states)
+        while stack:
+            state = stack.pop()
+            if state in result:
+                continue
+            result.add(state)
+            kind, _, nexts = nodes[state]
+            if kind == "empty" or kind == "begin" and first or kind == "end" and last:
+                stack.extend(nexts)
+        return frozenset(state for state in result if nodes[state][0] in ("char", "end", "final"))
+
+    def found(states, first):
+        # expressions found in word, which ends in states
+        return frozenset(name for name, (nodes, _, _), state in zip(names, automata, states)
+                         if 0 in closure(nodes, state, first, True))
+
+    start = (tuple(closure(nodes, [begin], True, False) for nodes, begin, _ in automata), frozenset(), True)
+    seen = {start}
+    queue = [start]
+    result = set()
+    while queue:
+        states, matched, first = queue.pop()
+        result.add(matched | found(states, first))
+        for char in chars:
+            next_states = tuple(
+                closure(nodes, [next_node for state in current if nodes[state][0] == "char" and nodes[state][1](char)
+                                for next_node in nodes[state][2]] + [begin], False, False)
+                for (nodes, begin, _), current in zip(automata, states))
+            next_matched = matched | frozenset(name for name, state in zip(names, next_states) if 0 in state)
+            key = (next_states, next_matched, False)
+            if key not in seen:
+                seen.add(key)
+                queue.append(key)
+    result.discard(frozenset())
+    return sorted(sorted(combination, key=names.index) for combination in result)
+
+
+class TokenShapes:
+    """
+    Shapes of words, i.e. names of regular expressions found in them. All expressions are checked
+    by one combined regular expression, which is matched once per word, and results are cached.
+    Shape of word is the string of names of its expressions joined by '|' in the order of shapes
+    or empty string. Patterns check shapes by their combinations, which words can have.
+    They are found from the expressions by shape_combinations, so every word has one of them.
+    Parameters
+    ----------
+    shapes : dict
+        Regular expressions by names of shapes.
+    cache_size : int, (default=100000)
+        Maximum number of words in the cache.
+
+    Attributes
+    ----------
+    regex : re.Pattern
+        Combined regular expression, where every expression is an optional lookahead group.
+    combinations : list
+        Combinations of shapes, which words can have, joined by '|'.
+    cache : LRUCache
+        Shapes of words.
+
+    Examples
+    --------
+    >>> shapes = TokenShapes({"year": r"^[0-9]{4}$", "number": r"^[0-9]+$"})
+    >>> shapes("2007")
+    'year|number'
+    >>> shapes.values("year")
+    ['year|number']
+    """
+
+    def __init__(self, shapes, cache_size=100000):
+        self.names = list(shapes)
+        # expressions are searched from the start of word like re.search
+        self.regex = re.compile("".join("(?=(?P<{}>(?s:.*?)(?:{}))?)".format(name, regex)
+                                        for name, regex in shapes.items()))
+        self.combinations = ["|".join(combination) for combination in shape_combinations(shapes)]
+        self.cache = LRUCache(cache_size)
+
+    def __call__(self, word):
+        """
+        Get shape of word.
+        Parameters
+        ----------
+        word : str
+            Word.
+
+        Returns
+        -------
+        result : str
+            Names of shapes joined by '|'.
+        """
+        shape = self.cache.get(word)
+        if shape is None:
+            groups = self.regex.match(word).groupdict()
+            shape = "|".join(name for name in self.names if groups[name] is not None)
+            self.cache.put(word, shape)
+        return shape
+
+    def values(self, *names):
+        """
+        Get shapes of words, which have any of shapes.
+        Parameters
+        ----------
+        names : str
+            Names of shapes.
+
+        Returns
+        -------
+        result : list
+            Combinations of shapes joined by '|'.
+        """
+        return [shape for shape in self.combinations if set(shape.split("|")) & set(names)]
+
+def multi_language(string):
+    """
+    Language of lexemes of blank_vocab.
+    """
+    return "xx"
+
+
+def blank_vocab():
+    """
+    Create empty vocabulary of processors.
+    Docs look up language class of their vocab to get noun chunker. Vocab() has no language and
+    the failed import of it is repeated for every new Doc, so the vocabulary gets multi-language code 'xx',
+    which class is imported by spacy once and has no noun chunker.
+
+    Returns
+    -------
+    result : Spacy vocab
+    """
+    return Vocab(lex_attr_getters={LANG: multi_language})
+
+# dependency attributes filled in bulk by doc_from_conllu
+conllu_attrs = [HEAD, DEP]
 
 
 def doc_from_conllu(vocab, lines):
     """
     Convert conllu string to spacy doc
+    Dependency tree is set by one Doc.from_array call, which builds children and edges
+    of all tokens at once instead of updating them after every assignment of a head.
     Parameters
     ----------
     vocab : Spacy vocab
@@ -17,53 +400,686 @@ def doc_from_conllu(vocab, lines):
     -------
     result : Spacy doc
     """
-    words, spaces, tags, poses, morphs, lemmas = [], [], [], [], [], []
-    heads, deps = [], []
-    Token.set_extension(
-        "is_digit", getter=lambda token: token.text.isnumeric(), force=True)
-    for i in range(len(lines)):
-        line = lines[i]
+    words, spaces, tags, poses, lemmas, rows = [], [], [], [], [], []
+    add = vocab.strings.add
+    for line in lines:
         parts = line.split("\t")
         id_, word, lemma, pos, tag, morph, head, dep, _1, misc = parts
         if "." in id_ or "-" in id_:
             continue
-        if "SpaceAfter=No" in misc:
-            spaces.append(False)
-        else:
-            spaces.append(True)
+        spaces.append("SpaceAfter=No" not in misc)
 
         id_ = int(id_) - 1
         head = (int(head) - 1) if head not in ("0", "_") else id_
         tag = pos if tag == "_" else tag
-        morph = morph if morph != "_" else ""
         dep = "ROOT" if dep == "root" else dep
 
+        # heads are stored as offsets from tokens, negative ones are wrapped to uint64
+        rows.append(((head - len(words)) & 0xFFFFFFFFFFFFFFFF, add(dep)))
         words.append(word)
         lemmas.append(lemma)
         poses.append(pos)
         tags.append(tag)
-        morphs.append(morph)
-        heads.append(head)
-        deps.append(dep)
 
     doc = Doc(vocab, words=words, spaces=spaces)
-    for i in range(len(doc)):
-        doc[i].tag_ = tags[i]
-        doc[i].pos_ = poses[i]
-        doc[i].dep_ = deps[i]
-        doc[i].lemma_ = lemmas[i]
-        doc[i].head = doc[heads[i]]
+    for token, tag, pos, lemma in zip(doc, tags, poses, lemmas):
+        token.tag_ = tag
+        token.pos_ = pos
+        token.lemma_ = lemma
+    if rows:
+        doc.from_array(conllu_attrs, numpy.array(rows, dtype="uint64"))
     doc.is_parsed = True
     doc.is_tagged = True
 
     return doc
 
 
+def copy_doc(vocab, doc, parsed=True):
+    """
+    Copy words, tags, lemmas and dependency tree of doc into a new doc of the vocabulary.
+    Entities and user data, e.g. results of other processors, are not copied.
+    Parameters
+    ----------
+    vocab : Spacy vocab
+        Spacy model vocabulary.
+    doc : Spacy doc
+        Parsed sentence, e.g. restored by syntax.corpus.CorpusReader.
+    parsed : bool, (default=True)
+        Flag, which allows to copy tags, lemmas and dependency tree. Only words and whitespaces are copied if False.
+
+    Returns
+    -------
+    result : Spacy doc
+    """
+    words = [token.text for token in doc]
+    result = Doc(vocab, words=words, spaces=[bool(token.whitespace_) for token in doc])
+    if not parsed:
+        return result
+    if doc.vocab is not vocab:
+        add = vocab.strings.add
+        for token in doc:
+            add(token.tag_)
+            add(token.dep_)
+            add(token.lemma_)
+    for token, source in zip(result, doc):
+        token.tag = source.tag
+        token.pos = source.pos
+        token.lemma = source.lemma
+    if words:
+        result.from_array(conllu_attrs, doc.to_array(conllu_attrs))
+    result.is_parsed = doc.is_parsed
+    result.is_tagged = doc.is_tagged
+    return result
+
+
+def clean_doc(vocab, doc):
+    """
+    Check, that doc can be processed in place: it belongs to the vocabulary and has no entities,
+    user data and cached values, i.e. results and caches of processors.
+    """
+    return doc.vocab is vocab and not doc.ents and not doc.user_data and doc not in doc_caches
+
+
+def parsed_doc(vocab, parse):
+    """
+    Get spacy doc of parsed sentence.
+    Parameters
+    ----------
+    vocab : Spacy vocab
+        Spacy model vocabulary.
+    parse : str, Spacy doc
+        Sentence in CONLL-U or doc, e.g. restored by syntax.corpus.CorpusReader. Doc of the vocabulary
+        without entities and user data is returned as is, other docs, e.g. processed by another processor
+        or restored with another vocabulary, are copied.
+
+    Returns
+    -------
+    result : Spacy doc
+    """
+    if isinstance(parse, Doc):
+        return parse if clean_doc(vocab, parse) else copy_doc(vocab, parse)
+    return doc_from_conllu(vocab, parse.split("\n"))
+
+
+def plain_doc(vocab, parse):
+    """
+    Get spacy doc of sentence with words and whitespaces only, without tags, lemmas and dependency tree.
+    Parameters
+    ----------
+    vocab : Spacy vocab
+        Spacy model vocabulary.
+    parse : str, Spacy doc
+        Sentence in CONLL-U or doc, which is returned as is or copied as in parsed_doc.
+
+    Returns
+    -------
+    result : Spacy doc
+    """
+    if isinstance(parse, Doc):
+        return parse if clean_doc(vocab, parse) else copy_doc(vocab, parse, parsed=False)
+    words, spaces = [], []
+    for line in parse.split("\n"):
+        parts = line.split("\t")
+        if "." in parts[0] or "-" in parts[0]:
+            continue
+        words.append(parts[1])
+        spaces.append("SpaceAfter=No" not in parts[9])
+    return Doc(vocab, words=words, spaces=spaces)
+
+
+class TriggerIndex:
+    """
+    Index of tokens required by token patterns of the rule set.
+    Every required token of pattern gives conditions on its word (TEXT), lemma (LEMMA), part of speech (POS),
+    regular expression (TEXT REGEX) or extensions computed from words (e.g. _ is_digit, see set_text_extension).
+    A sentence, whose tokens can't satisfy all conditions of any pattern, can't be matched by the rules.
+    It is checked by columns of CONLL-U without spacy doc. If some pattern has only optional tokens or attributes, which are not indexed,
+    every sentence is accepted.
+    Parameters
+    ----------
+    patterns : list
+        List of token patterns of Matcher or EntityRuler.
+    cache_size : int, (default=100000)
+        Maximum number of words in the cache of their regular expressions and extensions.
+
+    Attributes
+    ----------
+    conditions : list
+        Conditions of every pattern, i.e. attributes and sets of their values, one of which is required.
+    leads : dict
+        Indices of patterns by values of their first conditions by attributes.
+    regexes : dict
+        Compiled regular expressions of conditions.
+    extensions : set
+        Names of extensions of conditions.
+    regex : re.Pattern, None
+        Union of regular expressions, which is checked before every one of them.
+    complete : bool
+        Flag, that every pattern has conditions, otherwise all sentences are accepted.
+    form_cache : LRUCache
+        Regular expressions and values of extensions of words.
+
+    Examples
+    --------
+    >>> from utils import TriggerIndex
+    >>> triggers = TriggerIndex([[{"LEMMA": "не"}, {"POS": "VERB"}]])
+    >>> triggers.check(parse)
+    """
+
+    def __init__(self, patterns, cache_size=100000):
+        self.conditions = []
+        self.regexes = dict()
+        self.extensions = set()
+        self.complete = True
+        self.form_cache = LRUCache(cache_size)
+        for pattern in patterns:
+            conditions = self.pattern_conditions(pattern)
+            if not conditions:
+                self.complete = False
+            elif conditions not in self.conditions:
+                self.conditions.append(conditions)
+        # patterns are found by values of their first condition, the one with the fewest alternatives,
+        # and only found ones are checked by other conditions
+        self.leads = {"TEXT": dict(), "LEMMA": dict(), "POS": dict(), "REGEX": dict(), "_": dict()}
+        for i, conditions in enumerate(self.conditions):
+            conditions.sort(key=lambda condition: len(condition[1]))
+            attr, condition = conditions[0]
+            for value in condition:
+                self.leads[attr].setdefault(value, []).append(i)
+        self.regex = re.compile("|".join("(?:{})".format(value) for value in self.regexes)) if self.regexes else None
+        self.regexes = {value: re.compile(value) for value in self.regexes}
+
+    def pattern_conditions(self, pattern):
+        """
+        Get conditions of required tokens of pattern.
+        Parameters
+        ----------
+        pattern : list
+            Token pattern.
+
+        Returns
+        -------
+        result : list
+            List of attributes and sets of their values, one value of every set is required.
+        """
+        conditions = []
+        for spec in pattern:
+            if spec.get("OP", "1") not in ("1", "+"):
+                continue
+            for attr, value in spec.items():
+                if attr in ("TEXT", "LEMMA", "POS") and isinstance(value, str):
+                    condition = (attr, frozenset([value]))
+                elif attr in ("TEXT", "LEMMA", "POS") and set(value) == {"IN"}:
+                    condition = (attr, frozenset(value["IN"]))
+                elif attr == "TEXT" and set(value) == {"REGEX"}:
+                    condition = ("REGEX", frozenset([value["REGEX"]]))
+                    self.regexes[value["REGEX"]] = None
+                elif attr == "_" and len(value) == 1 and list(value)[0] in text_extensions:
+                    name, values = list(value.items())[0]
+                    if not isinstance(values, dict):
+                        values = {"IN": [values]}
+                    elif set(values) != {"IN"}:
+                        continue
+                    condition = ("_", frozenset((name, item) for item in values["IN"]))
+                    self.extensions.add(name)
+                else:
+                    continue
+                if condition not in conditions:
+                    conditions.append(condition)
+        return conditions
+
+    def values(self, parse):
+        """
+        Get values of attributes of tokens of sentence.
+        Parameters
+        ----------
+        parse : str, Spacy doc
+            Sentence in CONLL-U or doc.
+
+        Returns
+        -------
+        result : dict
+            Sets of values of all tokens by attributes of conditions.
+        """
+        if isinstance(parse, Doc):
+            tokens = [(token.text, token.lemma_, token.pos_) for token in parse]
+        else:
+            tokens = [line.split("\t", 4)[1:4] for line in parse.split("\n")]
+        forms = {token[0] for token in tokens}
+        matched = set()
+        for form in forms:
+            form_values = self.form_cache.get(form)
+            if form_values is None:
+                form_values = self.form_values(form)
+                self.form_cache.put(form, form_values)
+            matched.update(form_values)
+        return {"TEXT": forms, "LEMMA": {token[1] for token in tokens}, "POS": {token[2] for token in tokens},
+                "REGEX": matched, "_": matched}
+
+    def form_values(self, form):
+        """
+        Get values of extensions and regular expressions matched by word.
+        Parameters
+        ----------
+        form : str
+            Word.
+
+        Returns
+        -------
+        result : tuple
+            Values of extensions (name, value) and regular expressions found in word.
+        """
+        values = [(name, text_extensions[name](form)) for name in self.extensions]
+        if self.regex is not None and self.regex.search(form):
+            values.extend(value for value, regex in self.regexes.items() if regex.search(form))
+        return tuple(values)
+
+    def check(self, parse):
+        """
+        Check whether sentence can be matched by any pattern.
+        Parameters
+        ----------
+        parse : str, Spacy doc
+            Sentence in CONLL-U or doc.
+
+        Returns
+        -------
+        result : bool
+            False if no pattern can match the sentence.
+        """
+        if not self.complete:
+            return True
+        values = self.values(parse)
+        candidates = set()
+        for attr, leads in self.leads.items():
+            for value in values[attr]:
+                if value in leads:
+                    candidates.update(leads[value])
+        for i in candidates:
+            for attr, condition in self.conditions[i][1:]:
+                if condition.isdisjoint(values[attr]):
+                    break
+            else:
+                return True
+        return False
+
+
+# types of dependencies corresponding to relative clauses
+clause_deps = ["conj", "parataxis", "acl:relcl", "advcl"]
+
+
+class DependencyRange:
+    """
+    Dependency tree of tokens between start and end of parsed sentence.
+    It is used instead of the copy made by Span(doc, start, end).as_doc() and has the same tree:
+    tokens, whose heads are outside the range, get 'dep' dependency and are attached to their farthest
+    ancestor in the range or to an artificial root. Tokens are the tokens of the original doc.
+    The tree is indexed once: subtrees are intervals of the tour, which visits left subtrees,
+    the token and right subtrees like Token.subtree, so their size and containment are found in O(1).
+    Parameters
+    ----------
+    doc : Spacy doc
+        Parsed sentence.
+    start : int, (default=0)
+        Index of the first token.
+    end : int, (default=None)
+        Index of the token after the last one, the end of doc if None.
+    parent : DependencyRange, (default=None)
+        Range, which contains this one. Its tree is used instead of the tree of doc.
+
+    Attributes
+    ----------
+    roots : list
+        Indices of roots in the order of the sentence.
+    order : list
+        Indices of tokens in the order of the tour.
+    depth : dict
+        Depth of tokens by their indices, roots have depth 0.
+
+    Examples
+    --------
+    >>> tree = DependencyRange(doc, 3, 10)
+    >>> [(token.text, tree.dep(token), tree.head(token).text) for token in tree.subtree(doc[5])]
+    """
+
+    def __init__(self, doc, start=0, end=None, parent=None):
+        self.doc = doc
+        self.start = start
+        self.end = len(doc) if end is None else end
+        if parent is None:
+            heads = [token.head.i for token in doc]
+            deps = [token.dep_ for token in doc]
+        else:
+            heads, deps = parent.heads, parent.deps
+        self.heads = list(heads)
+        self.deps = list(deps)
+        # Span.as_doc() does not copy POS tags, so parts of sentence have no POS tags like the copies
+        self.tagged = parent is None
+
+        roots = dict()
+        for i in range(self.start, self.end):
+            if self.start <= heads[i] < self.end:
+                continue
+            self.deps[i] = "dep"
+            # search for the farthest ancestor in the range, Span.as_doc() checks all ancestors up to the root
+            ancestor, found = heads[i], None
+            while True:
+                if self.start <= ancestor < self.end:
+                    found = ancestor
+                if heads[ancestor] == ancestor:
+                    break
+                ancestor = heads[ancestor]
+            if found is not None:
+                self.heads[i] = found
+            else:
+                # tokens with the same root outside the range share one artificial root
+                self.heads[i] = roots.setdefault(ancestor, i)
+
+        self.roots = []
+        self.children_ids = {i: [] for i in range(self.start, self.end)}
+        for i in range(self.start, self.end):
+            if self.heads[i] != i:
+                self.children_ids[self.heads[i]].append(i)
+            else:
+                self.roots.append(i)
+
+        # tour of the tree: 'visit' opens interval of subtree, 'add' puts token, 'close' ends interval
+        self.order = []
+        self.position, self.first, self.last, self.depth = dict(), dict(), dict(), dict()
+        stack = [("visit", root, 0) for root in reversed(self.roots)]
+        while stack:
+            action, i, depth = stack.pop()
+            if action == "visit":
+                self.first[i] = len(self.order)
+                self.depth[i] = depth
+                children = self.children_ids[i]
+                stack.append(("close", i, depth))
+                stack.extend(("visit", j, depth + 1) for j in reversed(children) if j > i)
+                stack.append(("add", i, depth))
+                stack.extend(("visit", j, depth + 1) for j in reversed(children) if j < i)
+            elif action == "add":
+                self.position[i] = len(self.order)
+                self.order.append(i)
+            else:
+                self.last[i] = len(self.order)
+
+        # number of clauses among the first tokens of the tour
+        self.clauses = [0]
+        for i in self.order:
+            self.clauses.append(self.clauses[-1] + (self.deps[i] in clause_deps))
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __iter__(self):
+        for i in range(self.start, self.end):
+            yield self.doc[i]
+
+    def bind(self, doc):
+        """
+        Get the same tree of tokens of another doc object with the same words and dependencies,
+        the index is shared without copying.
+        """
+        tree = copy.copy(self)
+        tree.doc = doc
+        return tree
+
+    def __getitem__(self, i):
+        """
+        Get token by its index in the range.
+        """
+        return self.doc[range(self.start, self.end)[i]]
+
+    def head(self, token):
+        """
+        Get head of token in the range.
+        """
+        return self.doc[self.heads[token.i]]
+
+    def dep(self, token):
+        """
+        Get dependency of token in the range.
+        """
+        return self.deps[token.i]
+
+    def pos(self, token):
+        """
+        Get POS tag of token in the range, it is empty in parts of sentence.
+        """
+        return token.pos_ if self.tagged else ""
+
+    def children(self, token):
+        """
+        Get list of children of token in the range in the order of the sentence.
+        """
+        return [self.doc[i] for i in self.children_ids[token.i]]
+
+    def lefts(self, token):
+        """
+        Get list of children of token, which precede it.
+        """
+        return [self.doc[i] for i in self.children_ids[token.i] if i < token.i]
+
+    def rights(self, token):
+        """
+        Get list of children of token, which follow it.
+        """
+        return [self.doc[i] for i in self.children_ids[token.i] if i > token.i]
+
+    def subtree(self, token):
+        """
+        Get list of tokens of subtree of token in the range in the same order as Token.subtree.
+        """
+        return [self.doc[i] for i in self.order[self.first[token.i]:self.last[token.i]]]
+
+    def subtree_size(self, token):
+        """
+        Get the total number of tokens in subtree of token.
+        """
+        return self.last[token.i] - self.first[token.i]
+
+    def contains(self, token, other):
+        """
+        Check whether other token is in subtree of token.
+        """
+        return self.first[token.i] <= self.position.get(other.i, -1) < self.last[token.i]
+
+    def is_clause(self, token):
+        """
+        Check whether dependency of token corresponds to relative clause.
+        """
+        return self.deps[token.i] in clause_deps
+
+    def has_clause(self, token):
+        """
+        Check whether subtree of token contains relative clauses.
+        """
+        return self.clauses[self.last[token.i]] > self.clauses[self.first[token.i]]
+
+    def text(self, start=None, end=None):
+        """
+        Get text of tokens from start to end like Span.text. The whole range is used by default.
+        """
+        start = self.start if start is None else start
+        end = self.end if end is None else end
+        return self.doc[start:end].text
+
+    def text_with_ws(self):
+        """
+        Get text of the range with whitespace after the last token like text of the copied doc.
+        """
+        return self.doc[self.start:self.end].text_with_ws
+
+    def entity_tokens(self):
+        """
+        Get tokens of doc.ents in the range like entities of the copied doc.
+        ValueError is raised, if the range starts inside an entity, like for the copied doc.
+        """
+        if len(self) and self.doc[self.start].ent_iob_ == "I":
+            raise ValueError("Range starts inside entity")
+        return [token for token in self if token.ent_iob_ in ("B", "I")]
+
+
+# values computed once per doc by processors, they are kept out of doc.user_data,
+# so serialization of docs is not affected, and are removed with their docs
+doc_caches = weakref.WeakKeyDictionary()
+
+
+def doc_cache(doc):
+    """
+    Get cached values of doc. Values must not refer to the doc, e.g. by tokens or spans,
+    otherwise the doc and its values are never released.
+    Parameters
+    ----------
+    doc : Spacy doc
+        Parsed sentence.
+
+    Returns
+    -------
+    cache : dict
+        Values of doc by their keys, which is updated by caller.
+    """
+    cache = doc_caches.get(doc)
+    if cache is None:
+        cache = doc_caches[doc] = dict()
+    return cache
+
+
+def dependency_tree(doc):
+    """
+    Get dependency tree of doc, which is built once and stored in doc_cache without the doc.
+    Parameters
+    ----------
+    doc : Spacy doc
+        Parsed sentence.
+
+    Returns
+    -------
+    tree : DependencyRange
+        Indexed dependency tree of the whole doc.
+    """
+    cache = doc_cache(doc)
+    tree = cache.get("dependency_tree")
+    if tree is None:
+        tree = DependencyRange(doc)
+        cache["dependency_tree"] = tree.bind(None)
+        return tree
+    return tree.bind(doc)
+
+
+day = r'(?:[12][0-9]|3[01]|0?[1-9])'
+month = r'(?:10|11|12|0[1-9])'
+year4d = r'(?:19[1-9][0-9]|20[0-9][0-9])'
+year2d = r'(?:\d\d)'
+
+day_r = r'((?:[12][0-9]|3[01]|0?[1-9]))'
+month_r = r'((?:10|11|12|0[1-9]))'
+year4d_r = r'((?:19[1-9][0-9]|20[1-9][0-9]))'
+year2d_r = r'((?:\d\d))'
+hour_r = r'((?:[01][0-9]|2[0-3]|[0-9]))'
+minute_r = r'((?:[0-5][0-9]))'
+
+shortdate_r = r'{}[-./,]{}[-./,]{}'.format(day_r, month_r, year2d_r)
+date_r = r'{}[-./,]{}[-./,]{}'.format(day_r, month_r, year4d_r)
+date_my4d_r = r'{}[.-/]{}'.format(month_r, year4d_r)
+date_my2d_r = r'{}[.-/]{}'.format(month_r, year2d_r)
+time_r = r'{}[-,.:-]{}'.format(hour_r, minute_r)
+
+
+def replace_match(old, new):
+    """
+    Make replacement function, which replaces substring inside the whole match.
+    """
+    return lambda x: x.group(0).replace(old, new)
+
+
+# Steps of pre_process_sentence in the order of application.
+# Every step is (pattern, replacement, digits, required): a compiled regular expression with replacement
+# template or function, or a plain substring with its replacement for str.replace.
+# Steps with digits=True can match only sentences with digits and are skipped for other ones.
+# Steps with required substrings can match only sentences containing one of them.
+pre_process_steps = [
+    # collapse repeated dashes, whitespaces, commas, dots and colons
+    (re.compile(r"([-,.:])\1+|(\s)\s+"), r"\1\2", False, ()),
+    (re.compile(r"([А-Яа-я\d])([-–,])([А-Яа-я])"), r"\1 \2 \3", False, ("-", "–", ",")),
+    (re.compile(r"([А-Яа-я])(\d)"), r"\1 \2", True, ()),
+    (re.compile(r"(\d)([А-Яа-я])"), r"\1 \2", True, ()),
+    (re.compile(r"г.\w"), replace_match("г.", "г "), False, ("г",)),
+    ("- х", "", False, ()),
+    (" х ", " ", False, ()),
+    ("- е", "", False, ()),
+    (" е ", " ", False, ()),
+    (re.compile(r"(19[0-9][0-9]|20[0-9][0-9])[,]"), r"\1 , ", True, (",",)),
+    (re.compile(r"([А-Яа-я])[.]([А-Яа-я\d])"), r"\1 . \2", False, (".",)),
+    (re.compile(r"([Пп]ациент) \d+ лет"), r"\1", True, ("ациент",)),
+    (re.compile(r"([Пп]ациентка) \d+ лет"), r"\1", True, ("ациентка",)),
+
+    ("–", "-", False, ()),
+    (".:", ". :", False, ()),
+    (".-", "-", False, ()),
+    (re.compile(r"[.],(\w)"), r". , \1", False, (".,",)),
+    (re.compile(r"(\d)[.],"), r"\1. , ", True, (".,",)),
+    (".,", ". , ", False, ()),
+    (re.compile(r"(\w)- "), r"\1 - ", False, ("- ",)),
+    (re.compile(r" -(\w)"), r" - \1", False, (" -",)),
+    (re.compile(r'({}[./-]{}[.-/]{})[-]'.format(day, month, year4d)), r"\1 ", True, ("-",)),
+    (re.compile(r"\D,\d"), replace_match(",", " , "), True, (",",)),
+
+    (re.compile(r"(\s)г[.],(\s)"), r"\1г ,\2", False, ("г.,",)),
+    (re.compile(r"г.[\s\w]"), replace_match("г.", "г "), False, ("г",)),
+
+    (re.compile(r'({}.{}).[-–]({}.{}.{})'.format(day, month, day, month, year4d)), r"\1 - \2", True, ("-", "–")),  # 6.12.-10.12.2010
+    (re.compile(r'({}.{}).[-–]({}.{}.{})'.format(day, month, day, month, year2d)), r"\1 - \2", True, ("-", "–")),  # 6.12.-10.12.10
+    (re.compile(r'({}.{})[-–]({}.{}.{})'.format(day, month, day, month, year4d)), r"\1 - \2", True, ("-", "–")),  # 6.12-10.12.2010
+    (re.compile(r'({}.{})[-–]({}.{}.{})'.format(day, month, day, month, year2d)), r"\1 - \2", True, ("-", "–")),  # 6.12-10.12.10
+    (re.compile(r'({}[./,-]{}[./,-]{})[-–]({}[./,-]{}[./,-]{})'.format(day, month, year2d, day, month, year4d)),
+     r"\1 - \2", True, ("-", "–")),  # 16.07.12-23.07.2012
+    (re.compile(r'({}[./,-]{}[./,-]{})[-–]({}[./,-]{}[./,-]{})'.format(day, month, year2d, day, month, year2d)),
+     r"\1 - \2", True, ("-", "–")),  # 16.07.12-23.07.12
+    (re.compile(r'({})[-–]({}[./,-]{}[./,-]{})'.format(day, day, month, year4d)), r"\1 - \2", True, ("-", "–")),  # 10-13.09.2011
+    (re.compile(r'({})[-–]({}[./,-]{}[./,-]{})'.format(day, day, month, year2d)), r"\1 - \2", True, ("-", "–")),  # 10-13.09.11
+    (re.compile(date_r), r"\1.\2.\3", True, ()),
+    (re.compile(shortdate_r), r"\1.\2.\3", True, ()),
+    (re.compile(date_my4d_r), r"\1.\2", True, ()),
+    (re.compile(date_my2d_r), r"\1.\2", True, ()),
+    (re.compile(time_r), r"\1.\2", True, ()),
+]
+
+digit_pattern = re.compile(r"\d")
+
+
+# results of pre_process_sentence by original sentences
+pre_process_cache = LRUCache(100000)
+
+
 def pre_process_sentence(sentence):
     """
     Preprocess sentence.
     Add dots in the end. Add spaces to dashes.
     Convert all dates to format %H.%M %d.%m.%y
+    Results are memoized in pre_process_cache. Use pre_process_cache.resize() to change its size
+    and pre_process_cache.info() to get hit rate.
+    Parameters
+    ----------
+    sentence : str
+        Original sentence.
+
+    Returns
+    -------
+    sentence : str
+        Processed sentence.
+    """
+    result = pre_process_cache.get(sentence)
+    if result is None:
+        result = apply_pre_process_steps(sentence)
+        pre_process_cache.put(sentence, result)
+    return result
+
+
+def apply_pre_process_steps(sentence):
+    """
+    Preprocess sentence without memoization.
+    Regular expressions are compiled once in pre_process_steps.
     Parameters
     ----------
     sentence : str
@@ -74,102 +1090,255 @@ def pre_process_sentence(sentence):
     sentence : str
         Processed sentence.
     """
-    day = r'(?:[12][0-9]|3[01]|0?[1-9])'
-    month = r'(?:10|11|12|0[1-9])'
-    year4d = r'(?:19[1-9][0-9]|20[0-9][0-9])'
-    year2d = r'(?:\d\d)'
-
-    day_r = r'((?:[12][0-9]|3[01]|0?[1-9]))'
-    month_r = r'((?:10|11|12|0[1-9]))'
-    year4d_r = r'((?:19[1-9][0-9]|20[1-9][0-9]))'
-    year2d_r = r'((?:\d\d))'
-    hour_r = r'((?:[01][0-9]|2[0-3]|[0-9]))'
-    minute_r = r'((?:[0-5][0-9]))'
-
-    shortdate_r = r'{}[-./,]{}[-./,]{}'.format(day_r, month_r, year2d_r)
-    date_r = r'{}[-./,]{}[-./,]{}'.format(day_r, month_r, year4d_r)
-    date_my4d_r = r'{}[.-/]{}'.format(month_r, year4d_r)
-    date_my2d_r = r'{}[.-/]{}'.format(month_r, year2d_r)
-    time_r = r'{}[-,.:-]{}'.format(hour_r, minute_r)
-
-    for i in [r"[-]+", r"[\s]+", r"[,]+", r"[.]+", r"[:]+"]:
-        sentence = re.sub(i, lambda x: x.group(0)[0], sentence)
-
-    sentence = re.sub(r"[А-Яа-я\d][-–,][А-Яа-я]", lambda x: x.group(
-        0).replace(x.group(0)[1], " "+x.group(0)[1]+" "), sentence)
-    sentence = re.sub(
-        r"[А-Яа-я]\d", lambda x: x.group(0).replace(x.group(0)[0], x.group(0)[0]+" "), sentence)
-    sentence = re.sub(
-        r"\d[А-Яа-я]", lambda x: x.group(0).replace(x.group(0)[-1], " "+x.group(0)[-1]), sentence)
-    sentence = re.sub(r"г.\w", lambda x: x.group(
-        0).replace("г.", "г "), sentence)
-    sentence = re.sub(r"- х", '', sentence)
-    sentence = re.sub(r" х ", ' ', sentence)
-    sentence = re.sub(r"- е", '', sentence)
-    sentence = re.sub(r" е ", ' ', sentence)
-    sentence = re.sub(r"(19[0-9][0-9]|20[0-9][0-9])[,]",
-                      lambda x: x.group(0).replace(',', ' , '), sentence)
-    sentence = re.sub(r"[А-Яа-я][.][А-Яа-я\d]",
-                      lambda x: x.group(0).replace('.', ' . '), sentence)
-    sentence = re.sub(r"[Пп]ациент \d+ лет",
-                      lambda x: x.group(0)[0:7], sentence)
-    sentence = re.sub(r"[Пп]ациентка \d+ лет",
-                      lambda x: x.group(0)[0:9], sentence)
-
-    sentence = re.sub(r"–", '-', sentence)
-    sentence = re.sub(r"[.]:", '. :', sentence)
-    sentence = re.sub(r"[.]-", '-', sentence)
-    sentence = re.sub(r"[.],\w", lambda x: x.group(
-        0).replace(',', ' , '), sentence)
-    sentence = re.sub(r"\d[.],", lambda x: x.group(
-        0).replace(',', ' , '), sentence)
-    sentence = re.sub(r"[.],", lambda x: x.group(
-        0).replace(',', ' , '), sentence)
-    sentence = re.sub(
-        r"\w-\s", lambda x: x.group(0).replace('- ', ' - '), sentence)
-    sentence = re.sub(
-        r"\s-\w", lambda x: x.group(0).replace(' -', ' - '), sentence)
-    sentence = re.sub(r'({}[./-]{}[.-/]{}[-])'.format(day, month,
-                                                      year4d), lambda x: x.group(0)[:-1] + ' ', sentence)
-    sentence = re.sub(r"\D,\d", lambda x: x.group(
-        0).replace(',', ' , '), sentence)
-
-    sentence = re.sub(r"\sг[.],\s", lambda x: x.group(
-        0).replace("г.,", "г ,"), sentence)
-    sentence = re.sub(r"г.[\s\w]", lambda x: x.group(
-        0).replace("г.", "г "), sentence)
-
-    sentence = re.sub(r'({}.{}).[-–]({}.{}.{})'.format(day, month, day, month, year4d),
-                      lambda x: '{} - {}'.format(x.group(1), x.group(2)), sentence)  # 6.12.-10.12.2010
-    sentence = re.sub(r'({}.{}).[-–]({}.{}.{})'.format(day, month, day, month, year2d),
-                      lambda x: '{} - {}'.format(x.group(1), x.group(2)), sentence)  # 6.12.-10.12.10
-    sentence = re.sub(r'({}.{})[-–]({}.{}.{})'.format(day, month, day, month, year4d),
-                      lambda x: '{} - {}'.format(x.group(1), x.group(2)), sentence)  # 6.12-10.12.2010
-    sentence = re.sub(r'({}.{})[-–]({}.{}.{})'.format(day, month, day, month, year2d),
-                      lambda x: '{} - {}'.format(x.group(1), x.group(2)), sentence)  # 6.12-10.12.10
-    sentence = re.sub(r'({}[./,-]{}[./,-]{})[-–]({}[./,-]{}[./,-]{})'.format(day, month, year2d, day,
-                                                                             month, year4d), lambda x: '{} - {}'.format(x.group(1), x.group(2)), sentence)  # 16.07.12-23.07.2012
-    sentence = re.sub(r'({}[./,-]{}[./,-]{})[-–]({}[./,-]{}[./,-]{})'.format(day, month, year2d, day,
-                                                                             month, year2d), lambda x: '{} - {}'.format(x.group(1), x.group(2)), sentence)  # 16.07.12-23.07.12
-    sentence = re.sub(r'({})[-–]({}[./,-]{}[./,-]{})'.format(day, day, month, year4d),
-                      lambda x: '{} - {}'.format(x.group(1), x.group(2)), sentence)  # 10-13.09.2011
-    sentence = re.sub(r'({})[-–]({}[./,-]{}[./,-]{})'.format(day, day, month, year2d),
-                      lambda x: '{} - {}'.format(x.group(1), x.group(2)), sentence)  # 10-13.09.11
-    sentence = re.sub(date_r, lambda x: '{}.{}.{}'.format(
-        x.group(1), x.group(2), x.group(3)), sentence)
-    sentence = re.sub(shortdate_r, lambda x: '{}.{}.{}'.format(
-        x.group(1), x.group(2), x.group(3)), sentence)
-    sentence = re.sub(date_my4d_r, lambda x: '{}.{}'.format(
-        x.group(1), x.group(2)), sentence)
-    sentence = re.sub(date_my2d_r, lambda x: '{}.{}'.format(
-        x.group(1), x.group(2)), sentence)
-    sentence = re.sub(time_r, lambda x: '{}.{}'.format(
-        x.group(1), x.group(2)), sentence)
+    # steps never add digits
+    digits = digit_pattern.search(sentence) is not None
+    for pattern, replacement, need_digits, required in pre_process_steps:
+        if need_digits and not digits:
+            continue
+        if required and not any(part in sentence for part in required):
+            continue
+        if isinstance(pattern, str):
+            sentence = sentence.replace(pattern, replacement)
+        else:
+            sentence = pattern.sub(replacement, sentence)
 
     if sentence[-1] != ".":
         sentence = sentence + " ."
     return sentence
 
+
+def pre_process_list(sentences):
+    """
+    Preprocess list of sentences.
+    """
+    return [pre_process_sentence(sentence) for sentence in sentences]
+
+
+def pre_process_batch(sentences, processes=None, parallel=20000, chunk=2000):
+    """
+    Preprocess column of sentences.
+    Identical sentences are preprocessed once. Large inputs are preprocessed in a pool of processes.
+    The result is the same as of pre_process_sentence applied to every sentence.
+    Parameters
+    ----------
+    sentences : list, Pandas Series
+        Sentences.
+    processes : int, (default=None)
+        The number of worker processes. Number of CPUs is used if None, 1 disables the pool.
+    parallel : int, (default=20000)
+        Minimum number of unique sentences to use the pool.
+    chunk : int, (default=2000)
+        The total number of sentences in one task of the pool.
+
+    Returns
+    -------
+    result : list, Pandas Series
+        Processed sentences of the same type as input. Series keeps its index and name.
+
+    Examples
+    --------
+    >>> df = pd.read_csv('data/train_time.csv')
+    >>> df['processed'] = pre_process_batch(df.sentence)
+    """
+    import numpy as np
+    import pandas as pd
+
+    values = np.asarray(sentences, dtype=object)
+    # missing values are kept as unique values, so they are rejected by pre_process_sentence as in a loop
+    try:
+        codes, unique = pd.factorize(values, use_na_sentinel=False)
+    except TypeError:
+        # pandas before 1.5
+        codes, unique = pd.factorize(values, na_sentinel=None)
+    unique = list(unique)
+    if processes != 1 and len(unique) >= parallel:
+        from concurrent.futures import ProcessPoolExecutor
+
+        parts = [unique[i:i + chunk] for i in range(0, len(unique), chunk)]
+        with ProcessPoolExecutor(processes) as pool:
+            processed = [sent for part in pool.map(pre_process_list, parts) for sent in part]
+    else:
+        processed = pre_process_list(unique)
+
+    result = np.asarray(processed, dtype=object)[codes] if len(codes) else []
+    if isinstance(sentences, pd.Series):
+        return pd.Series(result, index=sentences.index, name=sentences.name, dtype=object)
+    return list(result)
+
+
+def segment_sentence(sentence, max_length):
+    """
+    Split long preprocessed sentence into sentence-sized segments.
+    Sentences are split after tokens ending with '.', '!', '?' followed by capitalized tokens and after ';'.
+    Neighbouring parts are merged while they fit max_length, longer parts are cut into pieces of max_length tokens
+    or less, preferably after commas.
+    Parameters
+    ----------
+    sentence : str
+        Preprocessed sentence.
+    max_length : int
+        Maximum number of tokens in one segment.
+
+    Returns
+    -------
+    segments : list
+        List of segments. Joined by spaces they give the sentence with normalized whitespaces.
+    """
+    if max_length < 1:
+        raise ValueError("max_length must be at least 1, got {!r}".format(max_length))
+    tokens = sentence.split()
+    if len(tokens) <= max_length:
+        return [sentence]
+
+    parts, current = [], []
+    for i, token in enumerate(tokens):
+        current.append(token)
+        following = tokens[i + 1] if i + 1 < len(tokens) else ''
+        if token == ';' or (token[-1] in '.!?' and following[:1].isupper()):
+            parts.append(current)
+            current = []
+    if current:
+        parts.append(current)
+
+    segments, current = [], []
+    for part in parts:
+        if current and len(current) + len(part) > max_length:
+            segments.append(current)
+            current = []
+        current = current + part
+        while len(current) > max_length:
+            # cut after the last comma in the second half of the piece if possible
+            commas = [i + 1 for i in range(max_length // 2, max_length) if current[i] == ',']
+            cut = commas[-1] if commas else max_length
+            segments.append(current[:cut])
+            current = current[cut:]
+    if current:
+        segments.append(current)
+
+    return [' '.join(segment) for segment in segments]
+
+
+def merge_conllu(parses):
+    """
+    Join parses of segments into one sentence in CONLL-U.
+    Tokens are renumbered consecutively and roots of the following segments are attached to the root
+    of the first segment as 'parataxis'.
+    Parameters
+    ----------
+    parses : list
+        Parsed segments in CONLL-U.
+
+    Returns
+    -------
+    result : str
+        Parsed sentence in CONLL-U.
+    """
+    lines = []
+    offset, root = 0, None
+    for parse in parses:
+        count = 0
+        for line in parse.split("\n"):
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split("\t")
+            id_, head = parts[0], parts[6]
+            if "." in id_ or "-" in id_:
+                parts[0] = "".join(str(int(x) + offset) if x.isdigit() else x for x in re.split(r"([.-])", id_))
+            else:
+                count = max(count, int(id_))
+                parts[0] = str(int(id_) + offset)
+            if head == "0":
+                if root is None:
+                    root = parts[0]
+                else:
+                    parts[6], parts[7] = root, "parataxis"
+            elif head != "_":
+                parts[6] = str(int(head) + offset)
+            lines.append("\t".join(parts))
+        offset += count
+
+    return "\n".join(lines)
+
+
+# regular expressions of directives of date layouts, the same as in datetime.strptime
+date_directives = {
+    'd': r"(?P<d>3[0-1]|[1-2]\d|0[1-9]|[1-9]| [1-9])",
+    'm': r"(?P<m>1[0-2]|0[1-9]|[1-9])",
+    'y': r"(?P<y>\d\d)",
+    'Y': r"(?P<Y>\d\d\d\d)",
+    'H': r"(?P<H>2[0-3]|[0-1]\d|\d)",
+    'M': r"(?P<M>[0-5]\d|\d)",
+    'S': r"(?P<S>6[0-1]|[0-5]\d|\d)",
+}
+# compiled date layouts and names of their directives by layouts, None for layouts parsed by datetime.strptime
+date_layouts = dict()
+
+
+def compile_date_layout(layout):
+    """
+    Compile date layout to the same regular expression as datetime.strptime does.
+    Parameters
+    ----------
+    layout : str
+        Date layout with directives of digits only (%d, %m, %y, %Y, %H, %M, %S) and year, e.g. '%d.%m.%Y'.
+
+    Returns
+    -------
+    result : tuple, None
+        Regular expression and names of directives in the order of groups, None for other layouts.
+    """
+    pattern = re.sub(r"([\\.^$*+?\(\){}\[\]|])", r"\\\1", layout)
+    pattern = re.sub(r"\s+", r"\\s+", pattern)
+    parts = pattern.split("%")
+    names = []
+    for part in parts[1:]:
+        if not part or part[0] not in date_directives or part[0] in names:
+            return None
+        names.append(part[0])
+    if "y" not in names and "Y" not in names:
+        return None
+    regex = parts[0] + "".join(date_directives[part[0]] + part[1:] for part in parts[1:])
+    return re.compile(regex, re.IGNORECASE), names
+
+
+def strptime(string, layout):
+    """
+    Parse date like datetime.strptime. Layouts of digits, e.g. '%d.%m.%Y' or '%Y-%m-%d %H:%M',
+    are compiled once and parsed without locale checks and processing of other directives.
+    Other layouts and errors are passed to datetime.strptime, so results and errors are the same.
+    Parameters
+    ----------
+    string : str
+        Date.
+    layout : str
+        Layout of date.
+
+    Returns
+    -------
+    result : datetime
+    """
+    try:
+        compiled = date_layouts[layout]
+    except KeyError:
+        compiled = date_layouts[layout] = compile_date_layout(layout)
+    if compiled is None or not isinstance(string, str):
+        return datetime.strptime(string, layout)
+    regex, names = compiled
+    found = regex.match(string)
+    if found is None or found.end() != len(string):
+        return datetime.strptime(string, layout)
+    values = dict(zip(names, map(int, found.groups())))
+    if "y" in values:
+        year = values["y"] + (2000 if values["y"] <= 68 else 1900)
+    else:
+        year = values["Y"]
+    try:
+        return datetime(year, values.get("m", 1), values.get("d", 1),
+                        values.get("H", 0), values.get("M", 0), values.get("S", 0))
+    except ValueError:
+        return datetime.strptime(string, layout)
+
+
 def convert_to_dataframe(docs):
     """
     Present spacy docs in pandas dataframe format
@@ -183,6 +1352,8 @@ def convert_to_dataframe(docs):
     sentence : Pandas DataFrame
         Table of parsed sentences.
     """
+    import pandas as pd
+
     time_expr, rules, norms, uncertains, events = [], [], [], [], []
     sentences, dates, birthdates, stamps = [], [], [], []
 